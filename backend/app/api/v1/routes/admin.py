@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.api.v1.serializers import FastJSONResponse
+from app.core.compression import compression_stats
+from app.core.profiling import collapsed_stacks, profile_store
+from app.core.security import require_role
+from app.schemas.metrics import CompressionStatsRead
+from app.schemas.profile import ProfileRead, ProfileSummaryRead
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/profiles", response_model=list[ProfileSummaryRead])
+def list_profiles(current_user=Depends(require_role(["admin"]))) -> FastJSONResponse:
+    return FastJSONResponse(profile_store.list())
+
+
+@router.get("/profiles/{profile_id}", response_model=ProfileRead)
+def profile_detail(
+    profile_id: str, current_user=Depends(require_role(["admin"]))
+) -> FastJSONResponse:
+    try:
+        return FastJSONResponse(profile_store.summary(profile_id))
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+
+@router.get("/profiles/{profile_id}/flamegraph")
+def profile_flamegraph(
+    profile_id: str,
+    format: str = Query("speedscope", pattern="^(speedscope|collapsed)$"),
+    current_user=Depends(require_role(["admin"])),
+):
+    """The sampled stacks as a speedscope file, or as folded stacks for ``flamegraph.pl``."""
+    try:
+        document = profile_store.speedscope(profile_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "collapsed":
+        return PlainTextResponse(collapsed_stacks(document))
+    return FastJSONResponse(
+        document,
+        headers={
+            "Content-Disposition": f'attachment; filename="{profile_id}.speedscope.json"'
+        },
+    )
+
+
+@router.get("/metrics/compression", response_model=list[CompressionStatsRead])
+def compression_metrics(
+    current_user=Depends(require_role(["admin"])),
+) -> FastJSONResponse:
+    """Bytes before and after compression per encoding since this worker started."""
+    return FastJSONResponse(compression_stats.snapshot())
@@ -1,10 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.core.security import authenticate_user, create_access_token, get_current_user, get_password_hash, get_user_by_email
+from app.core.config import settings
+from app.core.security import (
+    authenticate_user,
+    create_access_token,
+    create_stream_ticket,
+    get_current_user,
+    get_password_hash,
+    get_user_by_email,
+    issue_refresh_token,
+    revoke_refresh_token,
+    rotate_refresh_token,
+)
 from app.db.session import get_db
 from app.models.user import User
-from app.schemas.auth import LoginRequest, TokenResponse
+from app.schemas.auth import (
+    LoginRequest,
+    RefreshRequest,
+    StreamTicketResponse,
+    TokenResponse,
+)
 from app.schemas.user import UserCreate, UserRead
 
 router = APIRouter(prefix="", tags=["auth"])
@@ -14,10 +30,14 @@ router = APIRouter(prefix="", tags=["auth"])
 def register(payload: UserCreate, db: Session = Depends(get_db)) -> User:
     existing = get_user_by_email(db, payload.email)
     if existing:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
+        )
     role = payload.role or "candidate"
     if role not in {"candidate", "recruiter", "admin"}:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid role")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid role"
+        )
     user = User(
         email=payload.email,
         hashed_password=get_password_hash(payload.password),
@@ -37,11 +57,46 @@ def register(payload: UserCreate, db: Session = Depends(get_db)) -> User:
 def login(payload: LoginRequest, db: Session = Depends(get_db)) -> TokenResponse:
     user = authenticate_user(db, payload.email, payload.password)
     if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials"
+        )
     access_token = create_access_token(user)
-    return TokenResponse(access_token=access_token, role=user.role, full_name=user.full_name)
+    refresh_token, _ = issue_refresh_token(db, user)
+    db.commit()
+    return TokenResponse(
+        access_token=access_token,
+        refresh_token=refresh_token,
+        role=user.role,
+        full_name=user.full_name,
+    )
+
+
+@router.post("/refresh", response_model=TokenResponse)
+def refresh(payload: RefreshRequest, db: Session = Depends(get_db)) -> TokenResponse:
+    user, refresh_token = rotate_refresh_token(db, payload.refresh_token)
+    return TokenResponse(
+        access_token=create_access_token(user),
+        refresh_token=refresh_token,
+        role=user.role,
+        full_name=user.full_name,
+    )
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(payload: RefreshRequest, db: Session = Depends(get_db)) -> None:
+    revoke_refresh_token(db, payload.refresh_token)
 
 
 @router.get("/me", response_model=UserRead)
 def read_me(current_user: User = Depends(get_current_user)) -> User:
     return current_user
+
+
+@router.post("/stream-ticket", response_model=StreamTicketResponse)
+def stream_ticket(
+    current_user: User = Depends(get_current_user),
+) -> StreamTicketResponse:
+    return StreamTicketResponse(
+        ticket=create_stream_ticket(current_user),
+        expires_in=settings.events_ticket_seconds,
+    )
@@ -1,48 +1,70 @@
+import os
+import shutil
 from pathlib import Path
 from uuid import uuid4
 
-import httpx
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from starlette.datastructures import UploadFile as StarletteUploadFile
 
+from app.api.v1.serializers import FastJSONResponse, application_payloads
 from app.core.config import settings
-from app.core.security import require_role
+from app.core.events import (
+    candidate_topic,
+    job_topic,
+    parse_last_event_id,
+    publish,
+    stream_events,
+)
+from app.core.idempotency import (
+    replay_stored,
+    request_fingerprint,
+    run_idempotent,
+    store_key,
+)
+from app.core.security import require_role, require_stream_role
 from app.db.session import get_db
+from app.db.upsert import insert_or_ignore
 from app.models.application import Application
 from app.models.job import Job
 from app.models.job_stage import JobStage
+from app.models.saved_search import SavedSearch
 from app.schemas.application import ApplicationRead
-from app.schemas.job import JobStageRead
+from app.schemas.saved_search import SavedSearchCreate, SavedSearchRead
 from app.schemas.user import UserProfileUpdate, UserRead
+from app.utils.analytics import record_stage_change
+from app.utils.archive import archived_applications_for_candidate
+from app.utils.job_alerts import index_saved_search
+from app.utils.resume_parser import parse_resume
 
 router = APIRouter(prefix="/candidate", tags=["candidate"])
 
 
-def serialize_application(application: Application) -> ApplicationRead:
-    stage = application.stage
-    stage_payload = JobStageRead.model_validate(stage) if stage else None
-    return ApplicationRead(
-        id=application.id,
-        status=application.status,
-        resume_path=application.resume_path,
-        cover_letter=application.cover_letter,
-        created_at=application.created_at,
-        updated_at=application.updated_at,
-        stage=stage_payload,
-        job_id=application.job.id,
-        job_title=application.job.title,
-        candidate=UserRead.model_validate(application.candidate),
-        notes=[],
-    )
-
-
 @router.get("/profile", response_model=UserRead)
 def get_profile(current_user=Depends(require_role(["candidate"]))) -> UserRead:
     return UserRead.model_validate(current_user)
 
 
 @router.patch("/profile", response_model=UserRead)
-def update_profile(payload: UserProfileUpdate, db: Session = Depends(get_db), current_user=Depends(require_role(["candidate"]))) -> UserRead:
+def update_profile(
+    payload: UserProfileUpdate,
+    db: Session = Depends(get_db),
+    current_user=Depends(require_role(["candidate"])),
+) -> UserRead:
     data = payload.model_dump(exclude_unset=True)
     for key, value in data.items():
         setattr(current_user, key, value)
@@ -53,14 +75,98 @@ def update_profile(payload: UserProfileUpdate, db: Session = Depends(get_db), cu
 
 
 @router.get("/applications", response_model=list[ApplicationRead])
-def list_applications(db: Session = Depends(get_db), current_user=Depends(require_role(["candidate"]))) -> list[ApplicationRead]:
-    applications = (
-        db.query(Application)
-        .filter(Application.candidate_id == current_user.id)
-        .order_by(Application.created_at.desc())
-        .all()
+def list_applications(
+    include_archived: bool = Query(False),
+    db: Session = Depends(get_db),
+    current_user=Depends(require_role(["candidate"])),
+) -> FastJSONResponse:
+    applications = application_payloads(
+        db, Application.candidate_id == current_user.id, include_notes=False
+    )
+    if include_archived:
+        applications += archived_applications_for_candidate(db, current_user.id)
+    return FastJSONResponse(applications)
+
+
+@router.get("/applications/{application_id}", response_model=ApplicationRead)
+def get_application(
+    application_id: int,
+    db: Session = Depends(get_db),
+    current_user=Depends(require_role(["candidate"])),
+) -> FastJSONResponse:
+    applications = application_payloads(
+        db,
+        Application.id == application_id,
+        Application.candidate_id == current_user.id,
+        include_notes=False,
+    )
+    if not applications:
+        raise HTTPException(status_code=404, detail="Application not found")
+    return FastJSONResponse(applications[0])
+
+
+@router.get("/saved-searches", response_model=list[SavedSearchRead])
+def list_saved_searches(
+    db: Session = Depends(get_db), current_user=Depends(require_role(["candidate"]))
+) -> list[SavedSearch]:
+    return list(
+        db.scalars(
+            select(SavedSearch)
+            .where(SavedSearch.user_id == current_user.id)
+            .order_by(SavedSearch.created_at.desc())
+        )
+    )
+
+
+@router.post(
+    "/saved-searches",
+    response_model=SavedSearchRead,
+    status_code=status.HTTP_201_CREATED,
+)
+def create_saved_search(
+    payload: SavedSearchCreate,
+    db: Session = Depends(get_db),
+    current_user=Depends(require_role(["candidate"])),
+) -> SavedSearch:
+    search = SavedSearch(user_id=current_user.id, **payload.model_dump())
+    db.add(search)
+    db.flush()
+    index_saved_search(db, search)
+    db.commit()
+    db.refresh(search)
+    return search
+
+
+@router.delete("/saved-searches/{search_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_saved_search(
+    search_id: int,
+    db: Session = Depends(get_db),
+    current_user=Depends(require_role(["candidate"])),
+) -> None:
+    search = db.get(SavedSearch, search_id)
+    if not search or search.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Saved search not found")
+    db.delete(search)
+    db.commit()
+
+
+@router.get("/events")
+async def application_events(
+    request: Request,
+    last_event_id: str | None = Header(None),
+    resume_from: str | None = Query(None, alias="last_event_id"),
+    user_id: int = Depends(require_stream_role(["candidate"])),
+) -> StreamingResponse:
+    stream = stream_events(
+        request,
+        {candidate_topic(user_id)},
+        parse_last_event_id(last_event_id or resume_from),
+    )
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    return [serialize_application(app) for app in applications]
 
 
 @router.post("/resume/autofill")
@@ -68,70 +174,145 @@ async def autofill_resume(
     resume: UploadFile = File(...),
     current_user=Depends(require_role(["candidate"])),
 ) -> dict:
-    if not settings.resume_parser_url or not settings.resume_parser_api_key:
-        raise HTTPException(status_code=503, detail="Resume parsing service not configured")
+    return await parse_resume(resume)
+
 
-    files = {
-        "resume": (resume.filename or "resume", await resume.read(), resume.content_type or "application/octet-stream"),
+APPLY_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["job_id"],
+                    "properties": {
+                        "job_id": {"type": "integer"},
+                        "cover_letter": {"type": "string"},
+                        "resume": {"type": "string", "format": "binary"},
+                    },
+                }
+            }
+        },
     }
-    headers = {"Authorization": f"Bearer {settings.resume_parser_api_key}"}
-
-    try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            response = await client.post(settings.resume_parser_url, headers=headers, files=files)
-            if response.status_code >= 400:
-                raise HTTPException(status_code=response.status_code, detail=response.text or "Resume parsing failed")
-            payload = response.json()
-    except httpx.TimeoutException as exc:
-        raise HTTPException(status_code=504, detail="Resume parsing service timed out") from exc
-    except httpx.HTTPError as exc:
-        raise HTTPException(status_code=502, detail="Resume parsing service unavailable") from exc
-
-    return payload
-
-
-@router.post("/applications", response_model=ApplicationRead)
-def apply_for_job(
-    job_id: int = Form(...),
-    cover_letter: str | None = Form(None),
-    resume: UploadFile | None = File(None),
+}
+
+
+@router.post(
+    "/applications",
+    response_model=ApplicationRead,
+    openapi_extra=APPLY_REQUEST_BODY,
+)
+async def apply_for_job(
+    request: Request,
+    idempotency_key: str | None = Header(None, max_length=255),
     db: Session = Depends(get_db),
     current_user=Depends(require_role(["candidate"])),
-) -> ApplicationRead:
-    job = db.get(Job, job_id)
-    if not job or job.status != "open":
-        raise HTTPException(status_code=404, detail="Job not available")
-    existing = (
-        db.query(Application)
-        .filter(Application.candidate_id == current_user.id, Application.job_id == job.id)
-        .first()
+) -> Response:
+    key = (
+        store_key(current_user.id, "apply_for_job", idempotency_key)
+        if idempotency_key
+        else None
     )
-    if existing:
-        raise HTTPException(status_code=400, detail="Already applied")
-    if job.stages:
-        stage = sorted(job.stages, key=lambda s: s.position)[0]
-    else:
-        stage = JobStage(job_id=job.id, name="Applied", position=1)
-        db.add(stage)
-        db.flush()
-    resume_path = None
-    if resume:
-        uploads_dir = Path(settings.resume_upload_dir)
-        uploads_dir.mkdir(parents=True, exist_ok=True)
-        original_name = Path(resume.filename or "resume.pdf").name.replace(" ", "_")
-        filename = f"{current_user.id}_{job.id}_{uuid4().hex}_{original_name}"
-        file_path = uploads_dir / filename
-        with open(file_path, "wb") as buffer:
-            buffer.write(resume.file.read())
-        resume_path = f"/uploads/{uploads_dir.name}/{filename}"
-    application = Application(
-        candidate_id=current_user.id,
-        job_id=job.id,
-        stage_id=stage.id,
-        cover_letter=cover_letter,
-        resume_path=resume_path,
-    )
-    db.add(application)
-    db.commit()
-    db.refresh(application)
-    return serialize_application(application)
+    # FastAPI reads Form/File parameters before anything else, so the form is
+    # parsed here, after a retry has had the chance to be answered from its key
+    replayed = await run_in_threadpool(replay_stored, key)
+    if replayed is not None:
+        return replayed
+    async with request.form() as form:
+        try:
+            job_id = int(form["job_id"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="job_id must be an integer",
+            )
+        cover_letter = form.get("cover_letter") or None
+        resume = form.get("resume")
+        if not isinstance(resume, StarletteUploadFile) or not resume.filename:
+            resume = None
+
+        def submit() -> FastJSONResponse:
+            job = db.get(Job, job_id)
+            if not job or job.status != "open":
+                raise HTTPException(status_code=404, detail="Job not available")
+            first_stage = (
+                select(JobStage.id)
+                .where(JobStage.job_id == job.id)
+                .order_by(JobStage.position)
+                .limit(1)
+            )
+            stage_id = db.scalar(first_stage)
+            if stage_id is None:
+                # Lock the job so concurrent first applicants don't each add an "Applied" stage
+                db.execute(select(Job.id).where(Job.id == job.id).with_for_update())
+                stage_id = db.scalar(first_stage)
+                if stage_id is None:
+                    stage = JobStage(job_id=job.id, name="Applied", position=1)
+                    db.add(stage)
+                    db.flush()
+                    stage_id = stage.id
+            # The file is complete on disk before the row that links it commits, and
+            # removed again if the row doesn't, so there is a single commit to fail
+            partial_path = None
+            resume_file = None
+            resume_path = None
+            try:
+                if resume:
+                    uploads_dir = Path(settings.resume_upload_dir)
+                    uploads_dir.mkdir(parents=True, exist_ok=True)
+                    original_name = Path(resume.filename).name.replace(" ", "_")
+                    filename = (
+                        f"{current_user.id}_{job.id}_{uuid4().hex}_{original_name}"
+                    )
+                    partial_path = uploads_dir / f".{filename}.part"
+                    with open(partial_path, "wb") as buffer:
+                        shutil.copyfileobj(resume.file, buffer)
+                    resume_file = uploads_dir / filename
+                    os.replace(partial_path, resume_file)
+                    resume_path = f"/uploads/{uploads_dir.name}/{filename}"
+                application_id = insert_or_ignore(
+                    db,
+                    Application,
+                    {
+                        "candidate_id": current_user.id,
+                        "job_id": job.id,
+                        "stage_id": stage_id,
+                        "cover_letter": cover_letter,
+                        "resume_path": resume_path,
+                    },
+                )
+                if application_id is None:
+                    db.rollback()
+                    raise HTTPException(status_code=400, detail="Already applied")
+                application = db.get(Application, application_id)
+                record_stage_change(
+                    db, application, None, stage_id, actor_id=current_user.id
+                )
+                db.commit()
+            except BaseException:
+                for path in (partial_path, resume_file):
+                    if path is not None:
+                        path.unlink(missing_ok=True)
+                raise
+            publish(
+                [job_topic(job.id), candidate_topic(current_user.id)],
+                "application.created",
+                {
+                    "application_id": application.id,
+                    "job_id": job.id,
+                    "stage_id": application.stage_id,
+                },
+            )
+            return FastJSONResponse(
+                application_payloads(
+                    db, Application.id == application.id, include_notes=False
+                )[0]
+            )
+
+        fingerprint = request_fingerprint(
+            job_id,
+            cover_letter,
+            resume.filename if resume else None,
+            resume.size if resume else None,
+        )
+        return await run_in_threadpool(run_idempotent, key, fingerprint, submit)
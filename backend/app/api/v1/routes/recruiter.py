@@ -1,74 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import timedelta
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.core.security import require_role
-from app.db.session import get_db
+from app.api.v1.serializers import FastJSONResponse, application_payloads, job_payloads
+from app.core.clock import utcnow
+from app.core.events import (
+    candidate_topic,
+    job_topic,
+    parse_last_event_id,
+    publish,
+    stream_events,
+)
+from app.core.response_cache import public_cache
+from app.core.security import require_role, require_stream_role
+from app.db.session import SessionLocal, get_db
 from app.models.application import Application
 from app.models.application_note import ApplicationNote
 from app.models.job import Job
 from app.models.job_stage import JobStage
-from app.schemas.application import ApplicationMove, ApplicationNoteCreate, ApplicationNoteRead, ApplicationRead
-from app.schemas.job import JobCreate, JobRead, JobStageRead, JobUpdate
-from app.schemas.user import UserRead
+from app.models.stage_rollup import RollupCheckpoint, StageDailyRollup, StageRollup
+from app.models.user import User
+from app.schemas.analytics import JobAnalyticsRead, StageDailyRead, StageFunnelRead
+from app.schemas.application import (
+    ApplicationMove,
+    ApplicationNoteCreate,
+    ApplicationRead,
+)
+from app.schemas.job import JobCreate, JobRead, JobUpdate
+from app.schemas.user import DuplicateUserRead, UserRead
+from app.utils.analytics import CHECKPOINT_NAME, record_stage_change
+from app.utils.archive import archived_job_detail, archived_jobs_for_recruiter
+from app.utils.dedup import stored_duplicate_pairs
+from app.utils.job_alerts import percolate_job
+from app.utils.stages import apply_stage_plan, edits_from_names, plan_stage_changes
 
 router = APIRouter(prefix="/recruiter", tags=["recruiter"])
 
 
-def serialize_job(job: Job) -> JobRead:
-    return JobRead(
-        id=job.id,
-        title=job.title,
-        company=job.company,
-        location=job.location,
-        department=job.department,
-        employment_type=job.employment_type,
-        status=job.status,
-        description=job.description,
-        requirements=job.requirements,
-        min_salary=float(job.min_salary) if job.min_salary is not None else None,
-        max_salary=float(job.max_salary) if job.max_salary is not None else None,
-        created_at=job.created_at,
-        stages=[JobStageRead.model_validate(stage) for stage in sorted(job.stages, key=lambda s: s.position)],
-        applications_count=len(job.applications),
-    )
-
-
-def serialize_application(application: Application) -> ApplicationRead:
-    stage = application.stage
-    notes = [
-        ApplicationNoteRead(
-            id=note.id,
-            body=note.body,
-            created_at=note.created_at,
-            author_id=note.author_id,
-            author_name=note.author.full_name if note.author else None,
-        )
-        for note in sorted(application.notes, key=lambda n: n.created_at)
-    ]
-    stage_payload = JobStageRead.model_validate(stage) if stage else None
-    return ApplicationRead(
-        id=application.id,
-        status=application.status,
-        resume_path=application.resume_path,
-        cover_letter=application.cover_letter,
-        created_at=application.created_at,
-        updated_at=application.updated_at,
-        stage=stage_payload,
-        job_id=application.job.id,
-        job_title=application.job.title,
-        candidate=UserRead.model_validate(application.candidate),
-        notes=notes,
-    )
-
-
 @router.get("/jobs", response_model=list[JobRead])
-def list_jobs(db: Session = Depends(get_db), current_user=Depends(require_role(["recruiter", "admin"]))) -> list[JobRead]:
-    jobs = db.query(Job).filter(Job.created_by_id == current_user.id).order_by(Job.created_at.desc()).all()
-    return [serialize_job(job) for job in jobs]
+def list_jobs(
+    include_archived: bool = Query(False),
+    db: Session = Depends(get_db),
+    current_user=Depends(require_role(["recruiter", "admin"])),
+) -> FastJSONResponse:
+    jobs = job_payloads(db, Job.created_by_id == current_user.id)
+    if include_archived:
+        jobs += archived_jobs_for_recruiter(db, current_user.id)
+    return FastJSONResponse(jobs)
 
 
 @router.post("/jobs", response_model=JobRead, status_code=status.HTTP_201_CREATED)
-def create_job(payload: JobCreate, db: Session = Depends(get_db), current_user=Depends(require_role(["recruiter", "admin"]))) -> JobRead:
+def create_job(
+    payload: JobCreate,
+    db: Session = Depends(get_db),
+    current_user=Depends(require_role(["recruiter", "admin"])),
+) -> FastJSONResponse:
     job = Job(
         title=payload.title,
         company=payload.company,
@@ -81,75 +70,281 @@ def create_job(payload: JobCreate, db: Session = Depends(get_db), current_user=D
         min_salary=payload.min_salary,
         max_salary=payload.max_salary,
         created_by_id=current_user.id,
+        closed_at=None if payload.status == "open" else utcnow(),
     )
     db.add(job)
     db.flush()
-    stage_names = payload.stage_names or ["Applied", "Screening", "Interview", "Offer", "Hired"]
+    stage_names = payload.stage_names or [
+        "Applied",
+        "Screening",
+        "Interview",
+        "Offer",
+        "Hired",
+    ]
     for index, name in enumerate(stage_names, start=1):
         db.add(JobStage(job_id=job.id, name=name, position=index))
+    percolate_job(db, job)
     db.commit()
-    db.refresh(job)
-    return serialize_job(job)
+    public_cache.invalidate()
+    return FastJSONResponse(
+        job_payloads(db, Job.id == job.id)[0], status_code=status.HTTP_201_CREATED
+    )
 
 
 @router.get("/jobs/{job_id}")
-def job_detail(job_id: int, db: Session = Depends(get_db), current_user=Depends(require_role(["recruiter", "admin"]))) -> dict:
+def job_detail(
+    job_id: int,
+    include_archived: bool = Query(False),
+    db: Session = Depends(get_db),
+    current_user=Depends(require_role(["recruiter", "admin"])),
+) -> FastJSONResponse:
     job = db.get(Job, job_id)
     if not job or job.created_by_id != current_user.id:
+        archived = (
+            archived_job_detail(db, job_id, current_user.id)
+            if include_archived and not job
+            else None
+        )
+        if archived is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return FastJSONResponse(archived)
+    return FastJSONResponse(
+        {
+            "job": job_payloads(db, Job.id == job.id)[0],
+            "applications": application_payloads(db, Application.job_id == job.id),
+        }
+    )
+
+
+@router.get("/jobs/{job_id}/events")
+def job_events(
+    job_id: int,
+    request: Request,
+    last_event_id: str | None = Header(None),
+    resume_from: str | None = Query(None, alias="last_event_id"),
+    user_id: int = Depends(require_stream_role(["recruiter", "admin"])),
+) -> StreamingResponse:
+    # The stream outlives the request, so the ownership check gets its own short session
+    with SessionLocal() as db:
+        owner_id = db.scalar(select(Job.created_by_id).where(Job.id == job_id))
+    if owner_id is None or owner_id != user_id:
         raise HTTPException(status_code=404, detail="Job not found")
-    applications = (
-        db.query(Application)
-        .filter(Application.job_id == job.id)
-        .order_by(Application.created_at.desc())
-        .all()
+    stream = stream_events(
+        request, {job_topic(job_id)}, parse_last_event_id(last_event_id or resume_from)
     )
-    return {
-        "job": serialize_job(job).model_dump(),
-        "applications": [serialize_application(app).model_dump() for app in applications],
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/jobs/{job_id}/analytics", response_model=JobAnalyticsRead)
+def job_analytics(
+    job_id: int,
+    days: int = Query(30, ge=0, le=365),
+    db: Session = Depends(get_db),
+    current_user=Depends(require_role(["recruiter", "admin"])),
+) -> JobAnalyticsRead:
+    job = db.get(Job, job_id)
+    if not job or job.created_by_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    rollups = {
+        row.stage_id: row
+        for row in db.scalars(select(StageRollup).where(StageRollup.job_id == job.id))
     }
+    ordered_stages = sorted(job.stages, key=lambda s: s.position)
+    stages: list[StageFunnelRead] = []
+    for index, stage in enumerate(ordered_stages):
+        rollup = rollups.get(stage.id)
+        entered = rollup.entered if rollup else 0
+        conversion_rate = None
+        if entered and index + 1 < len(ordered_stages):
+            next_rollup = rollups.get(ordered_stages[index + 1].id)
+            conversion_rate = round(
+                (next_rollup.entered if next_rollup else 0) / entered, 4
+            )
+        stages.append(
+            StageFunnelRead(
+                stage_id=stage.id,
+                name=stage.name,
+                position=stage.position,
+                entered=entered,
+                exited=rollup.exited if rollup else 0,
+                conversion_rate=conversion_rate,
+                median_seconds=rollup.median_seconds if rollup else None,
+                p90_seconds=rollup.p90_seconds if rollup else None,
+            )
+        )
+    daily: list[StageDailyRead] = []
+    if days:
+        since = (utcnow() - timedelta(days=days)).date()
+        daily = [
+            StageDailyRead(
+                stage_id=row.stage_id,
+                day=row.day,
+                entered=row.entered,
+                exited=row.exited,
+                median_seconds=row.median_seconds,
+                p90_seconds=row.p90_seconds,
+            )
+            for row in db.scalars(
+                select(StageDailyRollup)
+                .where(StageDailyRollup.job_id == job.id, StageDailyRollup.day >= since)
+                .order_by(StageDailyRollup.day, StageDailyRollup.stage_id)
+            )
+        ]
+    checkpoint = db.get(RollupCheckpoint, CHECKPOINT_NAME)
+    return JobAnalyticsRead(
+        job_id=job.id,
+        refreshed_at=checkpoint.updated_at if checkpoint else None,
+        stages=stages,
+        daily=daily,
+    )
 
 
 @router.patch("/jobs/{job_id}", response_model=JobRead)
-def update_job(job_id: int, payload: JobUpdate, db: Session = Depends(get_db), current_user=Depends(require_role(["recruiter", "admin"]))) -> JobRead:
+def update_job(
+    job_id: int,
+    payload: JobUpdate,
+    db: Session = Depends(get_db),
+    current_user=Depends(require_role(["recruiter", "admin"])),
+) -> FastJSONResponse:
     job = db.get(Job, job_id)
     if not job or job.created_by_id != current_user.id:
         raise HTTPException(status_code=404, detail="Job not found")
     data = payload.model_dump(exclude_unset=True)
     stage_names = data.pop("stage_names", None)
+    stage_edits = data.pop("stages", None)
+    stage_remap = data.pop("stage_remap", None)
+    reopened = data.get("status") == "open" and job.status != "open"
+    if reopened:
+        job.closed_at = None
+    elif job.status == "open" and data.get("status", "open") != "open":
+        job.closed_at = utcnow()
     for key, value in data.items():
         setattr(job, key, value)
-    if stage_names is not None:
-        db.query(JobStage).filter(JobStage.job_id == job.id).delete()
-        for index, name in enumerate(stage_names, start=1):
-            db.add(JobStage(job_id=job.id, name=name, position=index))
+    if stage_edits is not None:
+        edits = [(edit.id, edit.name) for edit in payload.stages]
+    elif stage_names is not None:
+        edits = edits_from_names(job.stages, stage_names)
+    else:
+        edits = None
+    if edits is not None:
+        try:
+            plan = plan_stage_changes(job.stages, edits, stage_remap)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        apply_stage_plan(db, job, plan, actor_id=current_user.id)
+    if reopened:
+        percolate_job(db, job)
     db.add(job)
     db.commit()
-    db.refresh(job)
-    return serialize_job(job)
+    public_cache.invalidate()
+    return FastJSONResponse(job_payloads(db, Job.id == job.id)[0])
+
+
+@router.get("/applications/{application_id}", response_model=ApplicationRead)
+def get_application(
+    application_id: int,
+    db: Session = Depends(get_db),
+    current_user=Depends(require_role(["recruiter", "admin"])),
+) -> FastJSONResponse:
+    applications = application_payloads(
+        db, Application.id == application_id, Job.created_by_id == current_user.id
+    )
+    if not applications:
+        raise HTTPException(status_code=404, detail="Application not found")
+    return FastJSONResponse(applications[0])
 
 
 @router.post("/applications/{application_id}/move", response_model=ApplicationRead)
-def move_application(application_id: int, payload: ApplicationMove, db: Session = Depends(get_db), current_user=Depends(require_role(["recruiter", "admin"]))) -> ApplicationRead:
+def move_application(
+    application_id: int,
+    payload: ApplicationMove,
+    db: Session = Depends(get_db),
+    current_user=Depends(require_role(["recruiter", "admin"])),
+) -> FastJSONResponse:
     application = db.get(Application, application_id)
     if not application or application.job.created_by_id != current_user.id:
         raise HTTPException(status_code=404, detail="Application not found")
     stage = db.get(JobStage, payload.stage_id)
     if not stage or stage.job_id != application.job_id:
         raise HTTPException(status_code=400, detail="Invalid stage")
+    record_stage_change(
+        db, application, application.stage_id, stage.id, actor_id=current_user.id
+    )
     application.stage_id = stage.id
     db.add(application)
     db.commit()
     db.refresh(application)
-    return serialize_application(application)
+    publish(
+        [job_topic(application.job_id), candidate_topic(application.candidate_id)],
+        "application.moved",
+        {
+            "application_id": application.id,
+            "job_id": application.job_id,
+            "stage_id": stage.id,
+        },
+    )
+    return FastJSONResponse(
+        application_payloads(db, Application.id == application.id)[0]
+    )
 
 
 @router.post("/applications/{application_id}/notes", response_model=ApplicationRead)
-def add_note(application_id: int, payload: ApplicationNoteCreate, db: Session = Depends(get_db), current_user=Depends(require_role(["recruiter", "admin"]))) -> ApplicationRead:
+def add_note(
+    application_id: int,
+    payload: ApplicationNoteCreate,
+    db: Session = Depends(get_db),
+    current_user=Depends(require_role(["recruiter", "admin"])),
+) -> FastJSONResponse:
     application = db.get(Application, application_id)
     if not application or application.job.created_by_id != current_user.id:
         raise HTTPException(status_code=404, detail="Application not found")
-    note = ApplicationNote(application_id=application.id, author_id=current_user.id, body=payload.body)
+    note = ApplicationNote(
+        application_id=application.id, author_id=current_user.id, body=payload.body
+    )
     db.add(note)
     db.commit()
     db.refresh(application)
-    return serialize_application(application)
+    publish(
+        [job_topic(application.job_id)],
+        "note.added",
+        {
+            "application_id": application.id,
+            "job_id": application.job_id,
+            "note_id": note.id,
+            "author_id": note.author_id,
+        },
+    )
+    return FastJSONResponse(
+        application_payloads(db, Application.id == application.id)[0]
+    )
+
+
+@router.get("/candidates/duplicates", response_model=list[DuplicateUserRead])
+def list_duplicate_candidates(
+    threshold: float = Query(0.5, ge=0.0, le=1.0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user=Depends(require_role(["recruiter", "admin"])),
+) -> list[DuplicateUserRead]:
+    pairs = stored_duplicate_pairs(db, threshold=threshold, limit=limit)
+    user_ids = {pair.user_id for pair in pairs} | {pair.other_user_id for pair in pairs}
+    users = (
+        {
+            user.id: user
+            for user in db.scalars(select(User).where(User.id.in_(user_ids)))
+        }
+        if user_ids
+        else {}
+    )
+    return [
+        DuplicateUserRead(
+            user=UserRead.model_validate(users[pair.user_id]),
+            duplicate=UserRead.model_validate(users[pair.other_user_id]),
+            similarity=pair.similarity,
+        )
+        for pair in pairs
+    ]
@@ -0,0 +1,270 @@
+"""Response building straight from row tuples.
+
+The ``*_payloads`` helpers select only the columns a response needs, batch the
+child rows (stages, notes, application counts) into one query each and build
+plain dicts shaped exactly like the ``app.schemas`` read models. Routes return
+them through ``FastJSONResponse``, which FastAPI sends as-is, so each object is
+built once and encoded once instead of being validated into a model, validated
+again against ``response_model`` and dumped.
+
+The read models stay the documented contract: routes keep declaring them as
+``response_model`` for OpenAPI, and ``job_adapter`` / ``application_adapter``
+can validate a payload against them where a check is wanted.
+"""
+
+from __future__ import annotations
+
+import json
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.application import Application
+from app.models.application_note import ApplicationNote
+from app.models.job import Job
+from app.models.job_stage import JobStage
+from app.models.user import User
+from app.schemas.application import ApplicationRead
+from app.schemas.job import JobRead
+
+job_adapter = TypeAdapter(list[JobRead])
+application_adapter = TypeAdapter(list[ApplicationRead])
+
+JOB_COLUMNS = (
+    Job.id,
+    Job.title,
+    Job.company,
+    Job.location,
+    Job.department,
+    Job.employment_type,
+    Job.status,
+    Job.description,
+    Job.requirements,
+    Job.min_salary,
+    Job.max_salary,
+    Job.created_at,
+)
+USER_COLUMNS = (
+    User.id,
+    User.email,
+    User.full_name,
+    User.role,
+    User.phone,
+    User.location,
+    User.bio,
+    User.created_at,
+)
+
+
+def _json_default(value: Any) -> Any:
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+@lru_cache(maxsize=1)
+def _orjson():
+    # Imported on the first response rather than at startup
+    try:
+        import orjson
+    except ImportError:  # pragma: no cover - orjson is in requirements.txt
+        return None
+    return orjson
+
+
+def dumps(content: Any) -> bytes:
+    """Encode ``content`` as compact UTF-8 JSON, with orjson when available."""
+    orjson = _orjson()
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, default=_json_default, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered with orjson when available."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _money(value) -> float | None:
+    return float(value) if value is not None else None
+
+
+def user_payload(row) -> dict:
+    user_id, email, full_name, role, phone, location, bio, created_at = row
+    return {
+        "id": user_id,
+        "email": email,
+        "full_name": full_name,
+        "role": role,
+        "phone": phone,
+        "location": location,
+        "bio": bio,
+        "created_at": created_at,
+    }
+
+
+def job_payloads(db: Session, *criteria) -> list[dict]:
+    """Build ``JobRead``-shaped dicts for jobs matching ``criteria``, newest first."""
+    job_ids = select(Job.id).where(*criteria)
+    rows = db.execute(
+        select(*JOB_COLUMNS).where(*criteria).order_by(Job.created_at.desc())
+    ).all()
+    if not rows:
+        return []
+    stages: dict[int, list[dict]] = defaultdict(list)
+    for job_id, stage_id, name, position in db.execute(
+        select(JobStage.job_id, JobStage.id, JobStage.name, JobStage.position)
+        .where(JobStage.job_id.in_(job_ids))
+        .order_by(JobStage.job_id, JobStage.position)
+    ):
+        stages[job_id].append({"id": stage_id, "name": name, "position": position})
+    counts = dict(
+        db.execute(
+            select(Application.job_id, func.count(Application.id))
+            .where(Application.job_id.in_(job_ids))
+            .group_by(Application.job_id)
+        ).all()
+    )
+    return [
+        {
+            "id": job_id,
+            "title": title,
+            "company": company,
+            "location": location,
+            "department": department,
+            "employment_type": employment_type,
+            "status": status,
+            "description": description,
+            "requirements": requirements,
+            "min_salary": _money(min_salary),
+            "max_salary": _money(max_salary),
+            "created_at": created_at,
+            "stages": stages.get(job_id, []),
+            "applications_count": counts.get(job_id, 0),
+        }
+        for (
+            job_id,
+            title,
+            company,
+            location,
+            department,
+            employment_type,
+            status,
+            description,
+            requirements,
+            min_salary,
+            max_salary,
+            created_at,
+        ) in rows
+    ]
+
+
+def application_payloads(
+    db: Session, *criteria, include_notes: bool = True
+) -> list[dict]:
+    """Build ``ApplicationRead``-shaped dicts for applications matching ``criteria``."""
+    rows = db.execute(
+        select(
+            Application.id,
+            Application.status,
+            Application.resume_path,
+            Application.cover_letter,
+            Application.created_at,
+            Application.updated_at,
+            Application.job_id,
+            Job.title,
+            JobStage.id,
+            JobStage.name,
+            JobStage.position,
+            *USER_COLUMNS,
+        )
+        .join(Job, Job.id == Application.job_id)
+        .join(User, User.id == Application.candidate_id)
+        .outerjoin(JobStage, JobStage.id == Application.stage_id)
+        .where(*criteria)
+        .order_by(Application.created_at.desc())
+    ).all()
+    if not rows:
+        return []
+    notes: dict[int, list[dict]] = defaultdict(list)
+    if include_notes:
+        application_ids = select(Application.id).where(*criteria)
+        for (
+            application_id,
+            note_id,
+            body,
+            created_at,
+            author_id,
+            author_name,
+        ) in db.execute(
+            select(
+                ApplicationNote.application_id,
+                ApplicationNote.id,
+                ApplicationNote.body,
+                ApplicationNote.created_at,
+                ApplicationNote.author_id,
+                User.full_name,
+            )
+            .outerjoin(User, User.id == ApplicationNote.author_id)
+            .where(ApplicationNote.application_id.in_(application_ids))
+            .order_by(ApplicationNote.created_at)
+        ):
+            notes[application_id].append(
+                {
+                    "id": note_id,
+                    "body": body,
+                    "created_at": created_at,
+                    "author_id": author_id,
+                    "author_name": author_name,
+                }
+            )
+    payloads: list[dict] = []
+    for row in rows:
+        (
+            application_id,
+            status,
+            resume_path,
+            cover_letter,
+            created_at,
+            updated_at,
+            job_id,
+            job_title,
+            stage_id,
+            stage_name,
+            stage_position,
+        ) = row[:11]
+        payloads.append(
+            {
+                "id": application_id,
+                "status": status,
+                "resume_path": resume_path,
+                "cover_letter": cover_letter,
+                "created_at": created_at,
+                "updated_at": updated_at,
+                "stage": (
+                    {
+                        "id": stage_id,
+                        "name": stage_name,
+                        "position": stage_position,
+                    }
+                    if stage_id is not None
+                    else None
+                ),
+                "job_id": job_id,
+                "job_title": job_title,
+                "candidate": user_payload(row[11:]),
+                "notes": notes.get(application_id, []),
+            }
+        )
+    return payloads
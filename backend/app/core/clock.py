@@ -0,0 +1,7 @@
+"""Current time as naive UTC, matching the ``DateTime`` columns it is compared with."""
+
+from datetime import UTC, datetime
+
+
+def utcnow() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
@@ -0,0 +1,252 @@
+"""Negotiated response compression.
+
+``CompressionMiddleware`` picks the best of zstd, brotli and gzip the client
+accepts (by ``Accept-Encoding`` q-value, then in that order) and compresses
+text and JSON responses as they stream, so large bodies are never buffered
+whole. Bodies under ``COMPRESSION_MIN_SIZE`` are sent as-is, as are event
+streams and responses that already carry a ``Content-Encoding``,
+such as the precompressed bodies from ``app.core.response_cache``. Every
+compressible response gets ``Vary: Accept-Encoding``, including those sent
+as-is, so a shared cache never hands one client's encoding to another.
+
+gzip is always available; brotli and zstd are used when their packages are
+installed. Bytes in and out per encoding are counted in ``compression_stats``
+and served at ``/admin/metrics/compression``.
+"""
+
+from __future__ import annotations
+
+import threading
+import zlib
+from dataclasses import dataclass
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is in requirements.txt
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard is in requirements.txt
+    zstandard = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+UNCOMPRESSIBLE_TYPES = ("text/event-stream",)
+
+
+class _BrotliStream:
+    def __init__(self, quality: int) -> None:
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+@dataclass(frozen=True)
+class Codec:
+    """An encoding with a fast streaming level and a denser one-shot level for cached bodies.
+
+    The cache level is moderate rather than the codec's maximum: cached bodies
+    are compressed on the request that first asks for them, and the top
+    levels cost tens of times more CPU for a few percent smaller output.
+    """
+
+    name: str
+    stream_level: int
+    cache_level: int
+
+    def compressor(self):
+        if self.name == "gzip":
+            return zlib.compressobj(self.stream_level, zlib.DEFLATED, 31)
+        if self.name == "br":
+            return _BrotliStream(self.stream_level)
+        return zstandard.ZstdCompressor(level=self.stream_level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        if self.name == "gzip":
+            compressor = zlib.compressobj(self.cache_level, zlib.DEFLATED, 31)
+            return compressor.compress(data) + compressor.flush()
+        if self.name == "br":
+            return brotli.compress(data, quality=self.cache_level)
+        return zstandard.ZstdCompressor(level=self.cache_level).compress(data)
+
+
+CODECS = {
+    codec.name: codec
+    for codec, available in (
+        (Codec("zstd", stream_level=3, cache_level=6), zstandard is not None),
+        (Codec("br", stream_level=4, cache_level=5), brotli is not None),
+        (Codec("gzip", stream_level=6, cache_level=6), True),
+    )
+    if available
+}
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    """The preferred available encoding in an ``Accept-Encoding`` header, or ``None``."""
+    weights: dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            weights[name.strip()] = quality
+    best, best_quality = None, 0.0
+    for name in CODECS:
+        quality = weights.get(name, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+class CompressionStats:
+    """Per-encoding counters of responses and bytes before/after compression."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: dict[str, list[int]] = {}
+
+    def record(
+        self, encoding: str, bytes_in: int, bytes_out: int, precompressed: bool = False
+    ) -> None:
+        with self._lock:
+            counters = self._counters.setdefault(encoding, [0, 0, 0, 0])
+            counters[0] += 1
+            counters[1] += int(precompressed)
+            counters[2] += bytes_in
+            counters[3] += bytes_out
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            return [
+                {
+                    "encoding": encoding,
+                    "responses": responses,
+                    "precompressed": precompressed,
+                    "bytes_in": bytes_in,
+                    "bytes_out": bytes_out,
+                    "bytes_saved": bytes_in - bytes_out,
+                }
+                for encoding, (responses, precompressed, bytes_in, bytes_out) in sorted(
+                    self._counters.items()
+                )
+            ]
+
+
+compression_stats = CompressionStats()
+
+
+def is_compressible(headers: Headers) -> bool:
+    content_type = headers.get("content-type", "")
+    return (
+        "content-encoding" not in headers
+        and "no-transform" not in headers.get("cache-control", "")
+        and content_type.startswith(COMPRESSIBLE_TYPES)
+        and not content_type.startswith(UNCOMPRESSIBLE_TYPES)
+    )
+
+
+def vary_on_encoding(headers: MutableHeaders) -> None:
+    vary = {value.strip().lower() for value in headers.get("vary", "").split(",")}
+    if "accept-encoding" not in vary and "*" not in vary:
+        headers.add_vary_header("Accept-Encoding")
+
+
+class _CompressingSend:
+    """Compresses the response with ``codec``, or only adds ``Vary`` when it is ``None``."""
+
+    def __init__(self, send: Send, codec: Codec | None, minimum_size: int) -> None:
+        self.send = send
+        self.codec = codec
+        self.minimum_size = minimum_size
+        self.start: Message | None = None
+        self.pending = b""
+        self.compressor = None
+        self.passthrough = False
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = MutableHeaders(raw=message["headers"])
+            if not is_compressible(headers):
+                self.passthrough = True
+                await self.send(message)
+                return
+            vary_on_encoding(headers)
+            if message["status"] in (204, 304) or self.codec is None:
+                self.passthrough = True
+                await self.send(message)
+            else:
+                self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start is not None:
+            # Hold back small leading chunks until the body is known to reach the threshold
+            self.pending += body
+            if more_body and len(self.pending) < self.minimum_size:
+                return
+            body, self.pending = self.pending, b""
+            start, self.start = self.start, None
+            headers = MutableHeaders(raw=start["headers"])
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self.send(start)
+                await self.send(
+                    {"type": "http.response.body", "body": body, "more_body": more_body}
+                )
+                return
+            headers["Content-Encoding"] = self.codec.name
+            if "content-length" in headers:
+                del headers["Content-Length"]
+            self.compressor = self.codec.compressor()
+            await self.send(start)
+        self.bytes_in += len(body)
+        chunk = self.compressor.compress(body)
+        if not more_body:
+            chunk += self.compressor.flush()
+        self.bytes_out += len(chunk)
+        await self.send(
+            {"type": "http.response.body", "body": chunk, "more_body": more_body}
+        )
+        if not more_body:
+            compression_stats.record(self.codec.name, self.bytes_in, self.bytes_out)
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int | None = None) -> None:
+        self.app = app
+        self.minimum_size = (
+            settings.compression_min_size if minimum_size is None else minimum_size
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.compression_enabled:
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        codec = CODECS[encoding] if encoding else None
+        await self.app(scope, receive, _CompressingSend(send, codec, self.minimum_size))
@@ -1,7 +1,7 @@
+import json
 from functools import lru_cache
-from typing import List
+from typing import Dict, List
 
-import json
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -15,21 +15,88 @@ class Settings(BaseSettings):
     backend_port: int = 8000
 
     database_url: str = "postgresql+psycopg://postgres:postgres@db:5432/recruit_flow"
+    database_replica_urls: List[str] = []
+    replica_health_check_seconds: float = 10.0
+    replica_max_lag_seconds: float = 5.0
+    read_your_writes_seconds: float = 10.0
 
     secret_key: str = "change-me"
     access_token_expire_minutes: int = 15
     refresh_token_expire_minutes: int = 60 * 24 * 7
+    refresh_token_pepper: str | None = None
+    refresh_token_reuse_grace_seconds: int = 10
+    revoked_token_cache_size: int = 10000
+    refresh_token_purge_interval_seconds: int = 3600
+    jwt_signing_keys: Dict[str, str] = {}
+    jwt_active_kid: str | None = None
 
     allowed_origins: List[str] = ["http://localhost:5173"]
 
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "memory"
+    rate_limit_redis_url: str = "redis://localhost:6379/0"
+    rate_limit_trust_forwarded: bool = False
+    rate_limit_default_per_second: float = 20.0
+    rate_limit_default_burst: int = 40
+    rate_limit_login_per_second: float = 5 / 60
+    rate_limit_login_burst: int = 10
+    rate_limit_register_per_second: float = 3 / 60
+    rate_limit_register_burst: int = 5
+    rate_limit_refresh_per_second: float = 1.0
+    rate_limit_refresh_burst: int = 10
+    rate_limit_apply_per_second: float = 0.5
+    rate_limit_apply_burst: int = 5
+    rate_limit_autofill_per_second: float = 0.2
+    rate_limit_autofill_burst: int = 3
+
+    idempotency_backend: str = "memory"
+    idempotency_redis_url: str = "redis://localhost:6379/0"
+    idempotency_ttl_seconds: int = 86400
+    idempotency_lock_seconds: int = 60
+    idempotency_max_keys: int = 100000
+
     resume_upload_dir: str = "./uploads/resumes"
-    spacy_model: str = "en_core_web_sm"
     resume_parser_url: str | None = None
     resume_parser_api_key: str | None = None
 
-    model_config = SettingsConfigDict(env_file=".env", env_prefix="", env_nested_delimiter=None)
+    schema_sync_on_startup: bool = True
+    import_budget_ms: int = 2000
+
+    analytics_refresh_interval_seconds: int = 60
+
+    job_alert_notifier: str = "log"
+    job_alert_digest_interval_seconds: int = 3600
+
+    duplicate_scan_interval_seconds: int = 0
+    duplicate_min_similarity: float = 0.3
+    duplicate_min_shingles: int = 3
+    duplicate_max_bucket_size: int = 50
+
+    archive_closed_job_days: int = 365
+    archive_backend: str = "table"
+    archive_dir: str = "./archive"
+    archive_interval_seconds: int = 0
+
+    compression_enabled: bool = True
+    compression_min_size: int = 1024
+    public_cache_ttl_seconds: float = 5.0
+
+    profiling_sample_rate: float = 0.0
+    profiling_interval_ms: float = 1.0
+    profiling_max_profiles: int = 200
+
+    events_backend: str = "memory"
+    events_replay_size: int = 1000
+    events_queue_size: int = 100
+    events_heartbeat_seconds: float = 15.0
+    events_retry_ms: int = 3000
+    events_ticket_seconds: int = 60
+
+    model_config = SettingsConfigDict(
+        env_file=".env", env_prefix="", env_nested_delimiter=None
+    )
 
-    @field_validator("allowed_origins", mode="before")
+    @field_validator("allowed_origins", "database_replica_urls", mode="before")
     @classmethod
     def parse_allowed_origins(cls, value: str | List[str]) -> List[str]:
         if isinstance(value, str):
@@ -39,7 +106,11 @@ class Settings(BaseSettings):
                     return [str(item) for item in parsed if str(item).strip()]
             except json.JSONDecodeError:
                 stripped = value.strip().strip("[]")
-                return [origin.strip().strip("\"'") for origin in stripped.split(",") if origin.strip()]
+                return [
+                    origin.strip().strip("\"'")
+                    for origin in stripped.split(",")
+                    if origin.strip()
+                ]
             return []
         return value
 
@@ -0,0 +1,287 @@
+"""In-process change feed with optional Postgres LISTEN/NOTIFY fan-out.
+
+Routes call ``publish`` after their transaction commits. Every event gets a
+monotonically increasing integer id and is kept in a bounded replay buffer so
+reconnecting clients can resume from ``Last-Event-ID``. Each subscriber owns a
+bounded queue; a subscriber that falls behind is dropped with a ``reset``
+event instead of letting its backlog grow.
+
+Event data carries ids only (application, job, stage, note); clients fetch
+anything else through the regular endpoints, which check access and keep
+payloads well under the 8000-byte ``pg_notify`` limit.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Iterable
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "recruit_flow_events"
+EVENT_ID_SEQUENCE = "recruit_flow_event_ids"
+
+
+def _json_default(value):
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+class Subscription:
+    def __init__(
+        self, topics: set[str], loop: asyncio.AbstractEventLoop, max_queue: int
+    ) -> None:
+        self.topics = topics
+        self.loop = loop
+        self.queue: asyncio.Queue[dict | None] = asyncio.Queue(maxsize=max_queue)
+        self.overflowed = False
+
+    def offer(self, event: dict) -> None:
+        """Called on the subscriber's event loop."""
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class EventBroker:
+    """Fans events out to subscribers of this process."""
+
+    def __init__(self, replay_size: int, queue_size: int) -> None:
+        self._replay: deque[dict] = deque(maxlen=replay_size)
+        self._queue_size = queue_size
+        self._subscribers: set[Subscription] = set()
+        self._lock = threading.Lock()
+        self._last_id = 0
+        self._evicted_through = 0
+
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+
+    def next_id(self) -> int:
+        with self._lock:
+            self._last_id = max(self._last_id + 1, time.time_ns() // 1000)
+            return self._last_id
+
+    def publish(self, topics: Iterable[str], event_type: str, data: dict) -> None:
+        self.deliver(
+            {
+                "id": self.next_id(),
+                "topics": sorted(set(topics)),
+                "type": event_type,
+                "data": data,
+            }
+        )
+
+    def deliver(self, event: dict) -> None:
+        with self._lock:
+            self._last_id = max(self._last_id, event["id"])
+            if len(self._replay) == self._replay.maxlen:
+                self._evicted_through = self._replay[0]["id"]
+            self._replay.append(event)
+            subscribers = [
+                sub
+                for sub in self._subscribers
+                if sub.topics.intersection(event["topics"])
+            ]
+        for sub in subscribers:
+            try:
+                sub.loop.call_soon_threadsafe(sub.offer, event)
+            except RuntimeError:
+                self.unsubscribe(sub)
+
+    def subscribe(
+        self, topics: set[str], last_event_id: int | None = None
+    ) -> Subscription:
+        sub = Subscription(topics, asyncio.get_running_loop(), self._queue_size)
+        with self._lock:
+            self._subscribers.add(sub)
+            if last_event_id is not None and last_event_id < self._evicted_through:
+                # Events the client missed are gone; tell it to refetch instead of resuming.
+                sub.queue.put_nowait(None)
+                sub.overflowed = True
+                return sub
+            backlog = [
+                event
+                for event in self._replay
+                if last_event_id is not None and event["id"] > last_event_id
+            ]
+        for event in backlog:
+            if topics.intersection(event["topics"]):
+                sub.offer(event)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def start(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class PostgresEventBroker(EventBroker):
+    """Publishes through ``pg_notify`` so every worker's listener receives each event.
+
+    Event ids come from a database sequence, so they are ordered across
+    workers rather than by each worker's clock.
+    """
+
+    def __init__(self, dsn: str, replay_size: int, queue_size: int) -> None:
+        super().__init__(replay_size, queue_size)
+        self._dsn = dsn
+        self._publish_conn = None
+        self._publish_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._listener = threading.Thread(
+            target=self._listen, name="event-listener", daemon=True
+        )
+
+    def start(self) -> None:
+        if not self._listener.is_alive():
+            self._listener.start()
+
+    def _connect(self):
+        import psycopg
+
+        return psycopg.connect(self._dsn, autocommit=True)
+
+    def _connect_publisher(self):
+        conn = self._connect()
+        conn.execute(f"CREATE SEQUENCE IF NOT EXISTS {EVENT_ID_SEQUENCE}")
+        return conn
+
+    def publish(self, topics: Iterable[str], event_type: str, data: dict) -> None:
+        event = {
+            "id": None,
+            "topics": sorted(set(topics)),
+            "type": event_type,
+            "data": data,
+        }
+        with self._publish_lock:
+            # A dropped connection is retried once before other workers miss the event
+            for attempt in range(2):
+                try:
+                    if self._publish_conn is None or self._publish_conn.closed:
+                        self._publish_conn = self._connect_publisher()
+                    if event["id"] is None:
+                        event["id"] = self._publish_conn.execute(
+                            f"SELECT nextval('{EVENT_ID_SEQUENCE}')"
+                        ).fetchone()[0]
+                    self._publish_conn.execute(
+                        "SELECT pg_notify(%s, %s)",
+                        (NOTIFY_CHANNEL, json.dumps(event, default=_json_default)),
+                    )
+                    return
+                except Exception:
+                    self._publish_conn = None
+                    if attempt:
+                        logger.exception("pg_notify failed; delivering locally only")
+                    else:
+                        logger.warning("pg_notify failed; reconnecting", exc_info=True)
+        if event["id"] is None:
+            # No sequence value; stay in its range instead of jumping to the clock
+            with self._lock:
+                event["id"] = self._last_id + 1
+        self.deliver(event)
+
+    def _listen(self) -> None:
+        while not self._stop.is_set():
+            try:
+                with self._connect() as conn:
+                    conn.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                    for notify in conn.notifies():
+                        if self._stop.is_set():
+                            break
+                        self.deliver(json.loads(notify.payload))
+            except Exception:
+                logger.exception("Event listener connection lost; reconnecting")
+                self._stop.wait(1.0)
+
+    def close(self) -> None:
+        self._stop.set()
+        with self._publish_lock:
+            if self._publish_conn is not None:
+                self._publish_conn.close()
+
+
+def format_sse(event: dict) -> str:
+    body = json.dumps(
+        {"type": event["type"], **event["data"]},
+        default=_json_default,
+        separators=(",", ":"),
+    )
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {body}\n\n"
+
+
+async def stream_events(
+    request, topics: set[str], last_event_id: int | None
+) -> AsyncIterator[str]:
+    """Yield SSE frames for ``topics`` until the client disconnects or overflows."""
+    sub = broker.subscribe(topics, last_event_id)
+    try:
+        yield f"retry: {settings.events_retry_ms}\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    sub.queue.get(), timeout=settings.events_heartbeat_seconds
+                )
+            except TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keepalive\n\n"
+                continue
+            if event is None:
+                # The id lets the client resume from here once it has refetched
+                yield f"id: {broker.last_id}\nevent: reset\ndata: {{}}\n\n"
+                break
+            yield format_sse(event)
+    finally:
+        broker.unsubscribe(sub)
+
+
+def parse_last_event_id(value: str | None) -> int | None:
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def build_broker() -> EventBroker:
+    if settings.events_backend == "postgres":
+        dsn = settings.database_url.replace("postgresql+psycopg://", "postgresql://", 1)
+        return PostgresEventBroker(
+            dsn, settings.events_replay_size, settings.events_queue_size
+        )
+    return EventBroker(settings.events_replay_size, settings.events_queue_size)
+
+
+broker = build_broker()
+
+
+def publish(topics: Iterable[str], event_type: str, data: dict) -> None:
+    broker.publish(topics, event_type, data)
+
+
+def job_topic(job_id: int) -> str:
+    return f"job:{job_id}"
+
+
+def candidate_topic(user_id: int) -> str:
+    return f"candidate:{user_id}"
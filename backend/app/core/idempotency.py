@@ -0,0 +1,204 @@
+"""Idempotency-Key support for endpoints that create things.
+
+The first request with a given key reserves it; once the handler succeeds its
+response is stored under the key for ``IDEMPOTENCY_TTL_SECONDS`` and any retry
+with the same key gets that response back (with ``Idempotent-Replayed: true``)
+without running the handler again. A retry that arrives while the first
+request is still running gets 409, and reusing a key for a different request
+gets 422. Failed requests release their key so the client can retry.
+Endpoints that take uploads call ``replay_stored`` first, so a retry of a
+request that is running or done is answered from its key before its body is
+read; the 422 check needs the body, so there it only applies to requests
+that race the first one for the key.
+
+Keys are stored as a 16-byte digest of user, scope and key, and requests are
+compared by an 8-byte fingerprint, so an entry is little more than the stored
+response body. Entries live in process memory by default;
+``IDEMPOTENCY_BACKEND=redis`` shares them between workers. The database
+constraints behind each endpoint still have the final word when an entry is
+missed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from fastapi import HTTPException, status
+from starlette.responses import Response
+
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    fingerprint: str
+    status_code: int | None
+    body: bytes = b""
+
+    def encode(self) -> bytes:
+        return f"{self.fingerprint}:{self.status_code or 0}:".encode() + self.body
+
+    @classmethod
+    def decode(cls, raw: bytes) -> StoredResponse:
+        fingerprint, status_code, body = raw.split(b":", 2)
+        return cls(fingerprint.decode(), int(status_code) or None, body)
+
+
+def store_key(user_id: int, scope: str, key: str) -> str:
+    return hashlib.blake2b(
+        f"{user_id}:{scope}:{key}".encode(), digest_size=16
+    ).hexdigest()
+
+
+def request_fingerprint(*parts: object) -> str:
+    return hashlib.blake2b(repr(parts).encode(), digest_size=8).hexdigest()
+
+
+class InMemoryIdempotencyStore:
+    """Entries in a bounded LRU map with per-entry expiry; state is per worker process."""
+
+    def __init__(self, max_keys: int = 100000) -> None:
+        self._entries: OrderedDict[str, tuple[float, StoredResponse]] = OrderedDict()
+        self._max_keys = max_keys
+        self._lock = threading.Lock()
+
+    def reserve(self, key: str, fingerprint: str, ttl: float) -> StoredResponse | None:
+        """Reserve ``key`` and return ``None``, or return what is already stored under it."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+            self._entries[key] = (now + ttl, StoredResponse(fingerprint, None))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_keys:
+                self._entries.popitem(last=False)
+        return None
+
+    def peek(self, key: str) -> StoredResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def complete(self, key: str, response: StoredResponse, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, response)
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class RedisIdempotencyStore:
+    """Entries shared by all workers, reserved with ``SET NX``."""
+
+    def __init__(self, url: str) -> None:
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+
+    def reserve(self, key: str, fingerprint: str, ttl: float) -> StoredResponse | None:
+        name = f"idem:{key}"
+        if self._client.set(
+            name,
+            StoredResponse(fingerprint, None).encode(),
+            nx=True,
+            ex=max(1, int(ttl)),
+        ):
+            return None
+        raw = self._client.get(name)
+        return (
+            StoredResponse.decode(raw)
+            if raw is not None
+            else self.reserve(key, fingerprint, ttl)
+        )
+
+    def peek(self, key: str) -> StoredResponse | None:
+        raw = self._client.get(f"idem:{key}")
+        return StoredResponse.decode(raw) if raw is not None else None
+
+    def complete(self, key: str, response: StoredResponse, ttl: float) -> None:
+        self._client.set(f"idem:{key}", response.encode(), ex=max(1, int(ttl)))
+
+    def release(self, key: str) -> None:
+        self._client.delete(f"idem:{key}")
+
+
+def build_store():
+    if settings.idempotency_backend == "redis":
+        return RedisIdempotencyStore(settings.idempotency_redis_url)
+    return InMemoryIdempotencyStore(settings.idempotency_max_keys)
+
+
+idempotency_store = build_store()
+
+
+def _answer(stored: StoredResponse) -> Response:
+    """The response for a key that is already taken: 409 while in progress, else the stored one."""
+    if stored.status_code is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still in progress",
+        )
+    return Response(
+        stored.body,
+        status_code=stored.status_code,
+        media_type="application/json",
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def replay_stored(key: str | None, store=None) -> Response | None:
+    """Answer a retry from ``key`` alone, without looking at the request body.
+
+    Returns the stored response, raises 409 while the first request is still
+    running, or returns ``None`` when nothing is stored and the request should
+    go on to ``run_idempotent``.
+    """
+    if key is None:
+        return None
+    stored = (store or idempotency_store).peek(key)
+    return _answer(stored) if stored is not None else None
+
+
+def run_idempotent(
+    key: str | None, fingerprint: str, handler: Callable[[], Response], store=None
+) -> Response:
+    """Call ``handler`` once per ``key``, replaying its stored response for retries.
+
+    ``key`` should come from ``store_key``; without one the handler just runs.
+    The reservation expires after ``IDEMPOTENCY_LOCK_SECONDS`` so a worker that
+    dies mid-request doesn't block the key for the full TTL.
+    """
+    if key is None:
+        return handler()
+    store = store or idempotency_store
+    stored = store.reserve(key, fingerprint, settings.idempotency_lock_seconds)
+    if stored is not None:
+        if stored.fingerprint != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request",
+            )
+        return _answer(stored)
+    try:
+        response = handler()
+    except BaseException:
+        store.release(key)
+        raise
+    if 200 <= response.status_code < 300:
+        store.complete(
+            key,
+            StoredResponse(fingerprint, response.status_code, response.body),
+            settings.idempotency_ttl_seconds,
+        )
+    else:
+        store.release(key)
+    return response
@@ -0,0 +1,373 @@
+"""On-demand profiling of individual requests.
+
+A request is profiled when it carries ``X-Profile: 1`` with an admin access
+token, or when it is picked by ``PROFILING_SAMPLE_RATE``. While it runs, a
+sampler thread records the Python stacks of the threads serving it every
+``PROFILING_INTERVAL_MS`` and SQLAlchemy cursor events record each statement
+with its duration. The profile covers the whole response, streamed body
+included, and is stored in the ``request_profiles`` table (the newest
+``PROFILING_MAX_PROFILES`` are kept) before the last body chunk goes out, so
+every worker can serve it from ``/admin/profiles`` by the ``X-Profile-Id`` the
+response carries.
+
+Requests that are not profiled pay for one header lookup in the middleware and
+one context variable read per SQL statement.
+
+Stacks are kept for the threads that issued this request's SQL or ran its
+endpoint. Another request served by one of those threads while the profile is
+running can show up in it, so keep the sample rate low.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import gzip
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from jose.exceptions import JWTError
+from sqlalchemy import delete, event, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.clock import utcnow
+from app.core.config import settings
+from app.core.security import decode_access_token
+from app.db.session import SessionLocal
+from app.models.request_profile import RequestProfile
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+MAX_CONCURRENT_PROFILES = 2
+MAX_STATEMENTS = 1000
+# Bounds memory for long streamed responses such as event streams
+MAX_SAMPLES = 100000
+IDLE_FILES = ("selectors.py", "threading.py", "queue.py")
+
+FrameKey = tuple[str, str, int]
+
+
+@dataclass
+class Profile:
+    id: str
+    method: str
+    path: str
+    reason: str
+    started_at: datetime = field(default_factory=utcnow)
+    statements: list[dict] = field(default_factory=list)
+    threads: set[int] = field(default_factory=set)
+    done: bool = False
+
+
+_current: contextvars.ContextVar[Profile | None] = contextvars.ContextVar(
+    "profile", default=None
+)
+_slots = threading.BoundedSemaphore(MAX_CONCURRENT_PROFILES)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    if profile is None or profile.done:
+        return
+    profile.threads.add(threading.get_ident())
+    conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    if profile is None or profile.done or not conn.info.get("profile_started"):
+        return
+    elapsed = time.perf_counter() - conn.info["profile_started"].pop()
+    if len(profile.statements) < MAX_STATEMENTS:
+        profile.statements.append(
+            {
+                "statement": statement,
+                "duration_ms": round(elapsed * 1000, 3),
+                "rowcount": cursor.rowcount,
+                "executemany": executemany,
+            }
+        )
+
+
+class Sampler:
+    """Samples the stacks of every other thread at a fixed interval."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.samples: list[tuple[int, float, tuple[FrameKey, ...]]] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="request-profiler", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        previous = time.perf_counter()
+        while not self._stop.wait(self.interval) and len(self.samples) < MAX_SAMPLES:
+            now = time.perf_counter()
+            weight = (now - previous) * 1000
+            previous = now
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack: list[FrameKey] = []
+                current = frame
+                while current is not None:
+                    code = current.f_code
+                    stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                    current = current.f_back
+                if stack and os.path.basename(stack[0][1]) not in IDLE_FILES:
+                    stack.reverse()
+                    self.samples.append((thread_id, weight, tuple(stack)))
+
+
+def speedscope_document(profile: Profile, samples, endpoint_code) -> dict:
+    """Build a speedscope file with one sampled profile per thread kept."""
+    threads = set(profile.threads)
+    if endpoint_code is not None:
+        key = (
+            endpoint_code.co_name,
+            endpoint_code.co_filename,
+            endpoint_code.co_firstlineno,
+        )
+        threads |= {thread_id for thread_id, _, stack in samples if key in stack}
+    frames: dict[FrameKey, int] = {}
+    by_thread: dict[int, tuple[list[list[int]], list[float]]] = {}
+    for thread_id, weight, stack in samples:
+        if thread_id not in threads:
+            continue
+        thread_samples, weights = by_thread.setdefault(thread_id, ([], []))
+        thread_samples.append([frames.setdefault(key, len(frames)) for key in stack])
+        weights.append(round(weight, 3))
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": f"{profile.method} {profile.path}",
+        "exporter": "app.core.profiling",
+        "activeProfileIndex": 0,
+        "shared": {
+            "frames": [
+                {"name": name, "file": file, "line": line}
+                for name, file, line in frames
+            ]
+        },
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": f"thread {thread_id}",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 3),
+                "samples": thread_samples,
+                "weights": weights,
+            }
+            for thread_id, (thread_samples, weights) in by_thread.items()
+        ],
+    }
+
+
+def collapsed_stacks(document: dict) -> str:
+    """Render a speedscope document as folded stacks for ``flamegraph.pl``."""
+    names = [frame["name"] for frame in document["shared"]["frames"]]
+    counts: Counter[str] = Counter()
+    for thread_profile in document["profiles"]:
+        for stack, weight in zip(thread_profile["samples"], thread_profile["weights"]):
+            counts[";".join(names[index] for index in stack)] += weight
+    return "".join(
+        f"{stack} {max(1, round(weight))}\n" for stack, weight in counts.most_common()
+    )
+
+
+SUMMARY_COLUMNS = (
+    RequestProfile.id,
+    RequestProfile.method,
+    RequestProfile.path,
+    RequestProfile.reason,
+    RequestProfile.status_code,
+    RequestProfile.started_at,
+    RequestProfile.duration_ms,
+    RequestProfile.sql_count,
+    RequestProfile.sql_ms,
+)
+
+
+class ProfileStore:
+    """Profiles in the ``request_profiles`` table, pruned to the newest ``max_profiles``."""
+
+    def __init__(
+        self, session_factory: sessionmaker[Session], max_profiles: int
+    ) -> None:
+        self.session_factory = session_factory
+        self.max_profiles = max_profiles
+
+    def save(self, summary: dict, document: dict) -> None:
+        with self.session_factory() as db:
+            db.add(
+                RequestProfile(
+                    **summary, speedscope=gzip.compress(json.dumps(document).encode())
+                )
+            )
+            db.flush()
+            oldest_kept = db.scalar(
+                select(RequestProfile.started_at)
+                .order_by(RequestProfile.started_at.desc())
+                .offset(self.max_profiles - 1)
+                .limit(1)
+            )
+            if oldest_kept is not None:
+                db.execute(
+                    delete(RequestProfile).where(
+                        RequestProfile.started_at < oldest_kept
+                    )
+                )
+            db.commit()
+
+    def list(self) -> list[dict]:
+        with self.session_factory() as db:
+            rows = db.execute(
+                select(*SUMMARY_COLUMNS).order_by(RequestProfile.started_at.desc())
+            )
+            return [row._asdict() for row in rows]
+
+    def summary(self, profile_id: str) -> dict:
+        with self.session_factory() as db:
+            row = db.execute(
+                select(*SUMMARY_COLUMNS, RequestProfile.statements).where(
+                    RequestProfile.id == profile_id
+                )
+            ).first()
+        if row is None:
+            raise KeyError(profile_id)
+        return row._asdict()
+
+    def speedscope(self, profile_id: str) -> dict:
+        with self.session_factory() as db:
+            document = db.scalar(
+                select(RequestProfile.speedscope).where(RequestProfile.id == profile_id)
+            )
+        if document is None:
+            raise KeyError(profile_id)
+        return json.loads(gzip.decompress(document))
+
+
+profile_store = ProfileStore(SessionLocal, settings.profiling_max_profiles)
+
+
+def profile_reason(request: Request) -> str | None:
+    """Why ``request`` should be profiled, or ``None`` to leave it alone."""
+    if request.headers.get(PROFILE_HEADER) == "1":
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        try:
+            claims = decode_access_token(token) if scheme.lower() == "bearer" else {}
+        except JWTError:
+            claims = {}
+        if claims.get("role") == "admin":
+            return "header"
+    if (
+        settings.profiling_sample_rate > 0
+        and random.random() < settings.profiling_sample_rate
+    ):
+        return "sampled"
+    return None
+
+
+class ProfilingMiddleware:
+    """Profiles the requests ``profile_reason`` picks, from the first byte in to the last byte out."""
+
+    def __init__(self, app: ASGIApp, store: ProfileStore | None = None) -> None:
+        self.app = app
+        self.store = store or profile_store
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or (
+            settings.profiling_sample_rate <= 0
+            and PROFILE_HEADER.encode() not in dict(scope["headers"])
+        ):
+            await self.app(scope, receive, send)
+            return
+        reason = profile_reason(Request(scope))
+        if reason is None or not _slots.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+        profile = Profile(
+            id=uuid.uuid4().hex,
+            method=scope["method"],
+            path=scope["path"],
+            reason=reason,
+        )
+        sampler = Sampler(settings.profiling_interval_ms / 1000)
+        token = _current.set(profile)
+        started = time.perf_counter()
+        status_code = 500
+
+        def finish() -> tuple[dict, dict]:
+            profile.done = True
+            sampler.stop()
+            _slots.release()
+            summary = {
+                "id": profile.id,
+                "method": profile.method,
+                "path": profile.path,
+                "reason": profile.reason,
+                "status_code": status_code,
+                "started_at": profile.started_at,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                "sql_count": len(profile.statements),
+                "sql_ms": round(
+                    sum(statement["duration_ms"] for statement in profile.statements), 3
+                ),
+                "statements": profile.statements,
+            }
+            endpoint = scope.get("endpoint")
+            return summary, speedscope_document(
+                profile, sampler.samples, getattr(endpoint, "__code__", None)
+            )
+
+        async def send_profiled(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(raw=message["headers"]).append(
+                    "X-Profile-Id", profile.id
+                )
+            elif (
+                message["type"] == "http.response.body"
+                and not message.get("more_body", False)
+                and not profile.done
+            ):
+                # Stored before the last chunk, so the profile exists once the client has the response
+                try:
+                    await run_in_threadpool(self.store.save, *finish())
+                except Exception:
+                    logger.exception("Could not store profile %s", profile.id)
+            await send(message)
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_profiled)
+        finally:
+            _current.reset(token)
+            if not profile.done:
+                finish()
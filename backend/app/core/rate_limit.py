@@ -0,0 +1,287 @@
+"""Token-bucket admission control and per-route concurrency caps.
+
+Every request draws from a per-client bucket; the expensive routes listed by
+``default_route_limits`` also draw from their own per-client bucket and are
+capped at a fixed number of in-flight requests per worker. Rates and bursts
+come from the ``RATE_LIMIT_*`` settings. Anything over a limit is turned away
+immediately with 429 and ``Retry-After`` instead of queueing behind the thread
+pool.
+
+Clients are identified by IP, or by the user id of a verified access token;
+the Authorization header alone is never trusted as an identity, so a client
+can't mint fresh buckets by sending made-up tokens.
+
+Buckets live in process memory by default. ``RATE_LIMIT_BACKEND=redis`` keeps
+them in Redis so all workers share one budget per client; the in-memory
+backend is the local stand-in and implements the same ``take`` contract.
+Redis calls run in the thread pool, and when Redis is unreachable the limiter
+fails open to per-worker buckets rather than failing the request.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RouteLimit:
+    name: str
+    method: str
+    path: str
+    rate: float
+    burst: int
+    concurrency: int
+    key_by: str = "ip"
+
+
+def default_route_limits() -> tuple[RouteLimit, ...]:
+    return (
+        RouteLimit(
+            "login",
+            "POST",
+            "/auth/login",
+            rate=settings.rate_limit_login_per_second,
+            burst=settings.rate_limit_login_burst,
+            concurrency=8,
+        ),
+        RouteLimit(
+            "register",
+            "POST",
+            "/auth/register",
+            rate=settings.rate_limit_register_per_second,
+            burst=settings.rate_limit_register_burst,
+            concurrency=4,
+        ),
+        RouteLimit(
+            "refresh",
+            "POST",
+            "/auth/refresh",
+            rate=settings.rate_limit_refresh_per_second,
+            burst=settings.rate_limit_refresh_burst,
+            concurrency=16,
+        ),
+        RouteLimit(
+            "apply_for_job",
+            "POST",
+            "/candidate/applications",
+            rate=settings.rate_limit_apply_per_second,
+            burst=settings.rate_limit_apply_burst,
+            concurrency=16,
+            key_by="user",
+        ),
+        RouteLimit(
+            "autofill_resume",
+            "POST",
+            "/candidate/resume/autofill",
+            rate=settings.rate_limit_autofill_per_second,
+            burst=settings.rate_limit_autofill_burst,
+            concurrency=4,
+            key_by="user",
+        ),
+    )
+
+
+class InMemoryBackend:
+    """Token buckets in a bounded LRU map; state is per worker process."""
+
+    blocking = False
+
+    def __init__(self, max_keys: int = 100000) -> None:
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._max_keys = max_keys
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: int, cost: float = 1.0) -> float:
+        """Take ``cost`` tokens; return 0 if allowed, else seconds until it would be."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (float(burst), now))
+            tokens = min(float(burst), tokens + (now - updated) * rate)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                retry_after = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                retry_after = (cost - tokens) / rate
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self._max_keys:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+
+_REDIS_TAKE = """
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now = tonumber(ARGV[4])
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local retry_after = 0
+if tokens >= cost then
+  tokens = tokens - cost
+else
+  retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(retry_after)
+"""
+
+
+class RedisBackend:
+    """Token buckets shared by all workers through an atomic Redis script.
+
+    ``take`` does network I/O, so callers run it off the event loop. Any Redis
+    error falls back to ``fallback`` for that call.
+    """
+
+    blocking = True
+
+    def __init__(
+        self, url: str, fallback: InMemoryBackend | None = None, timeout: float = 0.25
+    ) -> None:
+        import redis
+
+        self._client = redis.Redis.from_url(
+            url, socket_timeout=timeout, socket_connect_timeout=timeout
+        )
+        self._take = self._client.register_script(_REDIS_TAKE)
+        self._errors = (redis.RedisError, OSError)
+        self._fallback = fallback or InMemoryBackend()
+        self._degraded = False
+
+    def take(self, key: str, rate: float, burst: int, cost: float = 1.0) -> float:
+        try:
+            retry_after = float(
+                self._take(keys=[f"rl:{key}"], args=[rate, burst, cost, time.time()])
+            )
+        except self._errors:
+            if not self._degraded:
+                logger.warning(
+                    "Rate limit backend unavailable, using per-worker buckets",
+                    exc_info=True,
+                )
+                self._degraded = True
+            return self._fallback.take(key, rate, burst, cost)
+        if self._degraded:
+            logger.info("Rate limit backend available again")
+            self._degraded = False
+        return retry_after
+
+
+def build_backend():
+    if settings.rate_limit_backend == "redis":
+        return RedisBackend(settings.rate_limit_redis_url)
+    return InMemoryBackend()
+
+
+class RateLimitMiddleware:
+    """Admission control around the whole response, streamed body included."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        backend=None,
+        route_limits: tuple[RouteLimit, ...] | None = None,
+        prefix: str | None = None,
+    ) -> None:
+        self.app = app
+        self.backend = backend or build_backend()
+        prefix = settings.api_v1_prefix if prefix is None else prefix
+        if route_limits is None:
+            route_limits = default_route_limits()
+        self._routes = {
+            (limit.method, prefix + limit.path): limit for limit in route_limits
+        }
+        self._in_flight: dict[str, int] = {limit.name: 0 for limit in route_limits}
+
+    @staticmethod
+    def client_ip(request: Request) -> str:
+        if settings.rate_limit_trust_forwarded:
+            forwarded = request.headers.get("x-forwarded-for")
+            if forwarded:
+                return forwarded.split(",")[0].strip()
+        return request.client.host if request.client else "unknown"
+
+    @staticmethod
+    def client_user(request: Request) -> str | None:
+        """The user id of a valid bearer access token, or ``None``."""
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None
+        from jose.exceptions import JWTError
+
+        from app.core.security import decode_access_token
+
+        try:
+            subject = decode_access_token(token).get("sub")
+        except JWTError:
+            return None
+        return f"user:{subject}" if subject is not None else None
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        if self.backend.blocking:
+            return await run_in_threadpool(self.backend.take, key, rate, burst)
+        return self.backend.take(key, rate, burst)
+
+    def _reject(self, retry_after: float, detail: str) -> JSONResponse:
+        return JSONResponse(
+            {"detail": detail},
+            status_code=429,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not settings.rate_limit_enabled
+            or scope["method"] == "OPTIONS"
+        ):
+            await self.app(scope, receive, send)
+            return
+        request = Request(scope)
+        ip = self.client_ip(request)
+        user = self.client_user(request)
+        retry_after = await self.take(
+            f"global:{user or ip}",
+            settings.rate_limit_default_per_second,
+            settings.rate_limit_default_burst,
+        )
+        if retry_after:
+            await self._reject(retry_after, "Too many requests")(scope, receive, send)
+            return
+        limit = self._routes.get((scope["method"], scope["path"]))
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        identity = user if limit.key_by == "user" and user else ip
+        retry_after = await self.take(
+            f"route:{limit.name}:{identity}", limit.rate, limit.burst
+        )
+        if retry_after:
+            await self._reject(retry_after, "Too many requests")(scope, receive, send)
+            return
+        if self._in_flight[limit.name] >= limit.concurrency:
+            await self._reject(1, "Server busy, retry shortly")(scope, receive, send)
+            return
+        self._in_flight[limit.name] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._in_flight[limit.name] -= 1
@@ -0,0 +1,117 @@
+"""Short-lived cache of public JSON responses with precompressed variants.
+
+The public job listing and job pages are the same bytes for every visitor, so
+``cached_json_response`` renders each one once per ``PUBLIC_CACHE_TTL_SECONDS``
+and keeps a compressed copy per encoding next to it, compressed once at the
+codec's cache level on first request rather than on every response. Only one
+request per key builds an expired entry; the others wait for it instead of
+all rendering the same page. The recruiter routes that change jobs call
+``public_cache.invalidate()``; application counts can lag by up to the TTL.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.api.v1.serializers import dumps
+from app.core.compression import CODECS, compression_stats, negotiate
+from app.core.config import settings
+
+
+@dataclass
+class CachedBody:
+    body: bytes
+    expires_at: float
+    variants: dict[str, bytes] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def variant(self, encoding: str) -> bytes:
+        with self.lock:
+            if encoding not in self.variants:
+                self.variants[encoding] = CODECS[encoding].compress(self.body)
+            return self.variants[encoding]
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 1024) -> None:
+        self._entries: OrderedDict[str, CachedBody] = OrderedDict()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._building: dict[str, threading.Lock] = {}
+
+    def _fresh(self, key: str) -> CachedBody | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                return entry
+        return None
+
+    def get_or_build(
+        self, key: str, build: Callable[[], bytes], ttl: float
+    ) -> CachedBody:
+        entry = self._fresh(key)
+        if entry is not None:
+            return entry
+        if ttl <= 0:
+            return CachedBody(build(), time.monotonic())
+        with self._lock:
+            build_lock = self._building.setdefault(key, threading.Lock())
+        with build_lock:
+            try:
+                entry = self._fresh(key)
+                if entry is not None:
+                    return entry
+                entry = CachedBody(build(), time.monotonic() + ttl)
+                with self._lock:
+                    self._entries[key] = entry
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self._max_entries:
+                        self._entries.popitem(last=False)
+                return entry
+            finally:
+                with self._lock:
+                    if self._building.get(key) is build_lock:
+                        del self._building[key]
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+public_cache = ResponseCache()
+
+
+def cached_json_response(
+    request: Request, key: str, build: Callable[[], Any]
+) -> Response:
+    """Serve ``build()`` as JSON from the public cache, precompressed when the client allows.
+
+    ``build`` may raise (e.g. ``HTTPException``) and nothing is cached.
+    """
+    entry = public_cache.get_or_build(
+        key, lambda: dumps(build()), settings.public_cache_ttl_seconds
+    )
+    headers = {"Vary": "Accept-Encoding"}
+    encoding = (
+        negotiate(request.headers.get("accept-encoding", ""))
+        if settings.compression_enabled
+        else None
+    )
+    if encoding is None or len(entry.body) < settings.compression_min_size:
+        return Response(entry.body, media_type="application/json", headers=headers)
+    body = entry.variant(encoding)
+    compression_stats.record(encoding, len(entry.body), len(body), precompressed=True)
+    return Response(
+        body,
+        media_type="application/json",
+        headers={**headers, "Content-Encoding": encoding},
+    )
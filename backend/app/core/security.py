@@ -1,33 +1,279 @@
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from functools import lru_cache
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy import select
+from jose.exceptions import JWTError
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 
+from app.core.clock import utcnow
 from app.core.config import settings
 from app.db.session import get_db
+from app.models.refresh_token import RefreshToken
 from app.models.user import User
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(
+    tokenUrl="/api/v1/auth/login", auto_error=False
+)
+
+STREAM_TICKET_TYPE = "stream"
+
+
+class KeyRing:
+    """HS256 signing keys addressed by ``kid``.
+
+    New tokens are signed with the active key; any key still in the ring
+    verifies, so a key can be rotated in, made active, and retired later
+    without logging anyone out. Tokens without a ``kid`` (issued before the
+    ring existed) verify against ``secret_key``, and ``secret_key`` stays in
+    the ring as ``default`` after custom keys are configured, so tokens it
+    signed keep verifying until it is explicitly replaced.
+    """
+
+    def __init__(
+        self, keys: dict[str, str], active_kid: str | None, legacy_secret: str
+    ) -> None:
+        self.keys = {"default": legacy_secret, **keys}
+        self.active_kid = active_kid or list(self.keys)[-1]
+        if self.active_kid not in self.keys:
+            raise ValueError(
+                f"Active signing key {self.active_kid!r} is not in the key ring"
+            )
+        self.legacy_secret = legacy_secret
+
+    @property
+    def active_secret(self) -> str:
+        return self.keys[self.active_kid]
+
+    def verification_key(self, kid: str | None) -> str | None:
+        if kid is None:
+            return self.legacy_secret
+        return self.keys.get(kid)
+
+
+key_ring = KeyRing(
+    settings.jwt_signing_keys, settings.jwt_active_kid, settings.secret_key
+)
+
+
+class RevokedTokenCache:
+    """Bounded in-memory map of revoked refresh token hashes to their family.
+
+    Lets a replayed token be rejected (and its family revoked) without reading
+    it back from the database; the database stays the source of truth.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def add(self, token_hash: str, family_id: str) -> None:
+        with self._lock:
+            self._entries[token_hash] = (family_id, time.monotonic())
+            self._entries.move_to_end(token_hash)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def family_of(self, token_hash: str, older_than: float = 0.0) -> str | None:
+        """The family of a revoked token, ignoring tokens revoked less than ``older_than`` seconds ago."""
+        with self._lock:
+            entry = self._entries.get(token_hash)
+        if entry is None or time.monotonic() - entry[1] < older_than:
+            return None
+        return entry[0]
+
+
+revoked_tokens = RevokedTokenCache(settings.revoked_token_cache_size)
+
+
+@lru_cache(maxsize=1)
+def password_context():
+    # passlib builds its handler registry on import, so it is loaded on first use rather than at startup
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_context().hash(password)
+
+
+def sign_token(payload: dict) -> str:
+    # jose pulls in its crypto backends on import; load it with the first token, not at startup
+    from jose import jwt
+
+    return jwt.encode(
+        payload,
+        key_ring.active_secret,
+        algorithm="HS256",
+        headers={"kid": key_ring.active_kid},
+    )
 
 
 def create_access_token(user: User, expires_minutes: int | None = None) -> str:
     expire_minutes = expires_minutes or settings.access_token_expire_minutes
-    expire = datetime.utcnow() + timedelta(minutes=expire_minutes)
+    expire = utcnow() + timedelta(minutes=expire_minutes)
     payload = {"sub": str(user.id), "role": user.role, "exp": expire}
-    return jwt.encode(payload, settings.secret_key, algorithm="HS256")
+    return sign_token(payload)
+
+
+def create_stream_ticket(user: User) -> str:
+    """A token for event stream URLs, valid for ``EVENTS_TICKET_SECONDS``.
+
+    ``EventSource`` can't send an Authorization header, so the client trades
+    its access token for one of these and puts it in the query string. Tickets
+    only open streams; ``get_current_user`` rejects them.
+    """
+    expire = utcnow() + timedelta(seconds=settings.events_ticket_seconds)
+    payload = {
+        "sub": str(user.id),
+        "role": user.role,
+        "typ": STREAM_TICKET_TYPE,
+        "exp": expire,
+    }
+    return sign_token(payload)
+
+
+def decode_access_token(token: str) -> dict:
+    from jose import jwt
+
+    secret = key_ring.verification_key(jwt.get_unverified_header(token).get("kid"))
+    if secret is None:
+        raise JWTError("Unknown signing key")
+    return jwt.decode(token, secret, algorithms=["HS256"])
+
+
+def hash_refresh_token(token: str) -> str:
+    pepper = (settings.refresh_token_pepper or settings.secret_key).encode()
+    return hmac.new(pepper, token.encode(), hashlib.sha256).hexdigest()
+
+
+def issue_refresh_token(
+    db: Session, user: User, family_id: str | None = None
+) -> tuple[str, RefreshToken]:
+    """Create a refresh token row and return the plain token; the caller commits."""
+    token = secrets.token_urlsafe(32)
+    record = RefreshToken(
+        user_id=user.id,
+        family_id=family_id or secrets.token_hex(16),
+        token_hash=hash_refresh_token(token),
+        expires_at=utcnow() + timedelta(minutes=settings.refresh_token_expire_minutes),
+    )
+    db.add(record)
+    db.flush()
+    return token, record
+
+
+def revoke_refresh_family(db: Session, family_id: str) -> None:
+    now = utcnow()
+    db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now)
+    )
+    for token_hash in db.scalars(
+        select(RefreshToken.token_hash).where(RefreshToken.family_id == family_id)
+    ):
+        revoked_tokens.add(token_hash, family_id)
+
+
+def rotated_recently(db: Session, record: RefreshToken, now: datetime) -> bool:
+    """Whether ``record`` was rotated within the reuse grace period and its family is still live."""
+    rotated_at, replaced_by_id = db.execute(
+        select(RefreshToken.revoked_at, RefreshToken.replaced_by_id).where(
+            RefreshToken.id == record.id
+        )
+    ).one()
+    grace = timedelta(seconds=settings.refresh_token_reuse_grace_seconds)
+    if replaced_by_id is None or rotated_at is None or rotated_at < now - grace:
+        return False
+    live = (
+        select(RefreshToken.id)
+        .where(
+            RefreshToken.family_id == record.family_id,
+            RefreshToken.revoked_at.is_(None),
+        )
+        .limit(1)
+    )
+    return db.scalar(live) is not None
+
+
+def rotate_refresh_token(db: Session, token: str) -> tuple[User, str]:
+    """Exchange a refresh token for a new one in the same family.
+
+    Presenting a token that was already rotated means it leaked or was replayed,
+    so the whole family is revoked and the caller must log in again. The
+    exception is a token rotated less than ``REFRESH_TOKEN_REUSE_GRACE_SECONDS``
+    ago while its family is still live: that is another tab refreshing at the
+    same moment, and it gets its own new token in the family.
+    """
+    invalid = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token"
+    )
+    token_hash = hash_refresh_token(token)
+    reused_family = revoked_tokens.family_of(
+        token_hash, older_than=settings.refresh_token_reuse_grace_seconds
+    )
+    if reused_family is not None:
+        revoke_refresh_family(db, reused_family)
+        db.commit()
+        raise invalid
+    record = db.scalar(
+        select(RefreshToken).where(RefreshToken.token_hash == token_hash)
+    )
+    if record is None:
+        raise invalid
+    now = utcnow()
+    claimed = db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == record.id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if claimed:
+        revoked_tokens.add(token_hash, record.family_id)
+    elif not rotated_recently(db, record, now):
+        revoke_refresh_family(db, record.family_id)
+        db.commit()
+        raise invalid
+    if record.expires_at < now:
+        db.commit()
+        raise invalid
+    user = db.get(User, record.user_id)
+    if user is None:
+        db.commit()
+        raise invalid
+    new_token, new_record = issue_refresh_token(db, user, family_id=record.family_id)
+    if claimed:
+        db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.id == record.id)
+            .values(replaced_by_id=new_record.id)
+        )
+    db.commit()
+    return user, new_token
+
+
+def revoke_refresh_token(db: Session, token: str) -> None:
+    record = db.scalar(
+        select(RefreshToken).where(RefreshToken.token_hash == hash_refresh_token(token))
+    )
+    if record is not None:
+        revoke_refresh_family(db, record.family_id)
+        db.commit()
 
 
 def get_user_by_email(db: Session, email: str) -> User | None:
@@ -49,12 +295,18 @@ def authenticate_user(db: Session, email: str, password: str) -> User | None:
     return user
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    credentials_exception = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
+def get_current_user(
+    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+) -> User:
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=["HS256"])
+        payload = decode_access_token(token)
         subject: str | None = payload.get("sub")
-        if subject is None:
+        if subject is None or payload.get("typ") == STREAM_TICKET_TYPE:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
@@ -67,7 +319,43 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
 def require_role(roles: list[str]):
     def dependency(current_user: User = Depends(get_current_user)) -> User:
         if current_user.role not in roles:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed"
+            )
         return current_user
 
     return dependency
+
+
+def require_stream_role(roles: list[str]):
+    """Authorize an event stream from a ``?ticket=`` or a bearer token; resolves to the user id.
+
+    Streams stay open for as long as the client does, so this reads the role
+    from the token claims instead of holding a database session.
+    """
+
+    def dependency(
+        ticket: str | None = Query(None),
+        token: str | None = Depends(optional_oauth2_scheme),
+    ) -> int:
+        credentials_exception = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+        try:
+            payload = decode_access_token(ticket or token or "")
+        except JWTError:
+            raise credentials_exception
+        # Only tickets belong in a URL; full access tokens must come in the header
+        if payload.get("sub") is None or (
+            ticket is not None and payload.get("typ") != STREAM_TICKET_TYPE
+        ):
+            raise credentials_exception
+        if payload.get("role") not in roles:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed"
+            )
+        return int(payload["sub"])
+
+    return dependency
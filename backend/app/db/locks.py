@@ -0,0 +1,27 @@
+import hashlib
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+def lock_key(name: str) -> int:
+    """A stable signed 64-bit key for ``name``, as ``pg_advisory_*`` expects."""
+    return int.from_bytes(
+        hashlib.blake2b(name.encode(), digest_size=8).digest(), "big", signed=True
+    )
+
+
+def try_advisory_xact_lock(db: Session, name: str) -> bool:
+    """Take the transaction-scoped lock ``name`` if it is free; released on commit or rollback.
+
+    Lets a periodic job running in every worker process do its work in only one
+    of them at a time. Dialects without advisory locks always get the lock; on
+    SQLite writers are serialized by the database anyway.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return True
+    return bool(
+        db.scalar(
+            text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": lock_key(name)}
+        )
+    )
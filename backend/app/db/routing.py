@@ -0,0 +1,207 @@
+"""Read-replica selection and read-your-writes stickiness.
+
+GET/HEAD requests are served from a healthy replica unless the caller wrote
+something within ``read_your_writes_seconds``; everything else, and every
+request when no replica is configured or healthy, uses the primary. A replica
+is healthy when it answers and, on Postgres, is no more than
+``replica_max_lag_seconds`` behind the primary.
+
+Stickiness is tracked two ways so it survives a request landing on another
+worker: a short-lived cookie set on the write response, and an in-process map
+keyed by a digest of the bearer token for clients that don't keep cookies.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+STICKY_COOKIE = "rf_primary_until"
+# Zero when caught up: an idle primary sends nothing to replay, so the age of the
+# last replayed transaction alone would read as lag
+REPLICATION_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+
+def replication_lag(conn) -> float:
+    """Seconds ``conn``'s server is behind its primary; 0 for a primary or non-Postgres."""
+    if conn.dialect.name != "postgresql":
+        conn.execute(text("SELECT 1"))
+        return 0.0
+    return float(conn.execute(text(REPLICATION_LAG_SQL)).scalar())
+
+
+class ReplicaRouter:
+    """Round-robins over replicas that passed their last health check."""
+
+    def __init__(
+        self,
+        engines: list[Engine],
+        check_interval: float,
+        max_lag: float | None = None,
+    ) -> None:
+        self.engines = engines
+        self._healthy = {id(engine): True for engine in engines}
+        self._counter = itertools.count()
+        self._check_interval = check_interval
+        self._max_lag = max_lag
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def healthy_engines(self) -> list[Engine]:
+        return [engine for engine in self.engines if self._healthy[id(engine)]]
+
+    def pick(self) -> Engine | None:
+        healthy = self.healthy_engines()
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+    def mark_down(self, engine: Engine) -> None:
+        if self._healthy.get(id(engine)):
+            logger.warning(
+                "Replica %s marked unhealthy",
+                engine.url.render_as_string(hide_password=True),
+            )
+        self._healthy[id(engine)] = False
+
+    def check(self) -> None:
+        for engine in self.engines:
+            try:
+                with engine.connect() as conn:
+                    lag = replication_lag(conn)
+            except SQLAlchemyError:
+                self.mark_down(engine)
+                continue
+            if self._max_lag is not None and lag > self._max_lag:
+                if self._healthy[id(engine)]:
+                    logger.warning(
+                        "Replica %s is %.1fs behind",
+                        engine.url.render_as_string(hide_password=True),
+                        lag,
+                    )
+                self.mark_down(engine)
+            else:
+                if not self._healthy[id(engine)]:
+                    logger.info(
+                        "Replica %s healthy again",
+                        engine.url.render_as_string(hide_password=True),
+                    )
+                self._healthy[id(engine)] = True
+
+    def start(self) -> None:
+        if not self.engines or self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="replica-health", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while True:
+            self.check()
+            if self._stop.wait(self._check_interval):
+                break
+
+
+class StickyWrites:
+    """Bounded map of token digest -> time until which reads must use the primary."""
+
+    def __init__(self, max_entries: int = 10000) -> None:
+        self._entries: OrderedDict[str, float] = OrderedDict()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(request: Request) -> str | None:
+        authorization = request.headers.get("authorization")
+        if not authorization:
+            return None
+        return hashlib.blake2b(authorization.encode(), digest_size=16).hexdigest()
+
+    def mark(self, key: str, until: float) -> None:
+        with self._lock:
+            self._entries[key] = until
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def is_sticky(self, key: str, now: float) -> bool:
+        with self._lock:
+            until = self._entries.get(key)
+            if until is None:
+                return False
+            if until < now:
+                del self._entries[key]
+                return False
+            return True
+
+
+sticky_writes = StickyWrites()
+
+
+def wants_primary(request: Request | None) -> bool:
+    if request is None or request.method not in READ_METHODS:
+        return True
+    now = time.time()
+    try:
+        if float(request.cookies.get(STICKY_COOKIE, 0)) > now:
+            return True
+    except ValueError:
+        pass
+    key = StickyWrites.key_for(request)
+    return key is not None and sticky_writes.is_sticky(key, now)
+
+
+class ReadYourWritesMiddleware:
+    """Marks the caller sticky to the primary after a successful write."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] in READ_METHODS
+            or not settings.database_replica_urls
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_sticky(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = time.time() + settings.read_your_writes_seconds
+                key = StickyWrites.key_for(Request(scope))
+                if key is not None:
+                    sticky_writes.mark(key, until)
+                MutableHeaders(raw=message["headers"]).append(
+                    "Set-Cookie",
+                    f"{STICKY_COOKIE}={until:.0f}; HttpOnly; Max-Age={int(settings.read_your_writes_seconds) + 1}; Path=/; SameSite=lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_sticky)
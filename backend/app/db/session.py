@@ -1,14 +1,106 @@
-from sqlalchemy import create_engine, text
+import logging
+
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from starlette.requests import Request
 
 from app.core.config import settings
+from app.db.routing import ReplicaRouter, wants_primary
+
+logger = logging.getLogger(__name__)
+
+# Applied to every SQLite connection; WAL lets readers run alongside the single writer
+SQLITE_PRAGMAS = {
+    "foreign_keys": "ON",
+    "busy_timeout": "5000",
+    "synchronous": "NORMAL",
+    "temp_store": "MEMORY",
+    "cache_size": "-65536",
+    "mmap_size": "268435456",
+}
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+
+
+def create_db_engine(url: str, allow_memory: bool = False, **kwargs):
+    """Create an engine for ``url``, with SQLite set up for use from the app's threads.
+
+    File SQLite uses WAL and ``SQLITE_PRAGMAS`` and keeps pysqlite's deferred
+    ``BEGIN`` before the first write, so concurrent requests only contend
+    while actually writing. In-memory SQLite shares one connection
+    (``StaticPool``) so every session sees the same database, and pysqlite's
+    own transaction handling is replaced by an explicit ``BEGIN`` so the
+    SAVEPOINTs used by ``app.db.testing`` behave as on Postgres. Nothing stops
+    two threads from interleaving on that connection, so it is only built
+    with ``allow_memory`` (as ``app.db.testing`` does) and never for the app.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return create_engine(url, future=True, **kwargs)
+    kwargs.pop("pool_pre_ping", None)
+    memory = _is_memory_sqlite(parsed)
+    if memory and not allow_memory:
+        raise ValueError(
+            "In-memory SQLite is only for tests (app.db.testing.create_test_engine); "
+            "use a file database such as sqlite:///./recruit_flow.db"
+        )
+    if memory:
+        kwargs.setdefault("poolclass", StaticPool)
+    sqlite_engine = create_engine(
+        url, future=True, connect_args={"check_same_thread": False}, **kwargs
+    )
+
+    @event.listens_for(sqlite_engine, "connect")
+    def _configure_sqlite(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if memory:
+            dbapi_connection.isolation_level = None
+        else:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    if memory:
+
+        @event.listens_for(sqlite_engine, "begin")
+        def _begin_sqlite(conn):
+            conn.exec_driver_sql("BEGIN")
+
+    return sqlite_engine
 
-engine = create_engine(settings.database_url, future=True)
+
+engine = create_db_engine(settings.database_url)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+replica_router = ReplicaRouter(
+    [
+        create_db_engine(url, pool_pre_ping=True)
+        for url in settings.database_replica_urls
+    ],
+    settings.replica_health_check_seconds,
+    settings.replica_max_lag_seconds,
+)
+
 
-def get_db():
-    db = SessionLocal()
+def get_db(request: Request = None):
+    """Yield a session on a replica for reads that don't need the primary, else on the primary."""
+    replica = None if wants_primary(request) else replica_router.pick()
+    if replica is None:
+        db = SessionLocal()
+    else:
+        db = SessionLocal(bind=replica)
+        try:
+            db.connection()
+        except SQLAlchemyError:
+            db.close()
+            replica_router.mark_down(replica)
+            db = SessionLocal()
     try:
         yield db
     finally:
@@ -17,77 +109,279 @@ def get_db():
 
 def column_exists(conn, table_name: str, column_name: str) -> bool:
     """Check if a column exists in a table."""
-    result = conn.execute(text("""
-        SELECT EXISTS (
-            SELECT 1
-            FROM information_schema.columns
-            WHERE table_name = :table_name
-            AND column_name = :column_name
-        )
-    """), {"table_name": table_name, "column_name": column_name})
-    return result.scalar()
+    inspector = inspect(conn)
+    if not inspector.has_table(table_name):
+        return False
+    return any(
+        column["name"] == column_name for column in inspector.get_columns(table_name)
+    )
 
 
-def add_column_if_not_exists(conn, table_name: str, column_name: str, column_type: str, nullable: bool = False, default_value: str = None):
+def add_column_if_not_exists(
+    conn,
+    table_name: str,
+    column_name: str,
+    column_type: str,
+    nullable: bool = False,
+    default_value: str | None = None,
+):
     """Add a column to a table if it doesn't exist."""
     if not column_exists(conn, table_name, column_name):
         # For NOT NULL columns in existing tables, we need to add with a default or allow NULL first
         if nullable:
             sql = f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type};"
+        elif (
+            default_value is not None
+            and conn.dialect.name == "sqlite"
+            and not default_value.startswith("'")
+            and not default_value.lstrip("-").isdigit()
+        ):
+            # SQLite only adds columns with constant defaults; backfill expressions like CURRENT_TIMESTAMP instead
+            conn.execute(
+                text(
+                    f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type};"
+                )
+            )
+            sql = f"UPDATE {table_name} SET {column_name} = {default_value};"
         elif default_value is not None:
             sql = f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type} DEFAULT {default_value} NOT NULL;"
         else:
             # For non-nullable without default, add as nullable first (we'll handle updates separately if needed)
             sql = f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type};"
         conn.execute(text(sql))
-        print(f"✓ Added '{column_name}' column to '{table_name}' table")
+        logger.info("Added %r column to %r table", column_name, table_name)
         return True
     else:
-        print(f"ℹ '{column_name}' column already exists in '{table_name}' table")
+        logger.debug("%r column already exists in %r table", column_name, table_name)
+        return False
+
+
+def add_unique_index_if_not_exists(
+    conn, index_name: str, table_name: str, columns: list[str]
+):
+    """Create a unique index unless it exists.
+
+    Raises ``RuntimeError`` while the table still holds duplicates, so the
+    constraint the code relies on is never silently missing.
+    """
+    inspector = inspect(conn)
+    if not inspector.has_table(table_name) or any(
+        index["name"] == index_name for index in inspector.get_indexes(table_name)
+    ):
         return False
+    column_list = ", ".join(columns)
+    duplicates = conn.execute(
+        text(
+            f"""
+        SELECT COUNT(*) FROM (
+            SELECT 1 FROM {table_name} GROUP BY {column_list} HAVING COUNT(*) > 1
+        ) AS duplicates
+    """
+        )
+    ).scalar()
+    if duplicates:
+        raise RuntimeError(
+            f"Cannot create unique index {index_name!r}: {duplicates} duplicate "
+            f"({column_list}) groups in {table_name!r}; remove them and restart"
+        )
+    conn.execute(
+        text(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {index_name} ON {table_name} ({column_list});"
+        )
+    )
+    return True
 
 
 def add_missing_columns():
     """Add all missing columns from all models."""
     with engine.begin() as conn:
-        print("Checking and adding missing columns...")
-        
+        logger.info("Checking and adding missing columns")
+
         # Jobs table columns
-        add_column_if_not_exists(conn, "jobs", "company", "VARCHAR(255)", nullable=False, default_value="''")
-        add_column_if_not_exists(conn, "jobs", "location", "VARCHAR(255)", nullable=False, default_value="''")
-        add_column_if_not_exists(conn, "jobs", "department", "VARCHAR(255)", nullable=True)
-        add_column_if_not_exists(conn, "jobs", "employment_type", "VARCHAR(100)", nullable=False, default_value="'Full-time'")
-        add_column_if_not_exists(conn, "jobs", "status", "VARCHAR(50)", nullable=False, default_value="'open'")
-        add_column_if_not_exists(conn, "jobs", "description", "TEXT", nullable=False, default_value="''")
+        add_column_if_not_exists(
+            conn, "jobs", "company", "VARCHAR(255)", nullable=False, default_value="''"
+        )
+        add_column_if_not_exists(
+            conn, "jobs", "location", "VARCHAR(255)", nullable=False, default_value="''"
+        )
+        add_column_if_not_exists(
+            conn, "jobs", "department", "VARCHAR(255)", nullable=True
+        )
+        add_column_if_not_exists(
+            conn,
+            "jobs",
+            "employment_type",
+            "VARCHAR(100)",
+            nullable=False,
+            default_value="'Full-time'",
+        )
+        add_column_if_not_exists(
+            conn,
+            "jobs",
+            "status",
+            "VARCHAR(50)",
+            nullable=False,
+            default_value="'open'",
+        )
+        add_column_if_not_exists(
+            conn, "jobs", "description", "TEXT", nullable=False, default_value="''"
+        )
         add_column_if_not_exists(conn, "jobs", "requirements", "TEXT", nullable=True)
-        add_column_if_not_exists(conn, "jobs", "min_salary", "NUMERIC(10, 2)", nullable=True)
-        add_column_if_not_exists(conn, "jobs", "max_salary", "NUMERIC(10, 2)", nullable=True)
-        add_column_if_not_exists(conn, "jobs", "created_by_id", "INTEGER", nullable=True)
-        add_column_if_not_exists(conn, "jobs", "created_at", "TIMESTAMP", nullable=False, default_value="CURRENT_TIMESTAMP")
-        
+        add_column_if_not_exists(
+            conn, "jobs", "min_salary", "NUMERIC(10, 2)", nullable=True
+        )
+        add_column_if_not_exists(
+            conn, "jobs", "max_salary", "NUMERIC(10, 2)", nullable=True
+        )
+        add_column_if_not_exists(
+            conn, "jobs", "created_by_id", "INTEGER", nullable=True
+        )
+        add_column_if_not_exists(
+            conn,
+            "jobs",
+            "created_at",
+            "TIMESTAMP",
+            nullable=False,
+            default_value="CURRENT_TIMESTAMP",
+        )
+        if add_column_if_not_exists(
+            conn, "jobs", "closed_at", "TIMESTAMP", nullable=True
+        ):
+            # Jobs closed before closed_at existed count as closed now, so the archiver
+            # waits the full retention period instead of going by created_at
+            conn.execute(
+                text(
+                    "UPDATE jobs SET closed_at = CURRENT_TIMESTAMP WHERE closed_at IS NULL AND status <> 'open';"
+                )
+            )
+
         # Users table columns
         add_column_if_not_exists(conn, "users", "phone", "VARCHAR(50)", nullable=True)
-        add_column_if_not_exists(conn, "users", "location", "VARCHAR(255)", nullable=True)
+        add_column_if_not_exists(
+            conn, "users", "location", "VARCHAR(255)", nullable=True
+        )
         add_column_if_not_exists(conn, "users", "bio", "TEXT", nullable=True)
-        add_column_if_not_exists(conn, "users", "full_name", "VARCHAR(255)", nullable=True)
-        add_column_if_not_exists(conn, "users", "role", "VARCHAR(50)", nullable=False, default_value="'candidate'")
-        add_column_if_not_exists(conn, "users", "created_at", "TIMESTAMP", nullable=False, default_value="CURRENT_TIMESTAMP")
-        
+        add_column_if_not_exists(
+            conn, "users", "full_name", "VARCHAR(255)", nullable=True
+        )
+        add_column_if_not_exists(
+            conn,
+            "users",
+            "role",
+            "VARCHAR(50)",
+            nullable=False,
+            default_value="'candidate'",
+        )
+        add_column_if_not_exists(
+            conn,
+            "users",
+            "created_at",
+            "TIMESTAMP",
+            nullable=False,
+            default_value="CURRENT_TIMESTAMP",
+        )
+
         # Applications table columns
-        add_column_if_not_exists(conn, "applications", "stage_id", "INTEGER", nullable=True)
-        add_column_if_not_exists(conn, "applications", "status", "VARCHAR(50)", nullable=False, default_value="'active'")
-        add_column_if_not_exists(conn, "applications", "resume_path", "VARCHAR(500)", nullable=True)
-        add_column_if_not_exists(conn, "applications", "cover_letter", "TEXT", nullable=True)
-        add_column_if_not_exists(conn, "applications", "created_at", "TIMESTAMP", nullable=False, default_value="CURRENT_TIMESTAMP")
-        add_column_if_not_exists(conn, "applications", "updated_at", "TIMESTAMP", nullable=False, default_value="CURRENT_TIMESTAMP")
-        
+        add_column_if_not_exists(
+            conn, "applications", "stage_id", "INTEGER", nullable=True
+        )
+        add_column_if_not_exists(
+            conn,
+            "applications",
+            "status",
+            "VARCHAR(50)",
+            nullable=False,
+            default_value="'active'",
+        )
+        add_column_if_not_exists(
+            conn, "applications", "resume_path", "VARCHAR(500)", nullable=True
+        )
+        add_column_if_not_exists(
+            conn, "applications", "cover_letter", "TEXT", nullable=True
+        )
+        add_column_if_not_exists(
+            conn,
+            "applications",
+            "created_at",
+            "TIMESTAMP",
+            nullable=False,
+            default_value="CURRENT_TIMESTAMP",
+        )
+        add_column_if_not_exists(
+            conn,
+            "applications",
+            "updated_at",
+            "TIMESTAMP",
+            nullable=False,
+            default_value="CURRENT_TIMESTAMP",
+        )
+        add_unique_index_if_not_exists(
+            conn,
+            "uq_applications_candidate_job",
+            "applications",
+            ["candidate_id", "job_id"],
+        )
+
+        # Stage events are folded into the rollups by flag, and rollups keep duration
+        # histograms; rollups built before either are cleared to be rebuilt from the events
+        if column_exists(conn, "application_stage_events", "id"):
+            if add_column_if_not_exists(
+                conn,
+                "application_stage_events",
+                "rolled_up",
+                "BOOLEAN",
+                nullable=False,
+                default_value="FALSE",
+            ):
+                conn.execute(text("DELETE FROM stage_rollups;"))
+                conn.execute(text("DELETE FROM stage_daily_rollups;"))
+            conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_stage_events_pending ON application_stage_events (id) WHERE NOT rolled_up;"
+                )
+            )
+            add_column_if_not_exists(
+                conn, "stage_rollups", "duration_histogram", "JSON", nullable=True
+            )
+            add_column_if_not_exists(
+                conn, "stage_daily_rollups", "duration_histogram", "JSON", nullable=True
+            )
+
+        # Archived jobs table columns (if table exists)
+        if column_exists(conn, "archived_jobs", "id"):
+            add_column_if_not_exists(
+                conn, "archived_jobs", "segment_offset", "BIGINT", nullable=True
+            )
+            add_column_if_not_exists(
+                conn, "archived_jobs", "segment_length", "INTEGER", nullable=True
+            )
+            add_column_if_not_exists(
+                conn, "archived_jobs", "summary", "JSON", nullable=True
+            )
+
         # Job stages table columns (if table exists)
         if column_exists(conn, "job_stages", "id"):  # Check if table exists
-            add_column_if_not_exists(conn, "job_stages", "position", "INTEGER", nullable=False, default_value="0")
-        
+            add_column_if_not_exists(
+                conn,
+                "job_stages",
+                "position",
+                "INTEGER",
+                nullable=False,
+                default_value="0",
+            )
+
         # Application notes table columns (if table exists)
         if column_exists(conn, "application_notes", "id"):  # Check if table exists
-            add_column_if_not_exists(conn, "application_notes", "author_id", "INTEGER", nullable=True)
-            add_column_if_not_exists(conn, "application_notes", "created_at", "TIMESTAMP", nullable=False, default_value="CURRENT_TIMESTAMP")
-        
-        print("✓ Column migration check completed!")
+            add_column_if_not_exists(
+                conn, "application_notes", "author_id", "INTEGER", nullable=True
+            )
+            add_column_if_not_exists(
+                conn,
+                "application_notes",
+                "created_at",
+                "TIMESTAMP",
+                nullable=False,
+                default_value="CURRENT_TIMESTAMP",
+            )
+
+        logger.info("Column migration check completed")
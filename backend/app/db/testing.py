@@ -0,0 +1,113 @@
+"""Database fixtures for tests and benchmarks that need no outside services.
+
+``create_test_engine`` builds an in-memory (or file) SQLite engine through
+``create_db_engine`` and creates the schema once; in-memory engines are only
+built here, since they share one unlocked connection between threads. ``transactional_session``
+then wraps a unit of work in an outer transaction that is rolled back at the
+end; the session joins it with ``create_savepoint``, so code under test can
+commit and roll back as usual without anything reaching the database.
+
+With pytest installed, the same pieces are available as fixtures by adding
+``pytest_plugins = ["app.db.testing"]`` to a ``conftest.py``:
+
+- ``db_engine`` (session scope): the engine with the schema created.
+- ``db_session``: a session inside a rolled-back transaction.
+- ``client``: a ``TestClient`` whose ``get_db`` yields ``db_session``, with
+  rate limiting turned off and fresh per-process state (middleware, rate
+  limit buckets, idempotency store, public response cache and event broker)
+  so nothing one test does is seen by the next.
+"""
+
+from __future__ import annotations
+
+import importlib
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.session import create_db_engine, get_db
+
+
+def create_test_engine(url: str = "sqlite://") -> Engine:
+    # Importing the models registers every table on Base.metadata
+    importlib.import_module("app.models")
+
+    engine = create_db_engine(url, allow_memory=True)
+    Base.metadata.create_all(engine)
+    return engine
+
+
+@contextmanager
+def transactional_session(engine: Engine) -> Iterator[Session]:
+    """Yield a session whose work, commits included, is rolled back afterwards."""
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = Session(
+        bind=connection, autoflush=False, join_transaction_mode="create_savepoint"
+    )
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+
+
+@contextmanager
+def override_get_db(app, session: Session) -> Iterator[None]:
+    """Make ``app`` serve every request from ``session``."""
+
+    def _get_db():
+        yield session
+
+    app.dependency_overrides[get_db] = _get_db
+    try:
+        yield
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+
+
+try:
+    import pytest
+except ImportError:  # pragma: no cover - pytest is only needed to run tests
+    pytest = None
+
+if pytest is not None:
+
+    @pytest.fixture(scope="session")
+    def db_engine() -> Iterator[Engine]:
+        engine = create_test_engine()
+        yield engine
+        engine.dispose()
+
+    @pytest.fixture
+    def db_session(db_engine: Engine) -> Iterator[Session]:
+        with transactional_session(db_engine) as session:
+            yield session
+
+    @pytest.fixture
+    def client(db_session: Session, monkeypatch: pytest.MonkeyPatch):
+        from fastapi.testclient import TestClient
+
+        from app import main
+        from app.core import events, idempotency
+        from app.core.config import settings
+        from app.core.response_cache import public_cache
+
+        monkeypatch.setattr(settings, "rate_limit_enabled", False)
+        monkeypatch.setattr(idempotency, "idempotency_store", idempotency.build_store())
+        broker = events.build_broker()
+        monkeypatch.setattr(events, "broker", broker)
+        monkeypatch.setattr(main, "broker", broker)
+        public_cache.invalidate()
+        # Rebuilt on the next request, with new rate limit buckets
+        main.app.middleware_stack = None
+        try:
+            with override_get_db(main.app, db_session):
+                yield TestClient(main.app)
+        finally:
+            main.app.middleware_stack = None
+            public_cache.invalidate()
@@ -0,0 +1,33 @@
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+
+def insert_or_ignore(db: Session, model, values: dict):
+    """Insert one row unless it violates a unique constraint; returns the new primary key or ``None``.
+
+    Uses ``ON CONFLICT DO NOTHING`` where the dialect has it, so concurrent
+    callers race on the constraint instead of on a read-then-write. The caller
+    owns the commit.
+    """
+    dialect = db.get_bind().dialect.name
+    primary_key = model.__mapper__.primary_key[0]
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        statement = (
+            dialect_insert(model)
+            .values(**values)
+            .on_conflict_do_nothing()
+            .returning(primary_key)
+        )
+        return db.execute(statement).scalar()
+    try:
+        with db.begin_nested():
+            return db.execute(
+                insert(model).values(**values).returning(primary_key)
+            ).scalar()
+    except IntegrityError:
+        return None
@@ -4,14 +4,24 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
+from app import models  # noqa: F401
 from app.api.v1.api import api_router
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.events import broker
+from app.core.profiling import ProfilingMiddleware
+from app.core.rate_limit import RateLimitMiddleware
 from app.db.base import Base
-from app.db.session import engine, add_missing_columns
-from app import models
+from app.db.routing import ReadYourWritesMiddleware
+from app.db.session import SessionLocal, add_missing_columns, engine, replica_router
+from app.utils.resume_parser import close_client
 
 app = FastAPI(title=settings.project_name, version="0.1.0")
 
+# Innermost, so profiles only cover requests that got past the rate limiter
+app.add_middleware(ProfilingMiddleware)
+# Registered before CORS so rejected requests still carry CORS headers
+app.add_middleware(RateLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.allowed_origins,
@@ -19,6 +29,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(CompressionMiddleware)
 
 uploads_root = Path(settings.resume_upload_dir).resolve().parent
 uploads_root.mkdir(parents=True, exist_ok=True)
@@ -27,9 +39,82 @@ app.mount("/uploads", StaticFiles(directory=str(uploads_root)), name="uploads")
 
 @app.on_event("startup")
 def startup() -> None:
-    Base.metadata.create_all(bind=engine)
-    # Add missing columns if they don't exist
-    add_missing_columns()
+    # Worker tasks are imported here so importing the app stays cheap
+    from app.utils.analytics import refresh_rollups
+    from app.utils.archive import archive_closed_jobs
+    from app.utils.dedup import refresh_duplicate_pairs
+    from app.utils.job_alerts import deliver_digests
+    from app.utils.token_cleanup import purge_refresh_tokens
+    from app.utils.worker import PeriodicWorker
+
+    # Schema sync can be turned off on scaled-out workers once one instance has run it
+    if settings.schema_sync_on_startup:
+        Base.metadata.create_all(bind=engine)
+        # Add missing columns if they don't exist
+        add_missing_columns()
+    replica_router.start()
+    broker.start()
+    app.state.workers = []
+    if settings.analytics_refresh_interval_seconds > 0:
+        app.state.workers.append(
+            PeriodicWorker(
+                "rollup-worker",
+                SessionLocal,
+                settings.analytics_refresh_interval_seconds,
+                refresh_rollups,
+            )
+        )
+    if settings.job_alert_digest_interval_seconds > 0:
+        app.state.workers.append(
+            PeriodicWorker(
+                "job-alert-digests",
+                SessionLocal,
+                settings.job_alert_digest_interval_seconds,
+                deliver_digests,
+            )
+        )
+    if settings.duplicate_scan_interval_seconds > 0:
+        app.state.workers.append(
+            PeriodicWorker(
+                "duplicate-scanner",
+                SessionLocal,
+                settings.duplicate_scan_interval_seconds,
+                refresh_duplicate_pairs,
+            )
+        )
+    if settings.archive_interval_seconds > 0:
+        app.state.workers.append(
+            PeriodicWorker(
+                "job-archiver",
+                SessionLocal,
+                settings.archive_interval_seconds,
+                archive_closed_jobs,
+            )
+        )
+    if settings.refresh_token_purge_interval_seconds > 0:
+        app.state.workers.append(
+            PeriodicWorker(
+                "refresh-token-purger",
+                SessionLocal,
+                settings.refresh_token_purge_interval_seconds,
+                purge_refresh_tokens,
+            )
+        )
+    for worker in app.state.workers:
+        worker.start()
+
+
+@app.on_event("shutdown")
+def shutdown() -> None:
+    for worker in getattr(app.state, "workers", []):
+        worker.stop()
+    broker.close()
+    replica_router.stop()
+
+
+@app.on_event("shutdown")
+async def close_http_clients() -> None:
+    await close_client()
 
 
 @app.get("/health", tags=["health"], summary="Root health check")
@@ -1,7 +1,33 @@
-from app.models.user import User
-from app.models.job import Job
-from app.models.job_stage import JobStage
 from app.models.application import Application
 from app.models.application_note import ApplicationNote
+from app.models.application_stage_event import ApplicationStageEvent
+from app.models.archive import ArchivedApplication, ArchivedJob
+from app.models.duplicate import DuplicateUserPair, UserSignature
+from app.models.job import Job
+from app.models.job_stage import JobStage
+from app.models.refresh_token import RefreshToken
+from app.models.request_profile import RequestProfile
+from app.models.saved_search import JobAlertMatch, SavedSearch, SavedSearchTerm
+from app.models.stage_rollup import RollupCheckpoint, StageDailyRollup, StageRollup
+from app.models.user import User
 
-__all__ = ["User", "Job", "JobStage", "Application", "ApplicationNote"]
+__all__ = [
+    "Application",
+    "ApplicationNote",
+    "ApplicationStageEvent",
+    "ArchivedApplication",
+    "ArchivedJob",
+    "DuplicateUserPair",
+    "Job",
+    "JobAlertMatch",
+    "JobStage",
+    "RefreshToken",
+    "RequestProfile",
+    "RollupCheckpoint",
+    "SavedSearch",
+    "SavedSearchTerm",
+    "StageDailyRollup",
+    "StageRollup",
+    "User",
+    "UserSignature",
+]
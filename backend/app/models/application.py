@@ -1,35 +1,45 @@
 from __future__ import annotations
 
 from datetime import datetime
-
 from typing import TYPE_CHECKING
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
 
 if TYPE_CHECKING:
-    from app.models.user import User
+    from app.models.application_note import ApplicationNote
     from app.models.job import Job
     from app.models.job_stage import JobStage
-    from app.models.application_note import ApplicationNote
+    from app.models.user import User
 
 
 class Application(Base):
     __tablename__ = "applications"
+    __table_args__ = (
+        Index("uq_applications_candidate_job", "candidate_id", "job_id", unique=True),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    candidate_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    candidate_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE")
+    )
     job_id: Mapped[int] = mapped_column(ForeignKey("jobs.id", ondelete="CASCADE"))
-    stage_id: Mapped[int] = mapped_column(ForeignKey("job_stages.id", ondelete="SET NULL"), nullable=True)
+    stage_id: Mapped[int] = mapped_column(
+        ForeignKey("job_stages.id", ondelete="SET NULL"), nullable=True
+    )
     status: Mapped[str] = mapped_column(String(50), default="active")
     resume_path: Mapped[str | None] = mapped_column(String(500), nullable=True)
     cover_letter: Mapped[str | None] = mapped_column(String, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
-    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
 
     candidate: Mapped["User"] = relationship(back_populates="applications")
     job: Mapped["Job"] = relationship(back_populates="applications")
     stage: Mapped["JobStage"] = relationship(back_populates="applications")
-    notes: Mapped[list["ApplicationNote"]] = relationship(back_populates="application", cascade="all, delete-orphan")
+    notes: Mapped[list["ApplicationNote"]] = relationship(
+        back_populates="application", cascade="all, delete-orphan"
+    )
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, false, text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.db.base import Base
+
+if TYPE_CHECKING:
+    from app.models.application import Application
+
+
+class ApplicationStageEvent(Base):
+    """Append-only record of an application entering a stage."""
+
+    __tablename__ = "application_stage_events"
+    __table_args__ = (
+        Index("ix_stage_events_application_occurred", "application_id", "occurred_at"),
+        Index("ix_stage_events_job_occurred", "job_id", "occurred_at"),
+        Index(
+            "ix_stage_events_pending",
+            "id",
+            postgresql_where=text("NOT rolled_up"),
+            sqlite_where=text("NOT rolled_up"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    application_id: Mapped[int] = mapped_column(
+        ForeignKey("applications.id", ondelete="CASCADE")
+    )
+    job_id: Mapped[int] = mapped_column(ForeignKey("jobs.id", ondelete="CASCADE"))
+    from_stage_id: Mapped[int | None] = mapped_column(
+        ForeignKey("job_stages.id", ondelete="SET NULL"), nullable=True
+    )
+    to_stage_id: Mapped[int | None] = mapped_column(
+        ForeignKey("job_stages.id", ondelete="SET NULL"), nullable=True
+    )
+    actor_id: Mapped[int | None] = mapped_column(
+        ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+    seconds_in_from_stage: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    occurred_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    rolled_up: Mapped[bool] = mapped_column(
+        Boolean, default=False, server_default=false()
+    )
+
+    application: Mapped["Application"] = relationship()
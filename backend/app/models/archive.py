@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    DateTime,
+    ForeignKey,
+    Integer,
+    LargeBinary,
+    String,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class ArchivedJob(Base):
+    """A closed job moved out of the live tables.
+
+    The job, its stages, applications and notes are kept as one compressed
+    document, either inline in ``payload`` or as a gzip member of the NDJSON
+    segment file named by ``segment``, starting at ``segment_offset`` and
+    ``segment_length`` bytes long. ``summary`` keeps the job alone, shaped like
+    ``JobRead``, uncompressed for listing.
+    """
+
+    __tablename__ = "archived_jobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    job_id: Mapped[int] = mapped_column(Integer, unique=True, index=True)
+    created_by_id: Mapped[int | None] = mapped_column(
+        Integer, nullable=True, index=True
+    )
+    title: Mapped[str] = mapped_column(String(255))
+    status: Mapped[str] = mapped_column(String(50))
+    job_created_at: Mapped[datetime] = mapped_column(DateTime)
+    closed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    archived_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    segment: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    segment_offset: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    segment_length: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    payload: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    summary: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+
+
+class ArchivedApplication(Base):
+    """Lookup from an archived application to its candidate and archived job."""
+
+    __tablename__ = "archived_applications"
+
+    application_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    archived_job_id: Mapped[int] = mapped_column(
+        ForeignKey("archived_jobs.id", ondelete="CASCADE"), index=True
+    )
+    candidate_id: Mapped[int] = mapped_column(Integer, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime)
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import (
+    DateTime,
+    Float,
+    ForeignKey,
+    Integer,
+    LargeBinary,
+    String,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class UserSignature(Base):
+    """Stored MinHash signature of a user's profile, recomputed only when the profile changes."""
+
+    __tablename__ = "user_signatures"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    profile_hash: Mapped[str] = mapped_column(String(32))
+    shingle_count: Mapped[int] = mapped_column(Integer, default=0)
+    signature: Mapped[bytes] = mapped_column(LargeBinary, default=b"")
+    computed_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+
+class DuplicateUserPair(Base):
+    """Likely duplicate users found by the last dedup run, ``user_id < other_user_id``."""
+
+    __tablename__ = "duplicate_user_pairs"
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "other_user_id", name="uq_duplicate_user_pairs_key"
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), index=True
+    )
+    other_user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), index=True
+    )
+    similarity: Mapped[float] = mapped_column(Float, index=True)
+    computed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -30,6 +30,7 @@ class Job(Base):
     max_salary: Mapped[float | None] = mapped_column(Numeric(10, 2), nullable=True)
     created_by_id: Mapped[int | None] = mapped_column(ForeignKey("users.id"), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    closed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
 
     creator: Mapped[Optional["User"]] = relationship(back_populates="jobs")
     stages: Mapped[list["JobStage"]] = relationship(back_populates="job", cascade="all, delete-orphan", order_by="JobStage.position")
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import JSON, DateTime, Float, Integer, LargeBinary, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class RequestProfile(Base):
+    """A profiled request: its summary, SQL statements and gzip-compressed speedscope file."""
+
+    __tablename__ = "request_profiles"
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    method: Mapped[str] = mapped_column(String(10))
+    path: Mapped[str] = mapped_column(String(500))
+    reason: Mapped[str] = mapped_column(String(20))
+    status_code: Mapped[int] = mapped_column(Integer)
+    started_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+    duration_ms: Mapped[float] = mapped_column(Float)
+    sql_count: Mapped[int] = mapped_column(Integer)
+    sql_ms: Mapped[float] = mapped_column(Float)
+    statements: Mapped[list] = mapped_column(JSON, default=list)
+    speedscope: Mapped[bytes] = mapped_column(LargeBinary)
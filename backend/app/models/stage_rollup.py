@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from sqlalchemy import (
+    JSON,
+    Date,
+    DateTime,
+    ForeignKey,
+    Integer,
+    String,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class StageDailyRollup(Base):
+    """Per job/stage/day funnel counts maintained by the analytics refresher."""
+
+    __tablename__ = "stage_daily_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "job_id", "stage_id", "day", name="uq_stage_daily_rollups_key"
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    job_id: Mapped[int] = mapped_column(
+        ForeignKey("jobs.id", ondelete="CASCADE"), index=True
+    )
+    stage_id: Mapped[int] = mapped_column(
+        ForeignKey("job_stages.id", ondelete="CASCADE")
+    )
+    day: Mapped[date] = mapped_column(Date)
+    entered: Mapped[int] = mapped_column(Integer, default=0)
+    exited: Mapped[int] = mapped_column(Integer, default=0)
+    median_seconds: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    p90_seconds: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    duration_histogram: Mapped[dict[str, int]] = mapped_column(JSON, default=dict)
+
+
+class StageRollup(Base):
+    """All-time funnel counts and time-in-stage percentiles per job/stage."""
+
+    __tablename__ = "stage_rollups"
+    __table_args__ = (
+        UniqueConstraint("job_id", "stage_id", name="uq_stage_rollups_key"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    job_id: Mapped[int] = mapped_column(
+        ForeignKey("jobs.id", ondelete="CASCADE"), index=True
+    )
+    stage_id: Mapped[int] = mapped_column(
+        ForeignKey("job_stages.id", ondelete="CASCADE")
+    )
+    entered: Mapped[int] = mapped_column(Integer, default=0)
+    exited: Mapped[int] = mapped_column(Integer, default=0)
+    median_seconds: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    p90_seconds: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    duration_histogram: Mapped[dict[str, int]] = mapped_column(JSON, default=dict)
+    refreshed_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+
+class RollupCheckpoint(Base):
+    """When the rollups were last refreshed and the newest stage event folded in."""
+
+    __tablename__ = "rollup_checkpoints"
+
+    name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    last_event_id: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
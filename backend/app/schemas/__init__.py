@@ -1,27 +1,49 @@
-from app.schemas.user import UserCreate, UserRead, UserProfileUpdate
-from app.schemas.auth import LoginRequest, TokenResponse
-from app.schemas.job import JobCreate, JobUpdate, JobRead, JobStageRead
+from app.schemas.analytics import JobAnalyticsRead, StageDailyRead, StageFunnelRead
 from app.schemas.application import (
     ApplicationCreate,
     ApplicationMove,
     ApplicationNoteCreate,
-    ApplicationRead,
     ApplicationNoteRead,
+    ApplicationRead,
+)
+from app.schemas.auth import (
+    LoginRequest,
+    RefreshRequest,
+    StreamTicketResponse,
+    TokenResponse,
 )
+from app.schemas.job import JobCreate, JobRead, JobStageEdit, JobStageRead, JobUpdate
+from app.schemas.metrics import CompressionStatsRead
+from app.schemas.profile import ProfileRead, ProfileSummaryRead, SqlStatementRead
+from app.schemas.saved_search import SavedSearchCreate, SavedSearchRead
+from app.schemas.user import DuplicateUserRead, UserCreate, UserProfileUpdate, UserRead
 
 __all__ = [
-    "UserCreate",
-    "UserRead",
-    "UserProfileUpdate",
-    "LoginRequest",
-    "TokenResponse",
-    "JobCreate",
-    "JobUpdate",
-    "JobRead",
-    "JobStageRead",
     "ApplicationCreate",
     "ApplicationMove",
     "ApplicationNoteCreate",
-    "ApplicationRead",
     "ApplicationNoteRead",
+    "ApplicationRead",
+    "CompressionStatsRead",
+    "DuplicateUserRead",
+    "JobAnalyticsRead",
+    "JobCreate",
+    "JobRead",
+    "JobStageEdit",
+    "JobStageRead",
+    "JobUpdate",
+    "LoginRequest",
+    "ProfileRead",
+    "ProfileSummaryRead",
+    "RefreshRequest",
+    "SavedSearchCreate",
+    "SavedSearchRead",
+    "SqlStatementRead",
+    "StageDailyRead",
+    "StageFunnelRead",
+    "StreamTicketResponse",
+    "TokenResponse",
+    "UserCreate",
+    "UserProfileUpdate",
+    "UserRead",
 ]
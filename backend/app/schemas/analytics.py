@@ -0,0 +1,30 @@
+from datetime import date, datetime
+
+from pydantic import BaseModel
+
+
+class StageFunnelRead(BaseModel):
+    stage_id: int
+    name: str
+    position: int
+    entered: int
+    exited: int
+    conversion_rate: float | None
+    median_seconds: int | None
+    p90_seconds: int | None
+
+
+class StageDailyRead(BaseModel):
+    stage_id: int
+    day: date
+    entered: int
+    exited: int
+    median_seconds: int | None
+    p90_seconds: int | None
+
+
+class JobAnalyticsRead(BaseModel):
+    job_id: int
+    refreshed_at: datetime | None
+    stages: list[StageFunnelRead]
+    daily: list[StageDailyRead]
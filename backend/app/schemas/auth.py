@@ -6,8 +6,18 @@ class LoginRequest(BaseModel):
     password: str
 
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
 class TokenResponse(BaseModel):
     access_token: str
+    refresh_token: str | None = None
     token_type: str = "bearer"
     role: str
     full_name: str | None = None
+
+
+class StreamTicketResponse(BaseModel):
+    ticket: str
+    expires_in: int
@@ -11,6 +11,11 @@ class JobStageRead(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class JobStageEdit(BaseModel):
+    id: int | None = None
+    name: str
+
+
 class JobCreate(BaseModel):
     title: str
     company: str
@@ -37,6 +42,8 @@ class JobUpdate(BaseModel):
     min_salary: float | None = None
     max_salary: float | None = None
     stage_names: list[str] | None = None
+    stages: list[JobStageEdit] | None = None
+    stage_remap: dict[int, int | str] | None = None
 
 
 class JobRead(BaseModel):
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+
+class CompressionStatsRead(BaseModel):
+    encoding: str
+    responses: int
+    precompressed: int
+    bytes_in: int
+    bytes_out: int
+    bytes_saved: int
@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class SqlStatementRead(BaseModel):
+    statement: str
+    duration_ms: float
+    rowcount: int
+    executemany: bool
+
+
+class ProfileSummaryRead(BaseModel):
+    id: str
+    method: str
+    path: str
+    reason: str
+    status_code: int
+    started_at: datetime
+    duration_ms: float
+    sql_count: int
+    sql_ms: float
+
+
+class ProfileRead(ProfileSummaryRead):
+    statements: list[SqlStatementRead]
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict, model_validator
+
+
+class SavedSearchCreate(BaseModel):
+    keywords: str | None = None
+    location: str | None = None
+    department: str | None = None
+    min_salary: float | None = None
+
+    @model_validator(mode="after")
+    def require_a_criterion(self) -> "SavedSearchCreate":
+        # An empty search would match, and alert on, every new job
+        if not any(
+            [
+                (self.keywords or "").strip(),
+                (self.location or "").strip(),
+                (self.department or "").strip(),
+                self.min_salary is not None,
+            ]
+        ):
+            raise ValueError("A saved search needs at least one criterion")
+        return self
+
+
+class SavedSearchRead(BaseModel):
+    id: int
+    keywords: str | None
+    location: str | None
+    department: str | None
+    min_salary: float | None
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
@@ -32,3 +32,9 @@ class UserProfileUpdate(BaseModel):
     phone: str | None = None
     location: str | None = None
     bio: str | None = None
+
+
+class DuplicateUserRead(BaseModel):
+    user: UserRead
+    duplicate: UserRead
+    similarity: float
@@ -0,0 +1,243 @@
+"""Stage history recording and precomputed funnel rollups.
+
+``record_stage_change`` is called by the routes inside the same transaction as
+the stage move so the history can never disagree with ``applications``.
+``refresh_rollups`` folds events not yet rolled up into ``stage_daily_rollups``
+and ``stage_rollups`` as deltas per (job, stage, day); it is run periodically
+by a ``PeriodicWorker`` (or once via ``python -m app.utils.analytics``) so the
+analytics endpoint only ever reads a handful of precomputed rows.
+
+Time-in-stage percentiles come from a log-scale histogram kept on each rollup
+row (buckets ``DURATION_BUCKET_BASE`` apart, so within 5% of the exact value)
+which, unlike a median, can be added to without rereading past events.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.clock import utcnow
+from app.db.locks import try_advisory_xact_lock
+from app.db.upsert import insert_or_ignore
+from app.models.application import Application
+from app.models.application_stage_event import ApplicationStageEvent
+from app.models.stage_rollup import RollupCheckpoint, StageDailyRollup, StageRollup
+
+CHECKPOINT_NAME = "stage_funnel"
+DURATION_BUCKET_BASE = 1.1
+_LOG_BUCKET_BASE = math.log(DURATION_BUCKET_BASE)
+
+
+def record_stage_change(
+    db: Session,
+    application: Application,
+    from_stage_id: int | None,
+    to_stage_id: int | None,
+    actor_id: int | None = None,
+) -> ApplicationStageEvent:
+    """Append a stage event for ``application``; the caller owns the commit."""
+    now = utcnow()
+    previous_at = None
+    if application.id is not None:
+        previous_at = db.scalar(
+            select(ApplicationStageEvent.occurred_at)
+            .where(ApplicationStageEvent.application_id == application.id)
+            .order_by(
+                ApplicationStageEvent.occurred_at.desc(),
+                ApplicationStageEvent.id.desc(),
+            )
+            .limit(1)
+        )
+    event = ApplicationStageEvent(
+        application=application,
+        job_id=application.job_id,
+        from_stage_id=from_stage_id,
+        to_stage_id=to_stage_id,
+        actor_id=actor_id,
+        seconds_in_from_stage=(
+            int((now - previous_at).total_seconds()) if previous_at else None
+        ),
+        occurred_at=now,
+    )
+    db.add(event)
+    return event
+
+
+def duration_bucket(seconds: int) -> int:
+    """Histogram bucket of a duration: 0 for under a second, else ``log_base(seconds) + 1``."""
+    if seconds < 1:
+        return 0
+    return int(math.log(seconds) / _LOG_BUCKET_BASE) + 1
+
+
+def bucket_seconds(bucket: int) -> int:
+    """Representative duration of a bucket, its geometric midpoint."""
+    return 0 if bucket == 0 else round(DURATION_BUCKET_BASE ** (bucket - 0.5))
+
+
+def histogram_percentile(histogram: dict[str, int], fraction: float) -> int | None:
+    """Nearest-rank percentile of the durations counted in ``histogram``."""
+    total = sum(histogram.values())
+    if not total:
+        return None
+    rank = min(max(math.ceil(fraction * total), 1), total)
+    seen = 0
+    for bucket in sorted(histogram, key=int):
+        seen += histogram[bucket]
+        if seen >= rank:
+            return bucket_seconds(int(bucket))
+    return None
+
+
+class _StageDelta:
+    __slots__ = ("entered", "exited", "histogram")
+
+    def __init__(self) -> None:
+        self.entered = 0
+        self.exited = 0
+        self.histogram: dict[str, int] = defaultdict(int)
+
+    def apply(self, row: StageRollup | StageDailyRollup) -> None:
+        row.entered = (row.entered or 0) + self.entered
+        row.exited = (row.exited or 0) + self.exited
+        histogram = dict(row.duration_histogram or {})
+        for bucket, count in self.histogram.items():
+            histogram[bucket] = histogram.get(bucket, 0) + count
+        row.duration_histogram = histogram
+        row.median_seconds = histogram_percentile(histogram, 0.5)
+        row.p90_seconds = histogram_percentile(histogram, 0.9)
+
+
+def _apply_deltas(
+    db: Session,
+    totals: dict[tuple[int, int], _StageDelta],
+    daily: dict[tuple[int, int, date], _StageDelta],
+) -> None:
+    job_ids = {job_id for job_id, _ in totals}
+    days = {day for _, _, day in daily}
+    existing_totals = {
+        (row.job_id, row.stage_id): row
+        for row in db.scalars(
+            select(StageRollup).where(StageRollup.job_id.in_(job_ids))
+        )
+    }
+    for (job_id, stage_id), delta in totals.items():
+        row = existing_totals.get((job_id, stage_id))
+        if row is None:
+            row = StageRollup(job_id=job_id, stage_id=stage_id)
+            db.add(row)
+        delta.apply(row)
+        row.refreshed_at = utcnow()
+    existing_daily = {
+        (row.job_id, row.stage_id, row.day): row
+        for row in db.scalars(
+            select(StageDailyRollup).where(
+                StageDailyRollup.job_id.in_(job_ids), StageDailyRollup.day.in_(days)
+            )
+        )
+    }
+    for (job_id, stage_id, day), delta in daily.items():
+        row = existing_daily.get((job_id, stage_id, day))
+        if row is None:
+            row = StageDailyRollup(job_id=job_id, stage_id=stage_id, day=day)
+            db.add(row)
+        delta.apply(row)
+
+
+def refresh_rollups(db: Session, batch_size: int = 10000) -> int:
+    """Fold stage events not yet rolled up into the rollup tables.
+
+    Each batch claims its events by flipping ``rolled_up`` and adds their
+    counts and durations to the affected (job, stage) and (job, stage, day)
+    rows in the same transaction, so an event is counted exactly once however
+    late its transaction committed. Batches run under an advisory lock so
+    workers scheduling the refresh at the same time don't both insert a
+    rollup row; a worker that finds the lock taken stops. Returns the number
+    of events processed.
+    """
+    insert_or_ignore(
+        db, RollupCheckpoint, {"name": CHECKPOINT_NAME, "last_event_id": 0}
+    )
+    db.commit()
+    processed = 0
+    while True:
+        if not try_advisory_xact_lock(db, CHECKPOINT_NAME):
+            db.rollback()
+            break
+        rows = db.execute(
+            select(
+                ApplicationStageEvent.id,
+                ApplicationStageEvent.job_id,
+                ApplicationStageEvent.from_stage_id,
+                ApplicationStageEvent.to_stage_id,
+                ApplicationStageEvent.seconds_in_from_stage,
+                ApplicationStageEvent.occurred_at,
+            )
+            .where(~ApplicationStageEvent.rolled_up)
+            .order_by(ApplicationStageEvent.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            db.rollback()
+            break
+        event_ids = [row[0] for row in rows]
+        claimed = db.execute(
+            update(ApplicationStageEvent)
+            .where(
+                ApplicationStageEvent.id.in_(event_ids),
+                ~ApplicationStageEvent.rolled_up,
+            )
+            .values(rolled_up=True)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if claimed != len(event_ids):
+            # Another refresher got to some of these first
+            db.rollback()
+            break
+        totals: dict[tuple[int, int], _StageDelta] = defaultdict(_StageDelta)
+        daily: dict[tuple[int, int, date], _StageDelta] = defaultdict(_StageDelta)
+        for _, job_id, from_stage_id, to_stage_id, seconds, occurred_at in rows:
+            day = occurred_at.date()
+            if to_stage_id is not None:
+                totals[(job_id, to_stage_id)].entered += 1
+                daily[(job_id, to_stage_id, day)].entered += 1
+            if from_stage_id is not None:
+                for delta in (
+                    totals[(job_id, from_stage_id)],
+                    daily[(job_id, from_stage_id, day)],
+                ):
+                    delta.exited += 1
+                    if seconds is not None:
+                        delta.histogram[str(duration_bucket(seconds))] += 1
+        _apply_deltas(db, totals, daily)
+        checkpoint = db.get(RollupCheckpoint, CHECKPOINT_NAME)
+        checkpoint.last_event_id = max(checkpoint.last_event_id, event_ids[-1])
+        checkpoint.updated_at = utcnow()
+        db.commit()
+        processed += len(rows)
+    return processed
+
+
+def main(argv: list[str] | None = None) -> None:
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Refresh stage funnel rollups once.")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        processed = refresh_rollups(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"Processed {processed} stage events")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+"""Retention: move long-closed jobs out of the live tables.
+
+``archive_closed_jobs`` takes jobs that have been closed for longer than
+``ARCHIVE_CLOSED_JOB_DAYS`` and stores each one, with its stages, applications
+and notes, as a single document shaped like the recruiter ``job_detail``
+response. With ``ARCHIVE_BACKEND=table`` the document is gzip-compressed into
+``archived_jobs.payload``; with ``ndjson`` each batch is written to its own
+NDJSON segment under ``ARCHIVE_DIR``, one gzip member per document, and
+``archived_jobs`` records the segment and the member's offset and length so a
+single document is read back without decompressing the rest. A segment is
+written as a ``.part`` file and only renamed into place once the batch has
+committed. The job itself is also kept uncompressed in ``archived_jobs.summary``
+so archived job lists don't decompress any documents. The live rows are then
+deleted, so the everyday queries in
+``candidate.py`` and ``recruiter.py`` never see them again; the read helpers
+here are only used when a caller asks for archived data.
+
+``partition_applications_ddl`` prints the statements for converting
+``applications`` into a Postgres table range-partitioned by ``created_at``.
+It is not applied automatically; see its docstring for the trade-offs.
+
+    python -m app.utils.archive                     # archive once
+    python -m app.utils.archive --print-partition-ddl --from-year 2023 --to-year 2027
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import time
+from contextlib import nullcontext
+from datetime import timedelta
+from pathlib import Path
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.api.v1.serializers import application_payloads, dumps, job_payloads
+from app.core.clock import utcnow
+from app.core.config import settings
+from app.db.locks import try_advisory_xact_lock
+from app.models.application import Application
+from app.models.application_note import ApplicationNote
+from app.models.application_stage_event import ApplicationStageEvent
+from app.models.archive import ArchivedApplication, ArchivedJob
+from app.models.job import Job
+from app.models.job_stage import JobStage
+from app.models.saved_search import JobAlertMatch
+from app.models.stage_rollup import StageDailyRollup, StageRollup
+
+LOCK_NAME = "job_archiver"
+# Unreferenced .part segments older than this are leftovers of a failed run
+STALE_SEGMENT_SECONDS = 3600
+
+
+def _delete_job_rows(db: Session, job_id: int) -> None:
+    application_ids = select(Application.id).where(Application.job_id == job_id)
+    db.execute(
+        delete(ApplicationNote).where(
+            ApplicationNote.application_id.in_(application_ids)
+        )
+    )
+    db.execute(
+        delete(ApplicationStageEvent).where(ApplicationStageEvent.job_id == job_id)
+    )
+    db.execute(delete(JobAlertMatch).where(JobAlertMatch.job_id == job_id))
+    db.execute(delete(StageDailyRollup).where(StageDailyRollup.job_id == job_id))
+    db.execute(delete(StageRollup).where(StageRollup.job_id == job_id))
+    db.execute(delete(Application).where(Application.job_id == job_id))
+    db.execute(delete(JobStage).where(JobStage.job_id == job_id))
+    db.execute(delete(Job).where(Job.id == job_id))
+
+
+def _part_path(segment_path: Path) -> Path:
+    return segment_path.with_name(f".{segment_path.name}.part")
+
+
+def _publish_segment(segment_path: Path) -> None:
+    try:
+        os.replace(_part_path(segment_path), segment_path)
+    except FileNotFoundError:
+        # Another worker's recover_segments renamed it first
+        if not segment_path.exists():
+            raise
+
+
+def recover_segments(db: Session, directory: Path) -> None:
+    """Finish segments whose batch committed but whose rename didn't happen, and drop stale ones."""
+    for part_path in directory.glob(".*.part"):
+        name = part_path.name[1 : -len(".part")]
+        if (
+            db.scalar(
+                select(ArchivedJob.id).where(ArchivedJob.segment == name).limit(1)
+            )
+            is not None
+        ):
+            _publish_segment(directory / name)
+        elif time.time() - part_path.stat().st_mtime > STALE_SEGMENT_SECONDS:
+            part_path.unlink()
+
+
+def archive_closed_jobs(
+    db: Session,
+    older_than_days: int | None = None,
+    backend: str | None = None,
+    archive_dir: str | None = None,
+    batch_size: int = 100,
+) -> int:
+    """Archive jobs closed before the cutoff; returns the number archived.
+
+    Each batch runs under an advisory lock, so when every worker schedules
+    the archiver only one of them archives; a worker that finds the lock
+    taken stops.
+    """
+    older_than_days = (
+        settings.archive_closed_job_days if older_than_days is None else older_than_days
+    )
+    backend = backend or settings.archive_backend
+    cutoff = utcnow() - timedelta(days=older_than_days)
+    directory = None
+    if backend == "ndjson":
+        directory = Path(archive_dir or settings.archive_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+    elif backend != "table":
+        raise ValueError(f"Unknown archive backend {backend!r}")
+
+    archived = 0
+    while True:
+        if not try_advisory_xact_lock(db, LOCK_NAME):
+            db.rollback()
+            return archived
+        if directory is not None and not archived:
+            recover_segments(db, directory)
+        jobs = db.execute(
+            select(
+                Job.id,
+                Job.created_by_id,
+                Job.title,
+                Job.status,
+                Job.created_at,
+                Job.closed_at,
+            )
+            .where(Job.status != "open", Job.closed_at < cutoff)
+            .order_by(Job.id)
+            .limit(batch_size)
+        ).all()
+        if not jobs:
+            db.rollback()
+            return archived
+        segment_path = None
+        if directory is not None:
+            segment_path = (
+                directory / f"jobs-{utcnow():%Y%m%dT%H%M%S}-{jobs[0].id}.ndjson.gz"
+            )
+        try:
+            with (
+                open(_part_path(segment_path), "wb")
+                if segment_path is not None
+                else nullcontext()
+            ) as segment:
+                for job_id, created_by_id, title, status, created_at, closed_at in jobs:
+                    job_payload = job_payloads(db, Job.id == job_id)[0]
+                    applications = application_payloads(
+                        db, Application.job_id == job_id
+                    )
+                    document = {"job": job_payload, "applications": applications}
+                    record = ArchivedJob(
+                        job_id=job_id,
+                        created_by_id=created_by_id,
+                        title=title,
+                        status=status,
+                        job_created_at=created_at,
+                        closed_at=closed_at,
+                        summary=json.loads(dumps(job_payload)),
+                    )
+                    if segment is not None:
+                        # One gzip member per document; concatenated members still read as one gzip stream
+                        record.segment = segment_path.name
+                        record.segment_offset = segment.tell()
+                        segment.write(
+                            gzip.compress(dumps({"job_id": job_id, **document}) + b"\n")
+                        )
+                        record.segment_length = segment.tell() - record.segment_offset
+                    else:
+                        record.payload = gzip.compress(dumps(document))
+                    db.add(record)
+                    db.flush()
+                    db.add_all(
+                        ArchivedApplication(
+                            application_id=application["id"],
+                            archived_job_id=record.id,
+                            candidate_id=application["candidate"]["id"],
+                            created_at=application["created_at"],
+                        )
+                        for application in applications
+                    )
+                    _delete_job_rows(db, job_id)
+                    archived += 1
+                if segment is not None:
+                    segment.flush()
+                    os.fsync(segment.fileno())
+            db.commit()
+        except BaseException:
+            db.rollback()
+            if segment_path is not None:
+                _part_path(segment_path).unlink(missing_ok=True)
+            raise
+        if segment_path is not None:
+            _publish_segment(segment_path)
+
+
+def load_archived_document(record: ArchivedJob, archive_dir: str | None = None) -> dict:
+    """Return the ``{"job": ..., "applications": [...]}`` document for ``record``."""
+    if record.payload is not None:
+        return json.loads(gzip.decompress(record.payload))
+    segment_path = Path(archive_dir or settings.archive_dir) / record.segment
+    if record.segment_offset is None:
+        # Archived before member offsets were recorded: scan the segment
+        with gzip.open(segment_path, "rb") as segment:
+            for line in segment:
+                document = json.loads(line)
+                if document.pop("job_id", None) == record.job_id:
+                    return document
+        raise LookupError(
+            f"Archived job {record.job_id} missing from segment {record.segment}"
+        )
+    with open(segment_path, "rb") as segment:
+        segment.seek(record.segment_offset)
+        document = json.loads(gzip.decompress(segment.read(record.segment_length)))
+    document.pop("job_id")
+    return document
+
+
+def archived_jobs_for_recruiter(db: Session, user_id: int) -> list[dict]:
+    rows = db.execute(
+        select(ArchivedJob.id, ArchivedJob.summary)
+        .where(ArchivedJob.created_by_id == user_id)
+        .order_by(ArchivedJob.job_created_at.desc())
+    ).all()
+    return [
+        {
+            # Rows archived before summaries were stored only have the document
+            **(
+                summary or load_archived_document(db.get(ArchivedJob, record_id))["job"]
+            ),
+            "archived": True,
+        }
+        for record_id, summary in rows
+    ]
+
+
+def archived_job_detail(db: Session, job_id: int, user_id: int) -> dict | None:
+    record = db.scalar(
+        select(ArchivedJob).where(
+            ArchivedJob.job_id == job_id, ArchivedJob.created_by_id == user_id
+        )
+    )
+    if record is None:
+        return None
+    document = load_archived_document(record)
+    document["job"]["archived"] = True
+    return document
+
+
+def archived_applications_for_candidate(db: Session, candidate_id: int) -> list[dict]:
+    records = db.scalars(
+        select(ArchivedJob)
+        .join(
+            ArchivedApplication, ArchivedApplication.archived_job_id == ArchivedJob.id
+        )
+        .where(ArchivedApplication.candidate_id == candidate_id)
+        .distinct()
+    )
+    applications: list[dict] = []
+    for record in records:
+        for application in load_archived_document(record)["applications"]:
+            if application["candidate"]["id"] == candidate_id:
+                applications.append({**application, "notes": [], "archived": True})
+    applications.sort(key=lambda application: application["created_at"], reverse=True)
+    return applications
+
+
+def partition_applications_ddl(from_year: int, to_year: int) -> list[str]:
+    """Statements that rebuild ``applications`` as a yearly range-partitioned table.
+
+    Postgres requires the partition key in every unique constraint on a
+    partitioned table, so the primary key becomes ``(id, created_at)`` and
+    neither ``uq_applications_candidate_job`` nor the foreign keys into
+    ``applications.id`` can live on it. Both move to ``application_keys``, a
+    plain table with one row per application kept in step by triggers: the
+    insert trigger skips an application whose ``(candidate_id, job_id)`` is
+    taken, so ``insert_or_ignore`` still sees a conflict as no row, and the
+    foreign keys from ``application_notes`` and ``application_stage_events``
+    point at it with the same ``ON DELETE CASCADE``. The foreign keys from
+    ``applications`` to users, jobs and stages are recreated as they were.
+    Needs Postgres 13 or later. Run in a maintenance window, inside one
+    transaction.
+    """
+    statements = [
+        "ALTER TABLE application_notes DROP CONSTRAINT IF EXISTS application_notes_application_id_fkey;",
+        "ALTER TABLE application_stage_events DROP CONSTRAINT IF EXISTS application_stage_events_application_id_fkey;",
+        "ALTER TABLE applications RENAME TO applications_unpartitioned;",
+        (
+            "CREATE TABLE applications (LIKE applications_unpartitioned INCLUDING DEFAULTS INCLUDING GENERATED, "
+            "PRIMARY KEY (id, created_at)) PARTITION BY RANGE (created_at);"
+        ),
+    ]
+    for year in range(from_year, to_year + 1):
+        statements.append(
+            f"CREATE TABLE applications_{year} PARTITION OF applications "
+            f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01');"
+        )
+    statements += [
+        "CREATE TABLE applications_default PARTITION OF applications DEFAULT;",
+        "INSERT INTO applications SELECT * FROM applications_unpartitioned;",
+        "SELECT setval(pg_get_serial_sequence('applications_unpartitioned', 'id'), (SELECT COALESCE(MAX(id), 1) FROM applications));",
+        "ALTER SEQUENCE applications_id_seq OWNED BY applications.id;",
+        "ALTER TABLE applications ALTER COLUMN id SET DEFAULT nextval('applications_id_seq');",
+        "DROP TABLE applications_unpartitioned;",
+        "CREATE INDEX ix_applications_job_id ON applications (job_id);",
+        "CREATE INDEX ix_applications_candidate_id ON applications (candidate_id);",
+        "ALTER TABLE applications ADD CONSTRAINT applications_candidate_id_fkey FOREIGN KEY (candidate_id) REFERENCES users (id) ON DELETE CASCADE;",
+        "ALTER TABLE applications ADD CONSTRAINT applications_job_id_fkey FOREIGN KEY (job_id) REFERENCES jobs (id) ON DELETE CASCADE;",
+        "ALTER TABLE applications ADD CONSTRAINT applications_stage_id_fkey FOREIGN KEY (stage_id) REFERENCES job_stages (id) ON DELETE SET NULL;",
+        "CREATE TABLE application_keys (application_id INTEGER PRIMARY KEY, candidate_id INTEGER NOT NULL, job_id INTEGER NOT NULL);",
+        "INSERT INTO application_keys SELECT id, candidate_id, job_id FROM applications;",
+        "CREATE UNIQUE INDEX uq_applications_candidate_job ON application_keys (candidate_id, job_id);",
+        (
+            "CREATE FUNCTION applications_claim_key() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN "
+            "INSERT INTO application_keys VALUES (NEW.id, NEW.candidate_id, NEW.job_id) ON CONFLICT (candidate_id, job_id) DO NOTHING; "
+            "IF NOT FOUND THEN RETURN NULL; END IF; RETURN NEW; END $$;"
+        ),
+        (
+            "CREATE FUNCTION applications_release_key() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN "
+            "DELETE FROM application_keys WHERE application_id = OLD.id; RETURN OLD; END $$;"
+        ),
+        "CREATE TRIGGER applications_claim_key BEFORE INSERT ON applications FOR EACH ROW EXECUTE FUNCTION applications_claim_key();",
+        "CREATE TRIGGER applications_release_key AFTER DELETE ON applications FOR EACH ROW EXECUTE FUNCTION applications_release_key();",
+        (
+            "ALTER TABLE application_notes ADD CONSTRAINT application_notes_application_id_fkey "
+            "FOREIGN KEY (application_id) REFERENCES application_keys (application_id) ON DELETE CASCADE;"
+        ),
+        (
+            "ALTER TABLE application_stage_events ADD CONSTRAINT application_stage_events_application_id_fkey "
+            "FOREIGN KEY (application_id) REFERENCES application_keys (application_id) ON DELETE CASCADE;"
+        ),
+    ]
+    return statements
+
+
+def main(argv: list[str] | None = None) -> None:
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Archive long-closed jobs.")
+    parser.add_argument(
+        "--older-than-days", type=int, default=settings.archive_closed_job_days
+    )
+    parser.add_argument(
+        "--backend", choices=["table", "ndjson"], default=settings.archive_backend
+    )
+    parser.add_argument("--print-partition-ddl", action="store_true")
+    parser.add_argument("--from-year", type=int, default=utcnow().year - 2)
+    parser.add_argument("--to-year", type=int, default=utcnow().year + 1)
+    args = parser.parse_args(argv)
+
+    if args.print_partition_ddl:
+        print("\n".join(partition_applications_ddl(args.from_year, args.to_year)))
+        return
+    db = SessionLocal()
+    try:
+        archived = archive_closed_jobs(
+            db, older_than_days=args.older_than_days, backend=args.backend
+        )
+    finally:
+        db.close()
+    print(f"Archived {archived} jobs")
+
+
+if __name__ == "__main__":
+    main()
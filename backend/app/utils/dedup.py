@@ -0,0 +1,470 @@
+"""Near-duplicate user detection with MinHash signatures and LSH banding.
+
+Each user is reduced to a set of shingles built from normalized profile fields
+and the content digests of the resumes they uploaded, summarised as a fixed-width MinHash signature and bucketed band-by-band so that
+only users sharing at least one band are ever compared. This keeps the scan
+near-linear in the number of users instead of comparing every pair.
+
+``refresh_duplicate_pairs`` is the batch job: it keeps each user's signature in
+``user_signatures`` (recomputed only when the profile or the set of uploaded
+resumes changes, so resume files are read once per upload) and replaces
+``duplicate_user_pairs``, which the recruiter endpoint reads. Profiles with
+fewer than ``DUPLICATE_MIN_SHINGLES`` shingles are not indexed, and band
+buckets larger than ``DUPLICATE_MAX_BUCKET_SIZE`` are skipped; both are sparse
+or common values ("London") that say nothing about identity and would
+otherwise turn into millions of pairs. It runs in a ``PeriodicWorker`` when
+``DUPLICATE_SCAN_INTERVAL_SECONDS`` is set, or once via
+``python -m app.utils.dedup``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import re
+import unicodedata
+from array import array
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from itertools import combinations
+from pathlib import Path
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.locks import try_advisory_xact_lock
+from app.models.application import Application
+from app.models.duplicate import DuplicateUserPair, UserSignature
+from app.models.user import User
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+DEFAULT_THRESHOLD = 0.5
+LOCK_NAME = "duplicate_users"
+SIGNATURE_BATCH_SIZE = 5000
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_DIGIT_RE = re.compile(r"\D+")
+
+
+@dataclass(frozen=True)
+class DuplicatePair:
+    user_id: int
+    other_user_id: int
+    similarity: float
+
+
+def normalize_text(value: str | None) -> str:
+    """Lowercase, strip accents and collapse everything but letters and digits."""
+    if not value:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", value)
+    ascii_only = decomposed.encode("ascii", "ignore").decode("ascii").lower()
+    return " ".join(_WORD_RE.findall(ascii_only))
+
+
+def normalize_phone(value: str | None) -> str:
+    """Keep the last ten digits so country prefixes and punctuation don't matter."""
+    if not value:
+        return ""
+    return _DIGIT_RE.sub("", value)[-10:]
+
+
+def user_shingles(
+    full_name: str | None,
+    phone: str | None,
+    location: str | None,
+    bio: str | None,
+    resume_digests: Iterable[str] = (),
+) -> set[str]:
+    """Build the shingle set for a user.
+
+    Fields are prefixed so a token in the bio never collides with the same token
+    in the name. Names are shingled by sorted word so "Doe Jane" matches
+    "Jane Doe", and bios by word trigram so long free text dominates less.
+    Resumes are uploaded files with no extracted text, so each contributes the
+    digest of its content: the same CV sent from two accounts is one shingle.
+    """
+    shingles: set[str] = set()
+    name_words = sorted(normalize_text(full_name).split())
+    shingles.update(f"n:{word}" for word in name_words)
+    if len(name_words) > 1:
+        shingles.add("n:" + " ".join(name_words))
+    digits = normalize_phone(phone)
+    if len(digits) >= 7:
+        shingles.add(f"p:{digits}")
+    shingles.update(f"l:{word}" for word in normalize_text(location).split())
+    bio_words = normalize_text(bio).split()
+    shingles.update(
+        f"b:{' '.join(bio_words[i:i + 3])}" for i in range(max(len(bio_words) - 2, 0))
+    )
+    shingles.update(f"r:{digest}" for digest in resume_digests)
+    return shingles
+
+
+def resume_digest(resume_path: str) -> str | None:
+    """Digest of an uploaded resume's content, or None if the file is gone."""
+    path = Path(settings.resume_upload_dir) / Path(resume_path).name
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        with open(path, "rb") as resume:
+            for chunk in iter(lambda: resume.read(1 << 16), b""):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+def profile_hash(num_perm: int, *fields: str | None) -> str:
+    """Digest of the hashed profile fields; a stored signature is reused while it matches."""
+    return hashlib.blake2b(
+        repr((num_perm, *fields)).encode("utf-8"), digest_size=16
+    ).hexdigest()
+
+
+def _shingle_hash(shingle: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+class MinHasher:
+    """Computes MinHash signatures using universal hashing ``(a * x + b) mod p``."""
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, seed: int = 1) -> None:
+        self.num_perm = num_perm
+        params = hashlib.blake2b(f"minhash:{seed}".encode(), digest_size=64).digest()
+        coefficients: list[tuple[int, int]] = []
+        counter = 0
+        while len(coefficients) < num_perm:
+            chunk = hashlib.blake2b(
+                params + counter.to_bytes(4, "little"), digest_size=16
+            ).digest()
+            a = int.from_bytes(chunk[:8], "little") % (MERSENNE_PRIME - 1) + 1
+            b = int.from_bytes(chunk[8:], "little") % MERSENNE_PRIME
+            coefficients.append((a, b))
+            counter += 1
+        self._coefficients = coefficients
+
+    def signature(self, shingles: Iterable[str]) -> array:
+        hashes = [_shingle_hash(shingle) for shingle in shingles]
+        if not hashes:
+            return array("Q")
+        return array(
+            "Q",
+            (
+                min(((a * value + b) % MERSENNE_PRIME) & MAX_HASH for value in hashes)
+                for a, b in self._coefficients
+            ),
+        )
+
+
+def estimate_similarity(left: array, right: array) -> float:
+    """Estimate Jaccard similarity as the fraction of matching signature slots."""
+    if not left or len(left) != len(right):
+        return 0.0
+    return sum(1 for x, y in zip(left, right) if x == y) / len(left)
+
+
+class LSHIndex:
+    """Buckets signatures by band; users sharing any band become candidate pairs.
+
+    With ``b`` bands of ``r`` rows the probability a pair with similarity ``s``
+    is proposed is ``1 - (1 - s**r)**b``, which has its threshold near
+    ``(1 / b) ** (1 / r)``.
+    """
+
+    def __init__(
+        self, num_perm: int = DEFAULT_NUM_PERM, bands: int = DEFAULT_BANDS
+    ) -> None:
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets: list[dict[bytes, list[int]]] = [
+            defaultdict(list) for _ in range(bands)
+        ]
+        self.signatures: dict[int, array] = {}
+
+    def add(self, key: int, signature: array) -> None:
+        if not signature:
+            return
+        self.signatures[key] = signature
+        raw = signature.tobytes()
+        width = self.rows * signature.itemsize
+        for band, bucket in enumerate(self._buckets):
+            bucket[raw[band * width : (band + 1) * width]].append(key)
+
+    def candidate_pairs(
+        self, max_bucket_size: int | None = None
+    ) -> Iterator[tuple[int, int]]:
+        """Pairs sharing a band; buckets over ``max_bucket_size`` keys are skipped."""
+        seen: set[tuple[int, int]] = set()
+        for bucket in self._buckets:
+            for keys in bucket.values():
+                if len(keys) < 2 or (
+                    max_bucket_size is not None and len(keys) > max_bucket_size
+                ):
+                    continue
+                for pair in combinations(sorted(keys), 2):
+                    if pair not in seen:
+                        seen.add(pair)
+                        yield pair
+
+    def query(self, signature: array) -> set[int]:
+        if not signature:
+            return set()
+        raw = signature.tobytes()
+        width = self.rows * signature.itemsize
+        matches: set[int] = set()
+        for band, bucket in enumerate(self._buckets):
+            matches.update(bucket.get(raw[band * width : (band + 1) * width], ()))
+        return matches
+
+
+def iter_user_profiles(
+    db: Session, role: str | None = None, batch_size: int = SIGNATURE_BATCH_SIZE
+) -> Iterator[list[tuple[int, str | None, str | None, str | None, str | None]]]:
+    """Page ``(user_id, full_name, phone, location, bio)`` rows by user id, loading only those columns."""
+    stmt = (
+        select(User.id, User.full_name, User.phone, User.location, User.bio)
+        .order_by(User.id)
+        .limit(batch_size)
+    )
+    if role:
+        stmt = stmt.where(User.role == role)
+    last_id = 0
+    while True:
+        rows = db.execute(stmt.where(User.id > last_id)).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def resume_paths_by_user(db: Session, user_ids: list[int]) -> dict[int, list[str]]:
+    paths: dict[int, list[str]] = defaultdict(list)
+    for user_id, resume_path in db.execute(
+        select(Application.candidate_id, Application.resume_path)
+        .where(
+            Application.candidate_id.in_(user_ids),
+            Application.resume_path.is_not(None),
+        )
+        .order_by(Application.candidate_id, Application.resume_path)
+    ):
+        paths[user_id].append(resume_path)
+    return paths
+
+
+def refresh_signatures(
+    db: Session,
+    role: str | None = "candidate",
+    num_perm: int = DEFAULT_NUM_PERM,
+    min_shingles: int | None = None,
+    batch_size: int = SIGNATURE_BATCH_SIZE,
+) -> dict[int, array]:
+    """Bring ``user_signatures`` up to date and return the indexable signatures by user id.
+
+    Users are paged ``batch_size`` at a time, together with their stored
+    signatures and resume paths, and only those whose profile hash changed are
+    re-shingled and re-hashed. Users with fewer than ``min_shingles`` shingles
+    are stored with an empty signature and left out. The caller owns the commit.
+    """
+    min_shingles = (
+        settings.duplicate_min_shingles if min_shingles is None else min_shingles
+    )
+    hasher = MinHasher(num_perm=num_perm)
+    signatures: dict[int, array] = {}
+    for profiles in iter_user_profiles(db, role=role, batch_size=batch_size):
+        user_ids = [profile[0] for profile in profiles]
+        stored = {
+            user_id: (digest, signature)
+            for user_id, digest, signature in db.execute(
+                select(
+                    UserSignature.user_id,
+                    UserSignature.profile_hash,
+                    UserSignature.signature,
+                ).where(UserSignature.user_id.in_(user_ids))
+            )
+        }
+        resume_paths = resume_paths_by_user(db, user_ids)
+        inserts: list[dict] = []
+        updates: list[dict] = []
+        for user_id, full_name, phone, location, bio in profiles:
+            paths = tuple(resume_paths.get(user_id, ()))
+            digest = profile_hash(num_perm, full_name, phone, location, bio, *paths)
+            previous = stored.get(user_id)
+            if previous is not None and previous[0] == digest:
+                raw = previous[1]
+            else:
+                shingles = user_shingles(
+                    full_name,
+                    phone,
+                    location,
+                    bio,
+                    filter(None, map(resume_digest, paths)),
+                )
+                raw = (
+                    hasher.signature(shingles).tobytes()
+                    if len(shingles) >= min_shingles
+                    else b""
+                )
+                row = {
+                    "user_id": user_id,
+                    "profile_hash": digest,
+                    "shingle_count": len(shingles),
+                    "signature": raw,
+                }
+                (inserts if previous is None else updates).append(row)
+            if raw:
+                signatures[user_id] = array("Q", raw)
+        if inserts:
+            db.execute(insert(UserSignature), inserts)
+        if updates:
+            db.execute(update(UserSignature), updates)
+    return signatures
+
+
+def score_pairs(
+    signatures: dict[int, array],
+    threshold: float = DEFAULT_THRESHOLD,
+    num_perm: int = DEFAULT_NUM_PERM,
+    bands: int = DEFAULT_BANDS,
+    max_bucket_size: int | None = None,
+) -> list[DuplicatePair]:
+    """Band ``signatures`` and return the candidate pairs at or above ``threshold``, most similar first."""
+    index = LSHIndex(num_perm=num_perm, bands=bands)
+    for user_id, signature in signatures.items():
+        index.add(user_id, signature)
+    pairs: list[DuplicatePair] = []
+    for left, right in index.candidate_pairs(max_bucket_size):
+        similarity = estimate_similarity(
+            index.signatures[left], index.signatures[right]
+        )
+        if similarity >= threshold:
+            pairs.append(
+                DuplicatePair(
+                    user_id=left, other_user_id=right, similarity=round(similarity, 4)
+                )
+            )
+    pairs.sort(key=lambda pair: (-pair.similarity, pair.user_id, pair.other_user_id))
+    return pairs
+
+
+def refresh_duplicate_pairs(
+    db: Session,
+    threshold: float | None = None,
+    role: str | None = "candidate",
+    num_perm: int = DEFAULT_NUM_PERM,
+    bands: int = DEFAULT_BANDS,
+    max_bucket_size: int | None = None,
+) -> int:
+    """Recompute changed signatures and replace the stored duplicate pairs; returns the pair count.
+
+    Runs under an advisory lock, so when every worker schedules it only one
+    does the work; the others return -1.
+    """
+    threshold = settings.duplicate_min_similarity if threshold is None else threshold
+    max_bucket_size = (
+        settings.duplicate_max_bucket_size
+        if max_bucket_size is None
+        else max_bucket_size
+    )
+    if not try_advisory_xact_lock(db, LOCK_NAME):
+        db.rollback()
+        return -1
+    signatures = refresh_signatures(db, role=role, num_perm=num_perm)
+    pairs = score_pairs(
+        signatures,
+        threshold=threshold,
+        num_perm=num_perm,
+        bands=bands,
+        max_bucket_size=max_bucket_size,
+    )
+    db.execute(delete(DuplicateUserPair))
+    if pairs:
+        db.execute(
+            insert(DuplicateUserPair),
+            [
+                {
+                    "user_id": pair.user_id,
+                    "other_user_id": pair.other_user_id,
+                    "similarity": pair.similarity,
+                }
+                for pair in pairs
+            ],
+        )
+    db.commit()
+    return len(pairs)
+
+
+def stored_duplicate_pairs(
+    db: Session, threshold: float = DEFAULT_THRESHOLD, limit: int | None = None
+) -> list[DuplicatePair]:
+    """Pairs from the last ``refresh_duplicate_pairs`` run at or above ``threshold``, most similar first."""
+    stmt = (
+        select(
+            DuplicateUserPair.user_id,
+            DuplicateUserPair.other_user_id,
+            DuplicateUserPair.similarity,
+        )
+        .where(DuplicateUserPair.similarity >= threshold)
+        .order_by(
+            DuplicateUserPair.similarity.desc(),
+            DuplicateUserPair.user_id,
+            DuplicateUserPair.other_user_id,
+        )
+        .limit(limit)
+    )
+    return [
+        DuplicatePair(
+            user_id=user_id, other_user_id=other_user_id, similarity=similarity
+        )
+        for user_id, other_user_id, similarity in db.execute(stmt)
+    ]
+
+
+def main(argv: list[str] | None = None) -> None:
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(
+        description="Refresh and report likely duplicate users."
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="minimum similarity to report",
+    )
+    parser.add_argument(
+        "--role", default="candidate", help="restrict to a role; pass '' for all users"
+    )
+    parser.add_argument("--num-perm", type=int, default=DEFAULT_NUM_PERM)
+    parser.add_argument("--bands", type=int, default=DEFAULT_BANDS)
+    parser.add_argument("--max-bucket-size", type=int, default=None)
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        refresh_duplicate_pairs(
+            db,
+            role=args.role or None,
+            num_perm=args.num_perm,
+            bands=args.bands,
+            max_bucket_size=args.max_bucket_size,
+        )
+        pairs = stored_duplicate_pairs(db, threshold=args.threshold, limit=args.limit)
+    finally:
+        db.close()
+    print("user_id,other_user_id,similarity")
+    for pair in pairs:
+        print(f"{pair.user_id},{pair.other_user_id},{pair.similarity:.4f}")
+
+
+if __name__ == "__main__":
+    main()
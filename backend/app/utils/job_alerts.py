@@ -0,0 +1,267 @@
+"""Percolator-style matching of new jobs against candidates' saved searches.
+
+Instead of running every saved search against each new job, each search is
+indexed once under a single anchor term in ``saved_search_terms``: its longest
+keyword, else its department, else a location word, else the catch-all ``*``.
+A search can only match a job containing its anchor, so percolating a job is
+an indexed ``term IN (...)`` lookup over the job's own distinct terms, at most
+``MAX_TERMS_PER_QUERY`` per statement, followed by an exact check of the few
+candidates it returns.
+
+Matches are queued in ``job_alert_matches`` and handed to a ``Notifier`` as
+one digest per candidate by ``deliver_digests``, run periodically by a
+``PeriodicWorker`` or once via ``python -m app.utils.job_alerts``. Each
+candidate's matches are locked with ``SKIP LOCKED`` and marked delivered in
+their own commit, so concurrent workers split the queue and a failed send
+only leaves that candidate's matches pending.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+from abc import ABC, abstractmethod
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.clock import utcnow
+from app.core.config import settings
+from app.models.job import Job
+from app.models.saved_search import JobAlertMatch, SavedSearch, SavedSearchTerm
+from app.models.user import User
+from app.utils.dedup import normalize_text
+
+logger = logging.getLogger(__name__)
+
+MATCH_ALL = "*"
+# Bounds the IN list for jobs with long descriptions
+MAX_TERMS_PER_QUERY = 500
+# The width of saved_search_terms.term; longer job words can't be an anchor
+MAX_TERM_LENGTH = 255
+
+
+def keyword_terms(text: str | None) -> set[str]:
+    return {f"k:{word}" for word in normalize_text(text).split()}
+
+
+def location_terms(text: str | None) -> set[str]:
+    return {f"l:{word}" for word in normalize_text(text).split()}
+
+
+def department_term(text: str | None) -> str | None:
+    normalized = normalize_text(text)
+    return f"d:{normalized}" if normalized else None
+
+
+def anchor_term(search: SavedSearch) -> str:
+    keywords = keyword_terms(search.keywords)
+    if keywords:
+        return max(keywords, key=lambda term: (len(term), term))
+    department = department_term(search.department)
+    if department:
+        return department
+    locations = location_terms(search.location)
+    if locations:
+        return max(locations, key=lambda term: (len(term), term))
+    return MATCH_ALL
+
+
+def job_terms(job: Job) -> set[str]:
+    terms = keyword_terms(
+        " ".join(
+            filter(None, [job.title, job.description, job.requirements, job.company])
+        )
+    )
+    terms |= location_terms(job.location)
+    department = department_term(job.department)
+    if department:
+        terms.add(department)
+    terms.add(MATCH_ALL)
+    return terms
+
+
+def search_matches(search, job: Job, terms: set[str]) -> bool:
+    """Whether ``search`` (a ``SavedSearch`` or a row with its columns) matches ``job``."""
+    if not keyword_terms(search.keywords) <= terms:
+        return False
+    if not location_terms(search.location) <= terms:
+        return False
+    department = department_term(search.department)
+    if department and department not in terms:
+        return False
+    if search.min_salary is not None:
+        top = job.max_salary if job.max_salary is not None else job.min_salary
+        if top is not None and float(top) < float(search.min_salary):
+            return False
+    return True
+
+
+def index_saved_search(db: Session, search: SavedSearch) -> None:
+    """(Re)write the anchor term for ``search``; the caller owns the commit."""
+    db.query(SavedSearchTerm).filter(
+        SavedSearchTerm.saved_search_id == search.id
+    ).delete(synchronize_session=False)
+    db.add(SavedSearchTerm(term=anchor_term(search), saved_search_id=search.id))
+
+
+def percolate_job(db: Session, job: Job) -> int:
+    """Queue a match for every saved search the open ``job`` satisfies; returns the count queued."""
+    if job.status != "open":
+        return 0
+    terms = job_terms(job)
+    anchors = sorted(term for term in terms if len(term) <= MAX_TERM_LENGTH)
+    candidates = {}
+    for start in range(0, len(anchors), MAX_TERMS_PER_QUERY):
+        for search in db.execute(
+            select(
+                SavedSearch.id,
+                SavedSearch.user_id,
+                SavedSearch.keywords,
+                SavedSearch.location,
+                SavedSearch.department,
+                SavedSearch.min_salary,
+            )
+            .join(SavedSearchTerm, SavedSearchTerm.saved_search_id == SavedSearch.id)
+            .where(
+                SavedSearchTerm.term.in_(anchors[start : start + MAX_TERMS_PER_QUERY])
+            )
+        ):
+            candidates[search.id] = search
+    already = set(
+        db.scalars(
+            select(JobAlertMatch.saved_search_id).where(JobAlertMatch.job_id == job.id)
+        )
+    )
+    queued = 0
+    for search in candidates.values():
+        if search.id in already or not search_matches(search, job, terms):
+            continue
+        db.add(
+            JobAlertMatch(
+                saved_search_id=search.id, user_id=search.user_id, job_id=job.id
+            )
+        )
+        queued += 1
+    return queued
+
+
+class Notifier(ABC):
+    """Delivers one digest of new jobs to a candidate."""
+
+    @abstractmethod
+    def send_digest(self, user: User, jobs: list[Job]) -> None: ...
+
+
+class LogNotifier(Notifier):
+    """Local stand-in that logs digests instead of sending them."""
+
+    def send_digest(self, user: User, jobs: list[Job]) -> None:
+        logger.info(
+            "Job alert digest for %s: %s",
+            user.email,
+            ", ".join(job.title for job in jobs),
+        )
+
+
+def build_notifier() -> Notifier:
+    if settings.job_alert_notifier == "log":
+        return LogNotifier()
+    raise ValueError(f"Unknown job alert notifier {settings.job_alert_notifier!r}")
+
+
+default_notifier = build_notifier()
+
+
+def deliver_user_digest(db: Session, user_id: int, notifier: Notifier) -> bool:
+    """Send ``user_id`` their pending matches and mark them delivered; returns whether a digest went out.
+
+    The matches are locked with ``SKIP LOCKED``, so if another worker is
+    already delivering them this returns without doing anything.
+    """
+    matches = db.execute(
+        select(JobAlertMatch.id, JobAlertMatch.job_id)
+        .where(JobAlertMatch.user_id == user_id, JobAlertMatch.delivered_at.is_(None))
+        .order_by(JobAlertMatch.id)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not matches:
+        db.rollback()
+        return False
+    job_ids = {job_id for _, job_id in matches}
+    open_jobs = list(
+        db.scalars(
+            select(Job)
+            .where(Job.id.in_(job_ids), Job.status == "open")
+            .order_by(Job.id)
+        )
+    )
+    user = db.get(User, user_id)
+    sent = bool(open_jobs) and user is not None
+    if sent:
+        notifier.send_digest(user, open_jobs)
+    db.execute(
+        update(JobAlertMatch)
+        .where(JobAlertMatch.id.in_([match_id for match_id, _ in matches]))
+        .values(delivered_at=utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return sent
+
+
+def deliver_digests(
+    db: Session, notifier: Notifier | None = None, batch_size: int = 1000
+) -> int:
+    """Send one digest per candidate with undelivered matches; returns digests sent.
+
+    A candidate whose digest fails to send is logged and skipped; their
+    matches stay pending for the next run.
+    """
+    notifier = notifier or default_notifier
+    sent = 0
+    last_user_id = 0
+    while True:
+        user_ids = list(
+            db.scalars(
+                select(JobAlertMatch.user_id)
+                .where(
+                    JobAlertMatch.delivered_at.is_(None),
+                    JobAlertMatch.user_id > last_user_id,
+                )
+                .group_by(JobAlertMatch.user_id)
+                .order_by(JobAlertMatch.user_id)
+                .limit(batch_size)
+            )
+        )
+        db.rollback()
+        if not user_ids:
+            return sent
+        for user_id in user_ids:
+            try:
+                sent += deliver_user_digest(db, user_id, notifier)
+            except Exception:
+                db.rollback()
+                logger.exception("Job alert digest for user %s failed", user_id)
+        last_user_id = user_ids[-1]
+
+
+def main(argv: list[str] | None = None) -> None:
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(
+        description="Deliver pending job alert digests once."
+    )
+    parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        sent = deliver_digests(db)
+    finally:
+        db.close()
+    print(f"Sent {sent} job alert digests")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Client for the external resume parsing service.
+
+``httpx`` is imported on first use rather than at module import so workers that
+never parse a resume don't pay for it at boot, and a single ``AsyncClient`` is
+reused across requests instead of opening a connection pool per upload.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi import HTTPException, UploadFile
+
+from app.core.config import settings
+
+_client = None
+
+
+def get_client():
+    global _client
+    if _client is None:
+        import httpx
+
+        _client = httpx.AsyncClient(timeout=15.0)
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def parse_resume(resume: UploadFile) -> Any:
+    if not settings.resume_parser_url or not settings.resume_parser_api_key:
+        raise HTTPException(
+            status_code=503, detail="Resume parsing service not configured"
+        )
+
+    import httpx
+
+    files = {
+        "resume": (
+            resume.filename or "resume",
+            await resume.read(),
+            resume.content_type or "application/octet-stream",
+        ),
+    }
+    headers = {"Authorization": f"Bearer {settings.resume_parser_api_key}"}
+    try:
+        response = await get_client().post(
+            settings.resume_parser_url, headers=headers, files=files
+        )
+        if response.status_code >= 400:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=response.text or "Resume parsing failed",
+            )
+        return response.json()
+    except httpx.TimeoutException as exc:
+        raise HTTPException(
+            status_code=504, detail="Resume parsing service timed out"
+        ) from exc
+    except httpx.HTTPError as exc:
+        raise HTTPException(
+            status_code=502, detail="Resume parsing service unavailable"
+        ) from exc
@@ -0,0 +1,197 @@
+"""Diff-based reconciliation of a job's pipeline stages.
+
+``plan_stage_changes`` compares the current stages with the desired ordered
+list and works out which rows to insert, rename/reorder and remove, and where
+applicants on removed stages should go. Targets are positions in the new list,
+so applicants can land on a stage that is being added in the same edit.
+``apply_stage_plan`` then applies it with a fixed number of bulk statements
+regardless of how many applicants the job has, so surviving stages keep their
+ids and nobody silently loses their stage.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.clock import utcnow
+from app.models.application import Application
+from app.models.application_stage_event import ApplicationStageEvent
+from app.models.job import Job
+from app.models.job_stage import JobStage
+
+
+@dataclass
+class StagePlan:
+    inserts: list[tuple[str, int]] = field(default_factory=list)
+    updates: dict[int, tuple[str, int]] = field(default_factory=dict)
+    # Removed stage id -> position (in the new list) its applicants move to
+    removals: dict[int, int] = field(default_factory=dict)
+    # Position -> id of the existing stages that survive
+    kept: dict[int, int] = field(default_factory=dict)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.inserts or self.updates or self.removals)
+
+
+def edits_from_names(
+    existing: list[JobStage], names: list[str]
+) -> list[tuple[int | None, str]]:
+    """Match names to existing stages so an unchanged name keeps its stage id."""
+    available: dict[str, list[int]] = {}
+    for stage in sorted(existing, key=lambda s: s.position):
+        available.setdefault(stage.name, []).append(stage.id)
+    return [
+        (available[name].pop(0) if available.get(name) else None, name)
+        for name in names
+    ]
+
+
+def plan_stage_changes(
+    existing: list[JobStage],
+    edits: list[tuple[int | None, str]],
+    remap: dict[int, int | str] | None = None,
+) -> StagePlan:
+    """Plan the changes turning ``existing`` into the ordered ``edits``.
+
+    ``edits`` is ``(stage_id, name)`` per desired stage, with ``None`` for new
+    stages. Applicants on a removed stage go to ``remap[stage_id]`` if given,
+    either the id of a surviving stage or the name of any stage in ``edits``
+    (new ones included); otherwise to the nearest surviving stage before it,
+    or the first stage of the new list. Raises ``ValueError`` for ids that
+    don't belong to the job and targets that aren't in the new list.
+    """
+    if not edits:
+        raise ValueError("A job needs at least one stage")
+    current = {stage.id: stage for stage in existing}
+    kept_ids = [stage_id for stage_id, _ in edits if stage_id is not None]
+    unknown = [stage_id for stage_id in kept_ids if stage_id not in current]
+    if unknown:
+        raise ValueError(f"Stages {unknown} do not belong to this job")
+    if len(kept_ids) != len(set(kept_ids)):
+        raise ValueError("A stage can only appear once")
+
+    plan = StagePlan()
+    positions_by_name: dict[str, int] = {}
+    for position, (stage_id, name) in enumerate(edits, start=1):
+        positions_by_name.setdefault(name, position)
+        if stage_id is None:
+            plan.inserts.append((name, position))
+            continue
+        plan.kept[position] = stage_id
+        if (current[stage_id].name, current[stage_id].position) != (name, position):
+            plan.updates[stage_id] = (name, position)
+
+    positions_by_id = {stage_id: position for position, stage_id in plan.kept.items()}
+    targets: dict[int, int] = {}
+    for stage_id, target in (remap or {}).items():
+        if stage_id in positions_by_id or stage_id not in current:
+            raise ValueError(f"Stage {stage_id} is not being removed")
+        position = (
+            positions_by_name.get(target)
+            if isinstance(target, str)
+            else positions_by_id.get(target)
+        )
+        if position is None:
+            raise ValueError(f"Stage {target!r} is not in the new stage list")
+        targets[stage_id] = position
+    previous_survivor = 1
+    for stage in sorted(existing, key=lambda s: s.position):
+        if stage.id in positions_by_id:
+            previous_survivor = positions_by_id[stage.id]
+            continue
+        plan.removals[stage.id] = targets.get(stage.id, previous_survivor)
+    return plan
+
+
+def apply_stage_plan(
+    db: Session, job: Job, plan: StagePlan, actor_id: int | None = None
+) -> None:
+    """Apply ``plan`` with bulk statements; the caller owns the commit."""
+    if plan.is_empty:
+        return
+    stage_ids = dict(plan.kept)
+    if plan.inserts:
+        inserted = db.execute(
+            insert(JobStage).returning(JobStage.id, JobStage.position),
+            [
+                {"job_id": job.id, "name": name, "position": position}
+                for name, position in plan.inserts
+            ],
+        )
+        stage_ids.update({position: stage_id for stage_id, position in inserted})
+    if plan.updates:
+        ids = list(plan.updates)
+        db.execute(
+            update(JobStage)
+            .where(JobStage.id.in_(ids))
+            .values(
+                name=case(
+                    {stage_id: name for stage_id, (name, _) in plan.updates.items()},
+                    value=JobStage.id,
+                ),
+                position=case(
+                    {
+                        stage_id: position
+                        for stage_id, (_, position) in plan.updates.items()
+                    },
+                    value=JobStage.id,
+                ),
+            )
+            .execution_options(synchronize_session=False)
+        )
+    if plan.removals:
+        removed = list(plan.removals)
+        targets = {
+            stage_id: stage_ids[position]
+            for stage_id, position in plan.removals.items()
+        }
+        now = utcnow()
+        last_event_at = (
+            select(func.max(ApplicationStageEvent.occurred_at))
+            .where(ApplicationStageEvent.application_id == Application.id)
+            .scalar_subquery()
+        )
+        moved = db.execute(
+            select(Application.id, Application.stage_id, last_event_at).where(
+                Application.job_id == job.id, Application.stage_id.in_(removed)
+            )
+        ).all()
+        if moved:
+            db.execute(
+                insert(ApplicationStageEvent),
+                [
+                    {
+                        "application_id": application_id,
+                        "job_id": job.id,
+                        "from_stage_id": stage_id,
+                        "to_stage_id": targets[stage_id],
+                        "actor_id": actor_id,
+                        "seconds_in_from_stage": (
+                            int((now - previous_at).total_seconds())
+                            if previous_at
+                            else None
+                        ),
+                        "occurred_at": now,
+                    }
+                    for application_id, stage_id, previous_at in moved
+                ],
+            )
+            db.execute(
+                update(Application)
+                .where(Application.job_id == job.id, Application.stage_id.in_(removed))
+                .values(
+                    stage_id=case(targets, value=Application.stage_id),
+                    updated_at=now,
+                )
+                .execution_options(synchronize_session=False)
+            )
+        db.execute(
+            delete(JobStage)
+            .where(JobStage.id.in_(removed))
+            .execution_options(synchronize_session=False)
+        )
+    db.expire(job, ["stages"])
@@ -0,0 +1,114 @@
+"""Import-time profiling and budget check for application startup.
+
+    python -m app.utils.startup --profile-startup      # slowest modules
+    python -m app.utils.startup --check-budget         # exit 1 if over budget
+
+Both run ``import app.main`` in a fresh interpreter with ``-X importtime`` so
+the numbers reflect a cold worker rather than whatever this process already
+has loaded.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[2]
+
+
+@dataclass(frozen=True)
+class ImportTiming:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def profile_imports(module: str = "app.main") -> list[ImportTiming]:
+    """Import ``module`` in a subprocess and return its ``-X importtime`` records."""
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(
+            filter(None, [str(BACKEND_ROOT), os.environ.get("PYTHONPATH")])
+        ),
+    }
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+    timings: list[ImportTiming] = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        stripped = name.lstrip()
+        timings.append(
+            ImportTiming(
+                module=stripped,
+                self_us=int(self_us),
+                cumulative_us=int(cumulative_us),
+                depth=(len(name) - len(stripped) - 1) // 2,
+            )
+        )
+    return timings
+
+
+def total_import_ms(timings: list[ImportTiming], module: str = "app.main") -> float:
+    for timing in reversed(timings):
+        if timing.module == module:
+            return timing.cumulative_us / 1000
+    return sum(timing.self_us for timing in timings) / 1000
+
+
+def format_report(timings: list[ImportTiming], top: int) -> str:
+    lines = [f"{'cumulative ms':>14} {'self ms':>9}  module"]
+    for timing in sorted(timings, key=lambda t: t.cumulative_us, reverse=True)[:top]:
+        lines.append(
+            f"{timing.cumulative_us / 1000:14.1f} {timing.self_us / 1000:9.1f}  {timing.module}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    from app.core.config import settings
+
+    parser = argparse.ArgumentParser(description="Profile application import time.")
+    parser.add_argument(
+        "--profile-startup", action="store_true", help="print the slowest imports"
+    )
+    parser.add_argument(
+        "--check-budget",
+        action="store_true",
+        help="fail when the import exceeds the budget",
+    )
+    parser.add_argument("--budget-ms", type=float, default=settings.import_budget_ms)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    timings = profile_imports(args.module)
+    total_ms = total_import_ms(timings, args.module)
+    if args.profile_startup or not args.check_budget:
+        print(format_report(timings, args.top))
+    print(f"import {args.module}: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    if args.check_budget and total_ms > args.budget_ms:
+        print(
+            f"Import budget exceeded by {total_ms - args.budget_ms:.1f} ms",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
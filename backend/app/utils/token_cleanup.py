@@ -0,0 +1,67 @@
+"""Purge refresh tokens that can no longer be used or reused.
+
+Rotated tokens are kept while their family is live, since presenting one
+again is how ``rotate_refresh_token`` detects a stolen token and revokes
+the family. Once every token in a family is revoked or expired, no token in
+it can do anything but fail, so the whole family is deleted, in batches.
+
+    python -m app.utils.token_cleanup
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.clock import utcnow
+from app.models.refresh_token import RefreshToken
+
+
+def purge_refresh_tokens(db: Session, batch_size: int = 1000) -> int:
+    """Delete the tokens of dead families; returns the number of rows deleted."""
+    purged = 0
+    while True:
+        now = utcnow()
+        live_families = select(RefreshToken.family_id).where(
+            RefreshToken.revoked_at.is_(None), RefreshToken.expires_at > now
+        )
+        batch = (
+            select(RefreshToken.id)
+            .where(RefreshToken.family_id.not_in(live_families))
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        deleted = db.execute(
+            delete(RefreshToken)
+            .where(RefreshToken.id.in_(batch))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        purged += deleted
+        if deleted < batch_size:
+            return purged
+
+
+def main(argv: list[str] | None = None) -> None:
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(
+        description="Delete refresh tokens of revoked or expired families."
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        purged = purge_refresh_tokens(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"Purged {purged} refresh tokens")
+
+
+if __name__ == "__main__":
+    main()
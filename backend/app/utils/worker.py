@@ -0,0 +1,47 @@
+"""Background thread that runs a database task on a fixed interval."""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections.abc import Callable
+
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicWorker:
+    """Daemon thread that calls ``task(session)`` every ``interval`` seconds."""
+
+    def __init__(
+        self,
+        name: str,
+        session_factory: Callable[[], Session],
+        interval: float,
+        task: Callable[[Session], object],
+    ) -> None:
+        self.name = name
+        self._session_factory = session_factory
+        self._interval = interval
+        self._task = task
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            db = self._session_factory()
+            try:
+                self._task(db)
+            except Exception:
+                db.rollback()
+                logger.exception("%s failed", self.name)
+            finally:
+                db.close()
@@ -0,0 +1,122 @@
+"""Per-object cost of the job listing serializers.
+
+Compares the previous path (load ORM objects, build ``JobRead`` field by field,
+let FastAPI validate it against ``response_model`` and encode it) with the row
+tuple path in ``app.api.v1.serializers``. Runs against an in-memory SQLite
+database so no services are needed:
+
+    cd backend && python -m benchmarks.serializers --rows 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+from app import models
+from app.api.v1.serializers import FastJSONResponse, job_payloads
+from app.core.clock import utcnow
+from app.db.testing import create_test_engine
+from app.schemas.job import JobRead, JobStageRead
+
+
+def seed(db: Session, rows: int) -> None:
+    recruiter = models.User(
+        email="bench@example.com", hashed_password="x", role="recruiter"
+    )
+    db.add(recruiter)
+    db.flush()
+    now = utcnow()
+    jobs = [
+        models.Job(
+            title=f"Engineer {index}",
+            company="Acme",
+            location="Remote",
+            department="Engineering",
+            description="Build things. " * 40,
+            requirements="Python, SQL",
+            min_salary=100000,
+            max_salary=150000,
+            created_by_id=recruiter.id,
+            created_at=now,
+        )
+        for index in range(rows)
+    ]
+    db.add_all(jobs)
+    db.flush()
+    db.add_all(
+        models.JobStage(job_id=job.id, name=name, position=position)
+        for job in jobs
+        for position, name in enumerate(
+            ["Applied", "Screening", "Interview", "Offer", "Hired"], start=1
+        )
+    )
+    db.commit()
+
+
+def legacy_listing(db: Session) -> bytes:
+    adapter = TypeAdapter(list[JobRead])
+    jobs = (
+        db.query(models.Job)
+        .filter(models.Job.status == "open")
+        .order_by(models.Job.created_at.desc())
+        .all()
+    )
+    result = [
+        JobRead(
+            id=job.id,
+            title=job.title,
+            company=job.company,
+            location=job.location,
+            department=job.department,
+            employment_type=job.employment_type,
+            status=job.status,
+            description=job.description,
+            requirements=job.requirements,
+            min_salary=float(job.min_salary) if job.min_salary is not None else None,
+            max_salary=float(job.max_salary) if job.max_salary is not None else None,
+            created_at=job.created_at,
+            stages=[JobStageRead.model_validate(stage) for stage in job.stages],
+            applications_count=len(job.applications),
+        )
+        for job in jobs
+    ]
+    validated = adapter.validate_python(jsonable_encoder(result))
+    return adapter.dump_json(validated)
+
+
+def fast_listing(db: Session) -> bytes:
+    return FastJSONResponse(job_payloads(db, models.Job.status == "open")).body
+
+
+def measure(label: str, func, db: Session, rows: int, repeat: int) -> None:
+    best = float("inf")
+    for _ in range(repeat):
+        db.expunge_all()
+        started = time.perf_counter()
+        body = func(db)
+        best = min(best, time.perf_counter() - started)
+    print(
+        f"{label:<8} {best * 1000:9.1f} ms total {best / rows * 1e6:8.1f} us/object {len(body) / 1024:9.0f} KiB"
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    engine = create_test_engine()
+    with Session(engine) as db:
+        seed(db, args.rows)
+        measure("legacy", legacy_listing, db, args.rows, args.repeat)
+        measure("fast", fast_listing, db, args.rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
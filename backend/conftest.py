@@ -0,0 +1 @@
+pytest_plugins = ["app.db.testing"]
@@ -0,0 +1,125 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.core.clock import utcnow
+from app.models import Application, ApplicationStageEvent, Job, JobStage, User
+from app.models.stage_rollup import StageDailyRollup, StageRollup
+from app.utils.analytics import (
+    bucket_seconds,
+    duration_bucket,
+    histogram_percentile,
+    refresh_rollups,
+)
+
+
+@pytest.fixture
+def job(db_session):
+    recruiter = User(email="r@example.com", hashed_password="x", role="recruiter")
+    job = Job(
+        title="Engineer",
+        company="Acme",
+        location="Remote",
+        description="Build things",
+        creator=recruiter,
+    )
+    for position, name in enumerate(["Applied", "Interview"], start=1):
+        job.stages.append(JobStage(name=name, position=position))
+    db_session.add(job)
+    db_session.commit()
+    return job
+
+
+def move(db_session, job, email, seconds, occurred_at=None):
+    """Apply to the first stage and, ``seconds`` later, move to the second."""
+    applied, interview = job.stages
+    candidate = User(email=email, hashed_password="x", role="candidate")
+    application = Application(candidate=candidate, job=job, stage_id=interview.id)
+    occurred_at = occurred_at or utcnow()
+    db_session.add(application)
+    db_session.flush()
+    for from_stage, to_stage, at, duration in (
+        (None, applied, occurred_at - timedelta(seconds=seconds), None),
+        (applied, interview, occurred_at, seconds),
+    ):
+        db_session.add(
+            ApplicationStageEvent(
+                application_id=application.id,
+                job_id=job.id,
+                from_stage_id=from_stage.id if from_stage else None,
+                to_stage_id=to_stage.id,
+                seconds_in_from_stage=duration,
+                occurred_at=at,
+            )
+        )
+    db_session.commit()
+
+
+def total(db_session, stage):
+    db_session.expire_all()
+    return db_session.scalar(
+        select(StageRollup).where(StageRollup.stage_id == stage.id)
+    )
+
+
+def test_duration_buckets_stay_within_five_percent():
+    assert duration_bucket(0) == 0
+    assert bucket_seconds(0) == 0
+    for seconds in (1, 59, 3600, 86400 * 30):
+        estimate = bucket_seconds(duration_bucket(seconds))
+        assert abs(estimate - seconds) <= max(1, 0.05 * seconds)
+
+
+def test_histogram_percentile_uses_nearest_rank():
+    histogram = {str(duration_bucket(60)): 9, str(duration_bucket(3600)): 1}
+
+    assert histogram_percentile({}, 0.5) is None
+    assert histogram_percentile(histogram, 0.5) == bucket_seconds(duration_bucket(60))
+    assert histogram_percentile(histogram, 0.9) == bucket_seconds(duration_bucket(60))
+    assert histogram_percentile(histogram, 1.0) == bucket_seconds(duration_bucket(3600))
+
+
+def test_refresh_adds_only_new_events_to_existing_rows(db_session, job):
+    applied, interview = job.stages
+    move(db_session, job, "a@example.com", 60)
+
+    assert refresh_rollups(db_session) == 2
+    assert refresh_rollups(db_session) == 0
+    first = total(db_session, applied)
+    assert (first.entered, first.exited) == (1, 1)
+    assert first.duration_histogram == {str(duration_bucket(60)): 1}
+
+    move(db_session, job, "b@example.com", 60)
+    move(db_session, job, "c@example.com", 3600)
+
+    assert refresh_rollups(db_session, batch_size=1) == 4
+    row = total(db_session, applied)
+    assert row.id == first.id
+    assert (row.entered, row.exited) == (3, 3)
+    assert row.duration_histogram == {
+        str(duration_bucket(60)): 2,
+        str(duration_bucket(3600)): 1,
+    }
+    assert row.median_seconds == bucket_seconds(duration_bucket(60))
+    assert row.p90_seconds == bucket_seconds(duration_bucket(3600))
+    assert (
+        total(db_session, interview).entered,
+        total(db_session, interview).exited,
+    ) == (3, 0)
+
+
+def test_daily_rollups_split_by_event_day(db_session, job):
+    applied, _ = job.stages
+    today = utcnow()
+    move(db_session, job, "a@example.com", 60, today - timedelta(days=1))
+    move(db_session, job, "b@example.com", 60, today)
+
+    refresh_rollups(db_session)
+
+    days = db_session.execute(
+        select(StageDailyRollup.day, StageDailyRollup.exited)
+        .where(StageDailyRollup.stage_id == applied.id, StageDailyRollup.exited > 0)
+        .order_by(StageDailyRollup.day)
+    ).all()
+    assert days == [((today - timedelta(days=1)).date(), 1), (today.date(), 1)]
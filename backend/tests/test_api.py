@@ -0,0 +1,145 @@
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+
+from app.api.v1.routes import candidate as candidate_routes
+from app.api.v1.serializers import job_adapter
+from app.core.config import settings
+from app.models import Application, User
+
+API = settings.api_v1_prefix
+
+
+def auth_headers(client, email: str, role: str) -> dict[str, str]:
+    response = client.post(
+        f"{API}/auth/register",
+        json={"email": email, "password": "pw12345", "role": role},
+    )
+    assert response.status_code == 201, response.text
+    response = client.post(
+        f"{API}/auth/login", json={"email": email, "password": "pw12345"}
+    )
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_each_test_starts_from_an_empty_database(db_session):
+    assert db_session.scalar(select(func.count()).select_from(User)) == 0
+
+
+def test_commits_are_visible_inside_the_test(db_session):
+    db_session.add(User(email="a@example.com", hashed_password="x", role="candidate"))
+    db_session.commit()
+    assert db_session.scalar(select(User.email)) == "a@example.com"
+
+
+def test_register_and_fetch_current_user(client):
+    headers = auth_headers(client, "candidate@example.com", "candidate")
+    response = client.get(f"{API}/auth/me", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["email"] == "candidate@example.com"
+
+
+def create_job(client) -> dict:
+    recruiter = auth_headers(client, "recruiter@example.com", "recruiter")
+    response = client.post(
+        f"{API}/recruiter/jobs",
+        json={
+            "title": "Engineer",
+            "company": "Acme",
+            "location": "Remote",
+            "description": "Build things",
+        },
+        headers=recruiter,
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def test_retried_application_is_replayed(client, db_session):
+    job = create_job(client)
+    candidate = {
+        **auth_headers(client, "applicant@example.com", "candidate"),
+        "Idempotency-Key": uuid.uuid4().hex,
+    }
+
+    first = client.post(
+        f"{API}/candidate/applications", data={"job_id": job["id"]}, headers=candidate
+    )
+    retry = client.post(
+        f"{API}/candidate/applications", data={"job_id": job["id"]}, headers=candidate
+    )
+
+    assert first.status_code == 200, first.text
+    assert retry.headers.get("Idempotent-Replayed") == "true"
+    assert retry.json() == first.json()
+    assert db_session.scalar(select(func.count()).select_from(Application)) == 1
+
+
+def test_failed_upload_leaves_no_files(client, db_session, monkeypatch, tmp_path):
+    def copy_then_fail(source, target):
+        target.write(b"partial")
+        raise OSError("disk full")
+
+    monkeypatch.setattr(settings, "resume_upload_dir", str(tmp_path))
+    monkeypatch.setattr(candidate_routes.shutil, "copyfileobj", copy_then_fail)
+    job = create_job(client)
+    candidate = auth_headers(client, "applicant@example.com", "candidate")
+
+    with pytest.raises(OSError):
+        client.post(
+            f"{API}/candidate/applications",
+            data={"job_id": job["id"]},
+            files={"resume": ("cv.pdf", b"%PDF", "application/pdf")},
+            headers=candidate,
+        )
+
+    assert list(tmp_path.iterdir()) == []
+    assert db_session.scalar(select(func.count()).select_from(Application)) == 0
+
+
+@pytest.mark.parametrize("attempt", [1, 2])
+def test_idempotency_keys_do_not_leak_between_tests(client, attempt):
+    job = create_job(client)
+    candidate = {
+        **auth_headers(client, "applicant@example.com", "candidate"),
+        "Idempotency-Key": "apply-once",
+    }
+
+    response = client.post(
+        f"{API}/candidate/applications", data={"job_id": job["id"]}, headers=candidate
+    )
+
+    assert response.status_code == 200, response.text
+    assert "Idempotent-Replayed" not in response.headers
+
+
+def test_public_jobs_match_the_read_model_and_follow_edits(client):
+    assert client.get(f"{API}/jobs").json() == []
+    recruiter = auth_headers(client, "recruiter@example.com", "recruiter")
+    job = client.post(
+        f"{API}/recruiter/jobs",
+        json={
+            "title": "Engineer",
+            "company": "Acme",
+            "location": "Remote",
+            "description": "Build things",
+        },
+        headers=recruiter,
+    ).json()
+
+    listed = client.get(f"{API}/jobs").json()
+    assert [item["id"] for item in listed] == [job["id"]]
+    assert (
+        job_adapter.dump_python(job_adapter.validate_python(listed), mode="json")
+        == listed
+    )
+
+    response = client.patch(
+        f"{API}/recruiter/jobs/{job['id']}",
+        json={"title": "Staff Engineer"},
+        headers=recruiter,
+    )
+    assert response.status_code == 200, response.text
+    assert client.get(f"{API}/jobs/{job['id']}").json()["title"] == "Staff Engineer"
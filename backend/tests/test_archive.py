@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from app.core.clock import utcnow
+from app.core.config import settings
+from app.models import Application, Job, JobStage, User
+from app.utils import archive
+from app.utils.archive import (
+    archive_closed_jobs,
+    archived_applications_for_candidate,
+    archived_job_detail,
+    archived_jobs_for_recruiter,
+)
+
+
+@pytest.fixture
+def closed_job(db_session):
+    recruiter = User(email="r@example.com", hashed_password="x", role="recruiter")
+    candidate = User(email="c@example.com", hashed_password="x", role="candidate")
+    stage = JobStage(name="Applied", position=1)
+    job = Job(
+        title="Engineer",
+        company="Acme",
+        location="Remote",
+        description="Build things",
+        status="closed",
+        closed_at=utcnow() - timedelta(days=400),
+        creator=recruiter,
+        stages=[stage],
+    )
+    db_session.add(Application(candidate=candidate, job=job, stage=stage))
+    db_session.commit()
+    return job.id, recruiter.id, candidate.id
+
+
+@pytest.mark.parametrize("backend", ["table", "ndjson"])
+def test_archived_job_leaves_the_live_tables(
+    db_session, closed_job, backend, tmp_path, monkeypatch
+):
+    job_id, recruiter_id, candidate_id = closed_job
+    monkeypatch.setattr(settings, "archive_dir", str(tmp_path))
+
+    archived = archive_closed_jobs(db_session, older_than_days=365, backend=backend)
+
+    assert archived == 1
+    assert db_session.get(Job, job_id) is None
+    assert db_session.scalar(select(func.count()).select_from(Application)) == 0
+    detail = archived_job_detail(db_session, job_id, recruiter_id)
+    assert detail["job"]["title"] == "Engineer"
+    assert [a["candidate"]["id"] for a in detail["applications"]] == [candidate_id]
+    assert len(archived_applications_for_candidate(db_session, candidate_id)) == 1
+    if backend == "ndjson":
+        assert [path.suffixes for path in tmp_path.iterdir()] == [[".ndjson", ".gz"]]
+
+
+def test_recruiter_list_reads_summaries_only(db_session, closed_job, monkeypatch):
+    job_id, recruiter_id, _ = closed_job
+    archive_closed_jobs(db_session, older_than_days=365, backend="table")
+
+    def fail(*args, **kwargs):
+        raise AssertionError("document decompressed")
+
+    monkeypatch.setattr(archive, "load_archived_document", fail)
+    jobs = archived_jobs_for_recruiter(db_session, recruiter_id)
+
+    assert [(job["id"], job["title"], job["archived"]) for job in jobs] == [
+        (job_id, "Engineer", True)
+    ]
+    assert [stage["name"] for stage in jobs[0]["stages"]] == ["Applied"]
+
+
+def test_recent_jobs_stay_live(db_session, closed_job):
+    job_id, _, _ = closed_job
+
+    assert archive_closed_jobs(db_session, older_than_days=500, backend="table") == 0
+    assert db_session.get(Job, job_id) is not None
@@ -0,0 +1,72 @@
+import gzip
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+
+from app.core.compression import CompressionMiddleware, negotiate
+
+BIG = "x" * 2048
+
+
+def make_client(
+    body: str, media_type: str = "text/plain", headers: dict | None = None
+) -> TestClient:
+    async def endpoint(request):
+        return Response(body, media_type=media_type, headers=headers)
+
+    app = Starlette(routes=[Route("/", endpoint)])
+    return TestClient(CompressionMiddleware(app, minimum_size=1024))
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [
+        ("gzip", "gzip"),
+        ("gzip;q=0.5, identity", "gzip"),
+        ("gzip;q=0", None),
+        ("", None),
+    ],
+)
+def test_negotiate(header, expected):
+    assert negotiate(header) == expected
+
+
+def test_large_bodies_are_compressed():
+    response = make_client(BIG).get("/", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.text == BIG
+
+
+@pytest.mark.parametrize(
+    ("body", "accept_encoding"),
+    [("small", "gzip"), (BIG, "identity")],
+)
+def test_uncompressed_responses_still_vary(body, accept_encoding):
+    response = make_client(body).get("/", headers={"Accept-Encoding": accept_encoding})
+
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.text == body
+
+
+def test_existing_vary_is_not_repeated():
+    client = make_client(BIG, headers={"Vary": "Origin, Accept-Encoding"})
+
+    response = client.get("/", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["vary"] == "Origin, Accept-Encoding"
+
+
+def test_binary_responses_are_left_alone():
+    body = gzip.compress(BIG.encode())
+    response = make_client(body, "application/octet-stream").get(
+        "/", headers={"Accept-Encoding": "gzip"}
+    )
+
+    assert "content-encoding" not in response.headers
+    assert "vary" not in response.headers
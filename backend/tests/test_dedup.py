@@ -0,0 +1,115 @@
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models import Application, Job, User
+from app.models.duplicate import UserSignature
+from app.utils.dedup import (
+    LSHIndex,
+    MinHasher,
+    estimate_similarity,
+    refresh_duplicate_pairs,
+    refresh_signatures,
+    score_pairs,
+    stored_duplicate_pairs,
+    user_shingles,
+)
+
+JANE = ("Jane Doe", "+44 20 7946 0018", "London", "Backend engineer who likes Python")
+
+
+def test_similar_profiles_share_a_band_and_different_ones_do_not():
+    hasher = MinHasher()
+    index = LSHIndex()
+    index.add(1, hasher.signature(user_shingles(*JANE)))
+    index.add(2, hasher.signature(user_shingles("Doe Jane", *JANE[1:])))
+    index.add(3, hasher.signature(user_shingles("Bob Smith", "555 0100", "Paris", "")))
+
+    assert set(index.candidate_pairs()) == {(1, 2)}
+    assert index.query(index.signatures[1]) == {1, 2}
+
+
+def test_similarity_estimate_tracks_jaccard():
+    hasher = MinHasher(num_perm=256)
+    left = {f"s{i}" for i in range(100)}
+    right = {f"s{i}" for i in range(50, 150)}
+
+    estimate = estimate_similarity(hasher.signature(left), hasher.signature(right))
+
+    assert abs(estimate - 1 / 3) < 0.1
+
+
+def test_oversized_buckets_are_skipped():
+    hasher = MinHasher()
+    signature = hasher.signature(user_shingles(*JANE))
+    index = LSHIndex()
+    for key in range(4):
+        index.add(key, signature)
+
+    assert len(list(index.candidate_pairs())) == 6
+    assert list(index.candidate_pairs(max_bucket_size=3)) == []
+    assert score_pairs({1: signature, 2: signature})[0].similarity == 1.0
+
+
+def add_candidate(db_session, email, full_name, phone=None, location=None, bio=None):
+    user = User(
+        email=email,
+        hashed_password="x",
+        role="candidate",
+        full_name=full_name,
+        phone=phone,
+        location=location,
+        bio=bio,
+    )
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+def test_refresh_pages_users_and_reports_pairs(db_session):
+    users = [add_candidate(db_session, f"jane{i}@example.com", *JANE) for i in range(3)]
+    add_candidate(db_session, "bob@example.com", "Bob Smith", "555 0100", "Paris")
+
+    assert refresh_duplicate_pairs(db_session, threshold=0.9) == 3
+    assert {
+        (pair.user_id, pair.other_user_id)
+        for pair in stored_duplicate_pairs(db_session)
+    } == {
+        (users[0].id, users[1].id),
+        (users[0].id, users[2].id),
+        (users[1].id, users[2].id),
+    }
+
+    assert len(refresh_signatures(db_session, batch_size=1)) == 4
+    assert db_session.scalar(
+        select(UserSignature.shingle_count).where(UserSignature.user_id == users[0].id)
+    ) == len(user_shingles(*JANE))
+
+
+def test_identical_resumes_link_accounts(db_session, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "resume_upload_dir", str(tmp_path))
+    (tmp_path / "a.pdf").write_bytes(b"%PDF same cv")
+    (tmp_path / "b.pdf").write_bytes(b"%PDF same cv")
+    recruiter = User(email="r@example.com", hashed_password="x", role="recruiter")
+    job = Job(
+        title="Engineer",
+        company="Acme",
+        location="Remote",
+        description="Build things",
+        creator=recruiter,
+    )
+    first = add_candidate(db_session, "j.doe@example.com", "Jane Doe", location="Leeds")
+    second = add_candidate(db_session, "jd@example.com", "J Doe", location="Leeds")
+    for user, name in ((first, "a.pdf"), (second, "b.pdf")):
+        db_session.add(
+            Application(candidate=user, job=job, resume_path=f"/uploads/resumes/{name}")
+        )
+    db_session.commit()
+
+    signatures = refresh_signatures(db_session, min_shingles=1)
+    without_resumes = MinHasher()
+    baseline = estimate_similarity(
+        without_resumes.signature(user_shingles("Jane Doe", None, "Leeds", None)),
+        without_resumes.signature(user_shingles("J Doe", None, "Leeds", None)),
+    )
+
+    assert estimate_similarity(signatures[first.id], signatures[second.id]) > baseline
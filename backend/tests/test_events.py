@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from app.core import events
+from app.core.events import EventBroker
+
+
+class ConnectedRequest:
+    async def is_disconnected(self) -> bool:
+        return False
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    broker = EventBroker(replay_size=2, queue_size=8)
+    monkeypatch.setattr(events, "broker", broker)
+    return broker
+
+
+def collect(topics, last_event_id, count):
+    async def run():
+        frames = []
+        async for frame in events.stream_events(
+            ConnectedRequest(), topics, last_event_id
+        ):
+            frames.append(frame)
+            if len(frames) == count:
+                break
+        return frames
+
+    return asyncio.run(run())
+
+
+def test_resumes_after_last_event_id(broker):
+    for index in range(2):
+        broker.publish(["job:1"], "application.created", {"application_id": index})
+    first_id = broker.last_id - 1
+
+    frames = collect({"job:1"}, first_id, 2)
+
+    assert frames[1].startswith(f"id: {broker.last_id}\nevent: application.created")
+
+
+def test_reset_frame_carries_the_current_id(broker):
+    for index in range(3):
+        broker.publish(["job:1"], "application.created", {"application_id": index})
+
+    frames = collect({"job:1"}, 1, 2)
+
+    assert frames[1] == f"id: {broker.last_id}\nevent: reset\ndata: {{}}\n\n"
+
+
+def test_ids_increase(broker):
+    ids = [broker.next_id() for _ in range(3)]
+    assert ids == sorted(set(ids))
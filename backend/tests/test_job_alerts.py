@@ -0,0 +1,117 @@
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import select
+
+from app.models import Job, JobAlertMatch, SavedSearch, User
+from app.schemas.saved_search import SavedSearchCreate
+from app.utils import job_alerts
+from app.utils.job_alerts import (
+    Notifier,
+    deliver_digests,
+    index_saved_search,
+    percolate_job,
+)
+
+
+class RecordingNotifier(Notifier):
+    def __init__(self) -> None:
+        self.digests: list[tuple[str, list[str]]] = []
+
+    def send_digest(self, user, jobs) -> None:
+        self.digests.append((user.email, [job.title for job in jobs]))
+
+
+@pytest.fixture
+def candidate(db_session):
+    user = User(email="c@example.com", hashed_password="x", role="candidate")
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+def save_search(db_session, user, **criteria) -> SavedSearch:
+    search = SavedSearch(user_id=user.id, **criteria)
+    db_session.add(search)
+    db_session.flush()
+    index_saved_search(db_session, search)
+    db_session.commit()
+    return search
+
+
+def post_job(db_session, title, description="", **fields) -> Job:
+    job = Job(
+        title=title,
+        company="Acme",
+        location=fields.pop("location", "Remote"),
+        description=description,
+        **fields,
+    )
+    db_session.add(job)
+    db_session.flush()
+    percolate_job(db_session, job)
+    db_session.commit()
+    return job
+
+
+def matched_jobs(db_session, search) -> list[int]:
+    return list(
+        db_session.scalars(
+            select(JobAlertMatch.job_id).where(
+                JobAlertMatch.saved_search_id == search.id
+            )
+        )
+    )
+
+
+def test_saved_search_needs_a_criterion():
+    with pytest.raises(ValidationError):
+        SavedSearchCreate(keywords="  ")
+    assert SavedSearchCreate(min_salary=50000).min_salary == 50000
+
+
+def test_job_matches_every_criterion(db_session, candidate):
+    search = save_search(
+        db_session,
+        candidate,
+        keywords="Python engineer",
+        location="Berlin",
+        min_salary=60000,
+    )
+    match = post_job(
+        db_session, "Senior Python Engineer", location="Berlin", max_salary=80000
+    )
+    post_job(db_session, "Python Engineer", location="Paris", max_salary=80000)
+    post_job(db_session, "Python Engineer", location="Berlin", max_salary=50000)
+    post_job(db_session, "Go Engineer", location="Berlin", max_salary=80000)
+
+    assert matched_jobs(db_session, search) == [match.id]
+
+
+def test_anchor_is_found_in_long_descriptions(db_session, candidate, monkeypatch):
+    monkeypatch.setattr(job_alerts, "MAX_TERMS_PER_QUERY", 10)
+    search = save_search(db_session, candidate, keywords="kubernetes")
+    filler = " ".join(f"word{index}" for index in range(100))
+    job = post_job(db_session, "Platform Engineer", f"{filler} kubernetes")
+
+    assert matched_jobs(db_session, search) == [job.id]
+
+
+def test_percolating_twice_queues_one_match(db_session, candidate):
+    search = save_search(db_session, candidate, department="Engineering")
+    job = post_job(db_session, "Engineer", department="Engineering")
+
+    assert percolate_job(db_session, job) == 0
+    assert matched_jobs(db_session, search) == [job.id]
+
+
+def test_digest_is_sent_once_with_open_jobs_only(db_session, candidate):
+    save_search(db_session, candidate, keywords="python")
+    post_job(db_session, "Python Developer")
+    closed = post_job(db_session, "Python Tester")
+    closed.status = "closed"
+    db_session.commit()
+    notifier = RecordingNotifier()
+
+    assert deliver_digests(db_session, notifier) == 1
+    assert deliver_digests(db_session, notifier) == 0
+    assert notifier.digests == [("c@example.com", ["Python Developer"])]
@@ -0,0 +1,30 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from app.db.session import add_unique_index_if_not_exists
+
+
+@pytest.fixture
+def conn():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE pairs (a INTEGER, b INTEGER)"))
+        yield conn
+    engine.dispose()
+
+
+def test_unique_index_is_created(conn):
+    conn.execute(text("INSERT INTO pairs VALUES (1, 1), (1, 2)"))
+
+    assert add_unique_index_if_not_exists(conn, "uq_pairs", "pairs", ["a", "b"])
+    assert not add_unique_index_if_not_exists(conn, "uq_pairs", "pairs", ["a", "b"])
+    assert [index["name"] for index in inspect(conn).get_indexes("pairs")] == [
+        "uq_pairs"
+    ]
+
+
+def test_unique_index_refuses_duplicates(conn):
+    conn.execute(text("INSERT INTO pairs VALUES (1, 1), (1, 1)"))
+
+    with pytest.raises(RuntimeError, match="1 duplicate"):
+        add_unique_index_if_not_exists(conn, "uq_pairs", "pairs", ["a", "b"])
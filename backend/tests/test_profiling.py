@@ -0,0 +1,50 @@
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.core.config import settings
+from app.core.profiling import ProfilingMiddleware
+
+
+class RecordingStore:
+    def __init__(self) -> None:
+        self.saved = []
+
+    def save(self, summary: dict, document: dict) -> None:
+        self.saved.append(summary)
+
+
+class FailingStore:
+    def save(self, summary: dict, document: dict) -> None:
+        raise RuntimeError("database is down")
+
+
+def profiled_client(store) -> TestClient:
+    async def hello(request):
+        return PlainTextResponse("hello")
+
+    app = Starlette(routes=[Route("/hello", hello)])
+    return TestClient(ProfilingMiddleware(app, store=store))
+
+
+def test_sampled_request_is_stored(monkeypatch):
+    monkeypatch.setattr(settings, "profiling_sample_rate", 1.0)
+    store = RecordingStore()
+
+    response = profiled_client(store).get("/hello")
+
+    assert response.text == "hello"
+    assert [summary["id"] for summary in store.saved] == [
+        response.headers["X-Profile-Id"]
+    ]
+    assert store.saved[0]["status_code"] == 200
+
+
+def test_failed_save_still_sends_the_response(monkeypatch):
+    monkeypatch.setattr(settings, "profiling_sample_rate", 1.0)
+
+    response = profiled_client(FailingStore()).get("/hello")
+
+    assert response.status_code == 200
+    assert response.text == "hello"
@@ -0,0 +1,56 @@
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.core.config import settings
+from app.core.rate_limit import (
+    InMemoryBackend,
+    RateLimitMiddleware,
+    RouteLimit,
+    default_route_limits,
+)
+
+LOGIN = RouteLimit("login", "POST", "/login", rate=0.001, burst=2, concurrency=4)
+
+
+@pytest.fixture
+def limited(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+
+    async def ok(request):
+        return PlainTextResponse("ok")
+
+    app = Starlette(routes=[Route("/login", ok, methods=["POST"]), Route("/", ok)])
+    return TestClient(
+        RateLimitMiddleware(
+            app, backend=InMemoryBackend(), route_limits=(LOGIN,), prefix=""
+        )
+    )
+
+
+def test_route_bucket_rejects_past_the_burst(limited):
+    statuses = [limited.post("/login").status_code for _ in range(3)]
+
+    assert statuses == [200, 200, 429]
+    assert int(limited.post("/login").headers["Retry-After"]) >= 1
+    assert limited.get("/").status_code == 200
+
+
+def test_forwarded_for_is_ignored_unless_trusted(limited):
+    for _ in range(2):
+        limited.post("/login")
+
+    response = limited.post("/login", headers={"X-Forwarded-For": "203.0.113.9"})
+
+    assert response.status_code == 429
+
+
+def test_route_limits_come_from_settings(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_login_per_second", 2.0)
+    monkeypatch.setattr(settings, "rate_limit_login_burst", 7)
+
+    login = next(limit for limit in default_route_limits() if limit.name == "login")
+
+    assert (login.rate, login.burst) == (2.0, 7)
@@ -0,0 +1,97 @@
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select, update
+
+from app.core import security
+from app.core.clock import utcnow
+from app.core.config import settings
+from app.core.security import (
+    RevokedTokenCache,
+    issue_refresh_token,
+    rotate_refresh_token,
+)
+from app.models import RefreshToken, User
+from app.utils.token_cleanup import purge_refresh_tokens
+
+
+@pytest.fixture(autouse=True)
+def revoked_cache(monkeypatch):
+    monkeypatch.setattr(security, "revoked_tokens", RevokedTokenCache(100))
+
+
+@pytest.fixture
+def user(db_session):
+    user = User(email="u@example.com", hashed_password="x", role="candidate")
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+def login(db_session, user) -> str:
+    token, _ = issue_refresh_token(db_session, user)
+    db_session.commit()
+    return token
+
+
+def family_revoked(db_session) -> bool:
+    return all(db_session.scalars(select(RefreshToken.revoked_at)))
+
+
+def test_rotation_issues_a_new_token_in_the_family(db_session, user):
+    token = login(db_session, user)
+
+    rotated_user, new_token = rotate_refresh_token(db_session, token)
+
+    assert rotated_user.id == user.id
+    assert new_token != token
+    assert rotate_refresh_token(db_session, new_token)[0].id == user.id
+
+
+def test_reuse_within_the_grace_window_is_a_concurrent_refresh(
+    db_session, user, monkeypatch
+):
+    monkeypatch.setattr(settings, "refresh_token_reuse_grace_seconds", 60)
+    token = login(db_session, user)
+
+    _, first = rotate_refresh_token(db_session, token)
+    _, second = rotate_refresh_token(db_session, token)
+
+    assert first != second
+    assert not family_revoked(db_session)
+    rotate_refresh_token(db_session, first)
+
+
+@pytest.mark.parametrize("other_worker", [False, True])
+def test_reuse_after_the_grace_window_revokes_the_family(
+    db_session, user, monkeypatch, other_worker
+):
+    monkeypatch.setattr(settings, "refresh_token_reuse_grace_seconds", 0)
+    token = login(db_session, user)
+    _, new_token = rotate_refresh_token(db_session, token)
+    if other_worker:
+        # Nothing in this process's cache: detected from the database alone
+        monkeypatch.setattr(security, "revoked_tokens", RevokedTokenCache(100))
+
+    with pytest.raises(HTTPException):
+        rotate_refresh_token(db_session, token)
+
+    assert family_revoked(db_session)
+    with pytest.raises(HTTPException):
+        rotate_refresh_token(db_session, new_token)
+
+
+def test_purge_keeps_live_families_and_drops_dead_ones(db_session, user):
+    live = login(db_session, user)
+    rotate_refresh_token(db_session, live)
+    expired = login(db_session, user)
+    db_session.execute(
+        update(RefreshToken)
+        .where(RefreshToken.token_hash == security.hash_refresh_token(expired))
+        .values(expires_at=utcnow() - timedelta(minutes=1))
+    )
+    db_session.commit()
+
+    assert purge_refresh_tokens(db_session, batch_size=1) == 1
+    assert len(db_session.scalars(select(RefreshToken)).all()) == 2
@@ -0,0 +1,97 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.core.config import settings
+from app.db import routing, session
+from app.db.routing import (
+    STICKY_COOKIE,
+    ReadYourWritesMiddleware,
+    ReplicaRouter,
+    wants_primary,
+)
+
+
+def request(method: str = "GET", headers: dict[str, str] | None = None) -> Request:
+    raw = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": method, "headers": raw})
+
+
+@pytest.fixture
+def replicas(monkeypatch):
+    monkeypatch.setattr(settings, "database_replica_urls", ["sqlite://"])
+
+
+def test_reads_may_use_a_replica_and_writes_may_not():
+    assert not wants_primary(request("GET"))
+    assert wants_primary(request("POST"))
+    assert wants_primary(None)
+
+
+def test_sticky_cookie_keeps_reads_on_the_primary_until_it_expires():
+    fresh = f"{STICKY_COOKIE}={time.time() + 5:.0f}"
+    stale = f"{STICKY_COOKIE}={time.time() - 5:.0f}"
+
+    assert wants_primary(request(headers={"Cookie": fresh}))
+    assert not wants_primary(request(headers={"Cookie": stale}))
+    assert not wants_primary(request(headers={"Cookie": f"{STICKY_COOKIE}=junk"}))
+
+
+def test_successful_write_marks_the_caller_sticky(replicas):
+    async def write(request):
+        return PlainTextResponse("ok", status_code=int(request.query_params["status"]))
+
+    client = TestClient(
+        ReadYourWritesMiddleware(
+            Starlette(routes=[Route("/", write, methods=["POST"])])
+        )
+    )
+    token = {"Authorization": "Bearer sticky-test"}
+
+    rejected = client.post("/?status=400", headers=token)
+    assert STICKY_COOKIE not in rejected.cookies
+    assert not wants_primary(request(headers=token))
+
+    accepted = client.post("/?status=201", headers=token)
+    until = float(accepted.cookies[STICKY_COOKIE])
+    assert time.time() < until <= time.time() + settings.read_your_writes_seconds + 1
+    assert wants_primary(request(headers=token))
+
+
+def test_router_round_robins_and_skips_unhealthy_replicas(tmp_path):
+    up = create_engine("sqlite://")
+    down = create_engine(f"sqlite:///{tmp_path}/missing/replica.db")
+    router = ReplicaRouter([up, down], check_interval=60)
+
+    assert {router.pick(), router.pick()} == {up, down}
+    router.check()
+    assert [router.pick() for _ in range(3)] == [up, up, up]
+
+
+def test_lagging_replica_is_marked_down_until_it_catches_up(monkeypatch):
+    lag = 30.0
+    monkeypatch.setattr(routing, "replication_lag", lambda conn: lag)
+    replica = create_engine("sqlite://")
+    router = ReplicaRouter([replica], check_interval=60, max_lag=5)
+
+    router.check()
+    assert router.pick() is None
+
+    lag = 1.0
+    router.check()
+    assert router.pick() is replica
+
+
+def test_get_db_falls_back_to_the_primary(monkeypatch):
+    monkeypatch.setattr(session, "replica_router", ReplicaRouter([], 60))
+
+    db = next(session.get_db(request("GET")))
+
+    assert db.get_bind() is session.engine
+    db.close()
@@ -0,0 +1,126 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.core.clock import utcnow
+from app.models import Application, ApplicationStageEvent, Job, JobStage, User
+from app.utils.stages import apply_stage_plan, edits_from_names, plan_stage_changes
+
+
+@pytest.fixture
+def job(db_session):
+    recruiter = User(email="r@example.com", hashed_password="x", role="recruiter")
+    job = Job(
+        title="Engineer",
+        company="Acme",
+        location="Remote",
+        description="Build things",
+        creator=recruiter,
+    )
+    for position, name in enumerate(["Applied", "Screening", "Interview"], start=1):
+        job.stages.append(JobStage(name=name, position=position))
+    db_session.add(job)
+    db_session.commit()
+    return job
+
+
+def stage_id(job, name):
+    return next(stage.id for stage in job.stages if stage.name == name)
+
+
+def apply_to(db_session, job, stage_name, email):
+    candidate = User(email=email, hashed_password="x", role="candidate")
+    application = Application(
+        candidate=candidate, job=job, stage_id=stage_id(job, stage_name)
+    )
+    db_session.add(application)
+    db_session.flush()
+    db_session.add(
+        ApplicationStageEvent(
+            application_id=application.id,
+            job_id=job.id,
+            to_stage_id=application.stage_id,
+            occurred_at=utcnow() - timedelta(hours=1),
+        )
+    )
+    db_session.commit()
+    return application
+
+
+def replan(db_session, job, edits, remap=None):
+    plan = plan_stage_changes(job.stages, edits, remap)
+    apply_stage_plan(db_session, job, plan)
+    db_session.commit()
+    db_session.expire_all()
+
+
+def stage_name_of(db_session, application):
+    return db_session.scalar(
+        select(JobStage.name)
+        .join(Application, Application.stage_id == JobStage.id)
+        .where(Application.id == application.id)
+    )
+
+
+def test_renames_keep_stage_ids(db_session, job):
+    screening = stage_id(job, "Screening")
+    replan(db_session, job, [(None, "Applied"), (screening, "Phone screen")])
+
+    assert [(s.name, s.position) for s in job.stages] == [
+        ("Applied", 1),
+        ("Phone screen", 2),
+    ]
+    assert stage_id(job, "Phone screen") == screening
+
+
+def test_removed_stage_falls_back_to_previous_survivor(db_session, job):
+    application = apply_to(db_session, job, "Interview", "c@example.com")
+    edits = edits_from_names(job.stages, ["Applied", "Screening"])
+    replan(db_session, job, edits)
+
+    assert stage_name_of(db_session, application) == "Screening"
+
+
+def test_remap_can_target_a_new_stage(db_session, job):
+    application = apply_to(db_session, job, "Interview", "c@example.com")
+    edits = edits_from_names(job.stages, ["Applied", "Screening", "Onsite"])
+    replan(db_session, job, edits, {stage_id(job, "Interview"): "Onsite"})
+
+    assert stage_name_of(db_session, application) == "Onsite"
+
+
+def test_replace_all_moves_applicants_to_the_first_new_stage(db_session, job):
+    applications = [
+        apply_to(db_session, job, name, f"{name}@example.com")
+        for name in ("Applied", "Interview")
+    ]
+    edits = edits_from_names(job.stages, ["New", "Onsite"])
+    replan(db_session, job, edits)
+
+    assert [stage_name_of(db_session, a) for a in applications] == ["New", "New"]
+
+
+def test_removal_events_record_time_in_stage(db_session, job):
+    application = apply_to(db_session, job, "Interview", "c@example.com")
+    replan(db_session, job, edits_from_names(job.stages, ["Applied"]))
+
+    event = db_session.scalars(
+        select(ApplicationStageEvent)
+        .where(ApplicationStageEvent.application_id == application.id)
+        .order_by(ApplicationStageEvent.id.desc())
+    ).first()
+    assert event.to_stage_id == stage_id(job, "Applied")
+    assert 3590 <= event.seconds_in_from_stage <= 3700
+
+
+def test_invalid_remap_and_empty_list_are_rejected(job):
+    interview = stage_id(job, "Interview")
+    edits = edits_from_names(job.stages, ["Applied"])
+
+    with pytest.raises(ValueError):
+        plan_stage_changes(job.stages, edits, {interview: "Missing"})
+    with pytest.raises(ValueError):
+        plan_stage_changes(job.stages, edits, {interview: interview})
+    with pytest.raises(ValueError):
+        plan_stage_changes(job.stages, [])
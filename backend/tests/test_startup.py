@@ -0,0 +1,21 @@
+import pytest
+
+from app.core.config import settings
+from app.utils.startup import profile_imports, total_import_ms
+
+
+@pytest.fixture(scope="module")
+def import_timings():
+    return profile_imports("app.main")
+
+
+def test_app_import_stays_within_budget(import_timings):
+    total_ms = total_import_ms(import_timings)
+    assert (
+        total_ms <= settings.import_budget_ms
+    ), f"import app.main took {total_ms:.0f} ms"
+
+
+def test_app_import_defers_token_and_password_libraries(import_timings):
+    loaded = {timing.module for timing in import_timings}
+    assert not loaded & {"jose.jwt", "passlib.context"}
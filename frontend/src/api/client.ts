@@ -1,4 +1,4 @@
-import axios from 'axios'
+import axios, { type AxiosError, type InternalAxiosRequestConfig } from 'axios'
 
 const api = axios.create({
   baseURL: import.meta.env.VITE_API_URL ?? 'http://localhost:8000/api/v1'
@@ -12,4 +12,68 @@ export const setAuthToken = (token: string | null) => {
   }
 }
 
+type ReplayableConfig = InternalAxiosRequestConfig & { _replayed?: boolean }
+
+let refreshHandler: (() => Promise<boolean>) | null = null
+let refreshing: Promise<boolean> | null = null
+
+export const setRefreshHandler = (handler: (() => Promise<boolean>) | null) => {
+  refreshHandler = handler
+}
+
+// On a 401, refresh the session and replay the request once. Requests failing together share a
+// single refresh, since the server rotates the refresh token on every use.
+api.interceptors.response.use(undefined, async (error: AxiosError) => {
+  const config = error.config as ReplayableConfig | undefined
+  const isAuthCall = config?.url === '/auth/login' || config?.url === '/auth/refresh'
+  if (error.response?.status !== 401 || !config || config._replayed || isAuthCall || !refreshHandler) {
+    throw error
+  }
+  refreshing ??= refreshHandler().finally(() => {
+    refreshing = null
+  })
+  if (!(await refreshing)) throw error
+  config._replayed = true
+  config.headers.Authorization = api.defaults.headers.common.Authorization as string
+  return api(config)
+})
+
 export default api
+
+type StreamTicket = { ticket: string; expires_in: number }
+
+// EventSource can't send the Authorization header, so every connection uses a short-lived
+// ticket. When the browser's own reconnect fails on an expired ticket, reopen with a fresh
+// one and resume after the last event seen.
+export const openEventStream = (path: string, eventTypes: string[], onEvent: (type: string, data: any) => void) => {
+  let source: EventSource | null = null
+  let lastEventId = ''
+  let stopped = false
+
+  const connect = async () => {
+    const { data } = await api.post<StreamTicket>('/auth/stream-ticket')
+    if (stopped) return
+    const url = new URL(`${api.defaults.baseURL}${path}`, window.location.origin)
+    url.searchParams.set('ticket', data.ticket)
+    if (lastEventId) url.searchParams.set('last_event_id', lastEventId)
+    source = new EventSource(url)
+    for (const type of eventTypes) {
+      source.addEventListener(type, (event) => {
+        const message = event as MessageEvent
+        if (message.lastEventId) lastEventId = message.lastEventId
+        onEvent(type, JSON.parse(message.data))
+      })
+    }
+    source.onerror = () => {
+      if (source?.readyState === EventSource.CLOSED && !stopped) {
+        setTimeout(() => connect().catch(() => undefined), 3000)
+      }
+    }
+  }
+
+  connect().catch(() => undefined)
+  return () => {
+    stopped = true
+    source?.close()
+  }
+}
@@ -1,5 +1,5 @@
 import { defineStore } from 'pinia'
-import api, { setAuthToken } from '../api/client'
+import api, { setAuthToken, setRefreshHandler } from '../api/client'
 
 export type User = {
   id: number
@@ -13,11 +13,15 @@ export type User = {
 }
 
 const TOKEN_KEY = 'rf_token'
+const REFRESH_KEY = 'rf_refresh_token'
+
+type TokenResponse = { access_token: string; refresh_token?: string | null; role: string; full_name?: string | null }
 
 export const useAuthStore = defineStore('auth', {
   state: () => ({
     user: null as User | null,
     token: localStorage.getItem(TOKEN_KEY) as string | null,
+    refreshToken: localStorage.getItem(REFRESH_KEY) as string | null,
     loading: false
   }),
   getters: {
@@ -25,15 +29,31 @@ export const useAuthStore = defineStore('auth', {
     role: (state) => state.user?.role ?? null
   },
   actions: {
-    setSession(token: string | null) {
+    setSession(token: string | null, refreshToken: string | null = null) {
       this.token = token
+      this.refreshToken = refreshToken
       setAuthToken(token)
       if (token) localStorage.setItem(TOKEN_KEY, token)
       else localStorage.removeItem(TOKEN_KEY)
+      if (refreshToken) localStorage.setItem(REFRESH_KEY, refreshToken)
+      else localStorage.removeItem(REFRESH_KEY)
+    },
+    async refresh() {
+      if (!this.refreshToken) return false
+      try {
+        const { data } = await api.post<TokenResponse>('/auth/refresh', { refresh_token: this.refreshToken })
+        this.setSession(data.access_token, data.refresh_token ?? null)
+        return true
+      } catch (error) {
+        this.setSession(null)
+        this.user = null
+        return false
+      }
     },
-    async fetchMe() {
+    async fetchMe(): Promise<User | null> {
       if (!this.token) return null
       try {
+        // An expired access token is refreshed and the call replayed by the client's 401 interceptor
         const { data } = await api.get<User>('/auth/me')
         this.user = data
         return data
@@ -44,6 +64,7 @@ export const useAuthStore = defineStore('auth', {
       }
     },
     async initialize() {
+      setRefreshHandler(() => this.refresh())
       if (this.token) {
         setAuthToken(this.token)
         if (!this.user) await this.fetchMe()
@@ -52,11 +73,11 @@ export const useAuthStore = defineStore('auth', {
     async login(email: string, password: string) {
       this.loading = true
       try {
-        const { data } = await api.post<{ access_token: string; role: string; full_name?: string | null }>('/auth/login', {
+        const { data } = await api.post<TokenResponse>('/auth/login', {
           email,
           password
         })
-        this.setSession(data.access_token)
+        this.setSession(data.access_token, data.refresh_token ?? null)
         await this.fetchMe()
       } finally {
         this.loading = false
@@ -85,6 +106,9 @@ export const useAuthStore = defineStore('auth', {
       await this.register({ ...payload, role: 'recruiter' })
     },
     async logout() {
+      if (this.refreshToken) {
+        await api.post('/auth/logout', { refresh_token: this.refreshToken }).catch(() => undefined)
+      }
       this.setSession(null)
       this.user = null
     }